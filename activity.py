@@ -0,0 +1,182 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections import defaultdict
+from datetime import date, timedelta
+
+from sqlalchemy import Date, bindparam, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from bot.services.render_cache import render_cache
+from db import async_session
+from models import DailyActivity, Group, User, UserGroup
+from repositories import GROUPS_BOARD, group_board, publish_group_totals, publish_member_scores, streak_values
+from upserts import upsert
+from utils import chunked
+
+FLUSH_INTERVAL_SECONDS = 5
+MAX_PENDING_KEYS = 5000
+INSERT_CHUNK_SIZE = 500
+
+logger = logging.getLogger(__name__)
+
+ActivityKey = tuple[int, int, date]
+
+
+class ActivityBuffer:
+    def __init__(self, interval: float = FLUSH_INTERVAL_SECONDS, max_pending: int = MAX_PENDING_KEYS):
+        self.interval = interval
+        self.max_pending = max_pending
+        self._pending: dict[ActivityKey, int] = defaultdict(int)
+        self._user_totals: dict[int, int] = defaultdict(int)
+        self._group_totals: dict[int, int] = defaultdict(int)
+        self._user_group_totals: dict[tuple[int, int], int] = defaultdict(int)
+        # Users whose streak already counts ``_streak_day``; they skip the streak UPDATE.
+        self._streak_day: date | None = None
+        self._streak_marked: set[int] = set()
+        self._flush_lock = asyncio.Lock()
+        self._wake = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    def record(self, user_id: int, group_id: int, day: date | None = None) -> None:
+        self._pending[(user_id, group_id, day or date.today())] += 1
+        self._user_totals[user_id] += 1
+        self._group_totals[group_id] += 1
+        self._user_group_totals[(user_id, group_id)] += 1
+        if len(self._pending) >= self.max_pending:
+            self._wake.set()
+
+    def pending_user_messages(self, user_id: int) -> int:
+        return self._user_totals.get(user_id, 0)
+
+    def pending_group_messages(self, group_id: int) -> int:
+        return self._group_totals.get(group_id, 0)
+
+    def pending_user_group_messages(self, user_id: int, group_id: int) -> int:
+        return self._user_group_totals.get((user_id, group_id), 0)
+
+    async def flush(self) -> int:
+        async with self._flush_lock:
+            if not self._pending:
+                return 0
+            batch, self._pending = self._pending, defaultdict(int)
+            try:
+                async with async_session() as session:
+                    await self._write(session, batch)
+                    await session.commit()
+            except Exception:
+                for key, count in batch.items():
+                    self._pending[key] += count
+                raise
+            self._mark_streaks(batch)
+            for (user_id, group_id, _), count in batch.items():
+                _release(self._user_totals, user_id, count)
+                _release(self._group_totals, group_id, count)
+                _release(self._user_group_totals, (user_id, group_id), count)
+            # Replies rendered between the commit and the release counted these messages twice.
+            render_cache.bump(GROUPS_BOARD, *{group_board(group_id) for _, group_id, _ in batch})
+            return sum(batch.values())
+
+    async def _write(self, session: AsyncSession, batch: dict[ActivityKey, int]) -> None:
+        per_user: dict[int, int] = defaultdict(int)
+        per_group: dict[int, int] = defaultdict(int)
+        per_user_group: dict[tuple[int, int], int] = defaultdict(int)
+        per_user_day: dict[tuple[int, date], int] = defaultdict(int)
+        users_by_day: dict[date, set[int]] = defaultdict(set)
+        for (user_id, group_id, day), count in batch.items():
+            per_user[user_id] += count
+            per_group[group_id] += count
+            per_user_group[(user_id, group_id)] += count
+            per_user_day[(user_id, day)] += count
+            users_by_day[day].add(user_id)
+
+        users = User.__table__
+        await session.execute(
+            update(users)
+            .where(users.c.id == bindparam("b_id"))
+            .values(total_messages=users.c.total_messages + bindparam("b_count")),
+            [{"b_id": key, "b_count": count} for key, count in per_user.items()],
+        )
+        for day in sorted(users_by_day):
+            fresh = users_by_day[day] - self._streak_marked if day == self._streak_day else users_by_day[day]
+            if not fresh:
+                continue
+            await session.execute(
+                update(users)
+                .where(
+                    users.c.id == bindparam("b_id"),
+                    users.c.last_active_day.is_(None) | (users.c.last_active_day < bindparam("b_day", type_=Date)),
+                )
+                .values(streak_values(bindparam("b_day", type_=Date), bindparam("b_previous", type_=Date))),
+                [{"b_id": user_id, "b_day": day, "b_previous": day - timedelta(days=1)} for user_id in fresh],
+            )
+        groups = Group.__table__
+        await session.execute(
+            update(groups)
+            .where(groups.c.id == bindparam("b_id"))
+            .values(total_messages=groups.c.total_messages + bindparam("b_count")),
+            [{"b_id": key, "b_count": count} for key, count in per_group.items()],
+        )
+
+        user_group_rows = [
+            {"user_id": user_id, "group_id": group_id, "message_count": count}
+            for (user_id, group_id), count in per_user_group.items()
+        ]
+        for rows in chunked(user_group_rows, INSERT_CHUNK_SIZE):
+            await session.execute(
+                upsert(session, UserGroup.__table__, rows, "uq_user_group", increment=("message_count",))
+            )
+
+        daily_rows = [
+            {"user_id": user_id, "day": day, "count": count} for (user_id, day), count in per_user_day.items()
+        ]
+        for rows in chunked(daily_rows, INSERT_CHUNK_SIZE):
+            await session.execute(upsert(session, DailyActivity.__table__, rows, "uq_user_day", increment=("count",)))
+
+        await publish_member_scores(session, per_user, per_group)
+        await publish_group_totals(session, per_group)
+
+    def _mark_streaks(self, batch: dict[ActivityKey, int]) -> None:
+        latest = max(day for _, _, day in batch)
+        if latest != self._streak_day:
+            self._streak_day = latest
+            self._streak_marked = set()
+        self._streak_marked.update(user_id for user_id, _, day in batch if day == latest)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Activity flush failed; deltas kept for the next attempt")
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+
+def _release(totals: dict, key, count: int) -> None:
+    remaining = totals.get(key, 0) - count
+    if remaining > 0:
+        totals[key] = remaining
+    else:
+        totals.pop(key, None)
+
+
+activity_buffer = ActivityBuffer()
@@ -32,6 +32,10 @@ class Settings(BaseSettings):
 
     flood_limit_default: int = Field(default=6)
     flood_window_seconds: int = Field(default=10)
+    # Cap on (chat, user) keys the in-memory antiflood fallback keeps while Redis is down.
+    flood_memory_keys: int = Field(default=100_000, alias="FLOOD_MEMORY_KEYS")
+    # Optional cap on in-memory cooldown keys; expired ones are swept either way.
+    cooldown_memory_keys: Optional[int] = Field(default=None, alias="COOLDOWN_MEMORY_KEYS")
 
     max_warns_default: int = Field(default=3)
     warn_action_default: str = Field(default="mute")
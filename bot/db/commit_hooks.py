@@ -0,0 +1,27 @@
+"""Callbacks deferred until a session's transaction commits, shared by both bots."""
+from __future__ import annotations
+
+from typing import Callable
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+ON_COMMIT_KEY = "on_commit"
+
+
+def on_commit(session: AsyncSession, callback: Callable[[], None]) -> None:
+    """Run ``callback`` once the session's current transaction commits."""
+    session.info.setdefault(ON_COMMIT_KEY, []).append(callback)
+
+
+# Registered once on the Session class, however many modules use on_commit.
+@event.listens_for(Session, "after_commit")
+def _run_commit_callbacks(session: Session) -> None:
+    for callback in session.info.pop(ON_COMMIT_KEY, []):
+        callback()
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _drop_commit_callbacks(session: Session, previous_transaction) -> None:
+    session.info.pop(ON_COMMIT_KEY, None)
@@ -4,28 +4,112 @@ from __future__ import annotations
 from datetime import datetime, timedelta
 from typing import Optional
 
-from sqlalchemy import select, func, update, delete
+from sqlalchemy import event, select, func, update, delete
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import object_session
+
+from bot.services.leaderboard_store import Boards, leaderboards
+from bot.services.render_cache import render_cache
+from bot.utils.identity_cache import CachedIdentity, IdentityCache
 
 from .models import User, Group, Warn, Transaction, TransactionType, WarnAction
+from .session import on_commit
+
+
+USER_CACHE_SIZE = 50_000
+GROUP_CACHE_SIZE = 10_000
+
+BALANCE_BOARD = "balance"
+KILLS_BOARD = "kills"
+
+user_cache = IdentityCache(maxsize=USER_CACHE_SIZE)
+group_cache = IdentityCache(maxsize=GROUP_CACHE_SIZE)
+
+
+def _remember(session: AsyncSession, cache: IdentityCache, key: int, profile: tuple) -> None:
+    # Entries are published on commit so a rolled back insert is never cached.
+    on_commit(session, lambda: cache.put(key, key, profile))
+
+
+def _publish_score(user: User, board: str, value: int) -> None:
+    session = object_session(user)
+    # Rows built in the constructor have no session yet; they start at zero anyway.
+    if session is None:
+        return
+    _publish(session, board, user.user_id, value)
+
+
+def _publish(session: AsyncSession, board: str, user_id: int, value: int) -> None:
+    def publish() -> None:
+        if leaderboards.enabled:
+            leaderboards.set(board, user_id, value)
+        render_cache.bump(board)
+
+    on_commit(session, publish)
+
+
+@event.listens_for(User.balance, "set")
+def _balance_changed(user: User, value: int, oldvalue, initiator) -> None:
+    _publish_score(user, BALANCE_BOARD, value)
+
+
+@event.listens_for(User.kills, "set")
+def _kills_changed(user: User, value: int, oldvalue, initiator) -> None:
+    _publish_score(user, KILLS_BOARD, value)
+
+
+async def leaderboard_boards(session: AsyncSession) -> Boards:
+    result = await session.execute(select(User.user_id, User.balance, User.kills))
+    boards: Boards = {BALANCE_BOARD: {}, KILLS_BOARD: {}}
+    for user_id, balance, kills in result.all():
+        boards[BALANCE_BOARD][user_id] = balance or 0
+        boards[KILLS_BOARD][user_id] = kills or 0
+    return boards
+
+
+async def _ranked_users(session: AsyncSession, board: str, limit: int) -> list[User] | None:
+    ranked = await leaderboards.top(board, limit)
+    if ranked is None:
+        return None
+    ids = [user_id for user_id, _ in ranked]
+    users = {user.user_id: user for user in (await session.execute(select(User).where(User.user_id.in_(ids)))).scalars()}
+    return [users[user_id] for user_id in ids if user_id in users]
 
 
 async def get_or_create_user(session: AsyncSession, user_id: int, username: Optional[str], first_name: Optional[str]) -> User:
-    result = await session.execute(select(User).where(User.user_id == user_id))
-    user = result.scalar_one_or_none()
+    return await _load_user(session, user_id, (username, first_name), user_cache.peek(user_id))
+
+
+async def ensure_user(session: AsyncSession, user_id: int, username: Optional[str], first_name: Optional[str]) -> None:
+    """Make sure the user row exists without loading it when the cache is warm."""
+    profile = (username, first_name)
+    cached = user_cache.get(user_id)
+    if not cached:
+        await _load_user(session, user_id, profile, None)
+    elif cached.profile != profile:
+        await session.execute(update(User).where(User.user_id == user_id).values(username=username, first_name=first_name))
+        _remember(session, user_cache, user_id, profile)
+
+
+async def _load_user(session: AsyncSession, user_id: int, profile: tuple, cached: CachedIdentity | None) -> User:
+    user = await session.get(User, user_id)
     if not user:
-        user = User(user_id=user_id, username=username, first_name=first_name, balance=0)
+        user = User(user_id=user_id, username=profile[0], first_name=profile[1], balance=0)
         session.add(user)
         await session.flush()
-    else:
-        user.username = username
-        user.first_name = first_name
+    elif not cached or cached.profile != profile:
+        user.username, user.first_name = profile
+    if not cached or cached.profile != profile:
+        _remember(session, user_cache, user_id, profile)
     return user
 
 
 async def get_or_create_group(session: AsyncSession, group_id: int, title: str) -> Group:
-    result = await session.execute(select(Group).where(Group.group_id == group_id))
-    group = result.scalar_one_or_none()
+    return await _load_group(session, group_id, title, group_cache.peek(group_id))
+
+
+async def _load_group(session: AsyncSession, group_id: int, title: str, cached: CachedIdentity | None) -> Group:
+    group = await session.get(Group, group_id)
     if not group:
         group = Group(
             group_id=group_id,
@@ -33,11 +117,31 @@ async def get_or_create_group(session: AsyncSession, group_id: int, title: str)
         )
         session.add(group)
         await session.flush()
-    else:
+    elif not cached or cached.profile != (title,):
         group.title = title
+    if not cached or cached.profile != (title,):
+        _remember(session, group_cache, group_id, (title,))
     return group
 
 
+async def ensure_group(session: AsyncSession, group_id: int, title: str) -> None:
+    """Make sure the group row exists without loading it when the cache is warm."""
+    cached = group_cache.get(group_id)
+    if not cached:
+        await _load_group(session, group_id, title, None)
+    elif cached.profile != (title,):
+        await session.execute(update(Group).where(Group.group_id == group_id).values(title=title))
+        _remember(session, group_cache, group_id, (title,))
+
+
+async def update_group(session: AsyncSession, group_id: int, **values) -> None:
+    await session.execute(update(Group).where(Group.group_id == group_id).values(**values))
+
+
+def identity_cache_stats() -> dict[str, dict[str, int]]:
+    return {"users": user_cache.stats(), "groups": group_cache.stats()}
+
+
 async def add_warn(session: AsyncSession, group_id: int, user_id: int, admin_id: int, reason: str) -> Warn:
     warn = Warn(group_id=group_id, user_id=user_id, admin_id=admin_id, reason=reason)
     session.add(warn)
@@ -77,6 +181,9 @@ async def add_transaction(
 
 
 async def leaderboard_balance(session: AsyncSession, limit: int = 10) -> list[User]:
+    ranked = await _ranked_users(session, BALANCE_BOARD, limit)
+    if ranked is not None:
+        return ranked
     result = await session.execute(select(User).order_by(User.balance.desc()).limit(limit))
     return list(result.scalars())
 
@@ -90,14 +197,20 @@ async def recent_transactions(session: AsyncSession, user_id: int, limit: int =
     return list(result.scalars())
 
 
-async def increment_kill(session: AsyncSession, killer_id: int, victim_id: int):
-    killer = await get_or_create_user(session, killer_id, None, None)
-    victim = await get_or_create_user(session, victim_id, None, None)
-    killer.kills += 1
-    victim.deaths += 1
-    await session.flush()
+async def increment_kill(session: AsyncSession, killer, victim) -> None:
+    # Counters are bumped in place, so a warm identity cache means no row is loaded.
+    await ensure_user(session, killer.id, killer.username, killer.first_name)
+    await ensure_user(session, victim.id, victim.username, victim.first_name)
+    kills = await session.scalar(
+        update(User).where(User.user_id == killer.id).values(kills=func.coalesce(User.kills, 0) + 1).returning(User.kills)
+    )
+    await session.execute(update(User).where(User.user_id == victim.id).values(deaths=func.coalesce(User.deaths, 0) + 1))
+    _publish(session, KILLS_BOARD, killer.id, kills)
 
 
 async def top_killers(session: AsyncSession, limit: int = 10) -> list[User]:
+    ranked = await _ranked_users(session, KILLS_BOARD, limit)
+    if ranked is not None:
+        return ranked
     result = await session.execute(select(User).order_by(User.kills.desc()).limit(limit))
     return list(result.scalars())
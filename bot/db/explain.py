@@ -0,0 +1,59 @@
+"""Query-plan checks that flag hot queries falling back to full table scans."""
+from __future__ import annotations
+
+import re
+from typing import Collection, Iterable, NamedTuple
+
+from sqlalchemy import inspect
+from sqlalchemy.engine import Connection
+from sqlalchemy.sql import Executable
+
+# SQLite prints "SCAN users" (older versions "SCAN TABLE users") for an unindexed pass,
+# and "SCAN users USING INDEX ..." when it walks an index in order, which is fine.
+SQLITE_FULL_SCAN = re.compile(r"^SCAN (?:TABLE )?(\w+)(?: AS \w+)?$")
+POSTGRES_FULL_SCAN = re.compile(r"Seq Scan on (\w+)")
+
+
+class QueryPlan(NamedTuple):
+    name: str
+    lines: list[str]
+    full_scans: list[str]
+
+
+def explain(connection: Connection, statement: Executable) -> list[str]:
+    sql = str(statement.compile(dialect=connection.dialect, compile_kwargs={"literal_binds": True}))
+    if connection.dialect.name == "sqlite":
+        return [row.detail for row in connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}")]
+    return [row[0] for row in connection.exec_driver_sql(f"EXPLAIN {sql}")]
+
+
+def full_scans(lines: Iterable[str], dialect: str, tables: Collection[str] | None = None) -> list[str]:
+    # ``tables`` limits the check to real tables; SQLite also reports "SCAN <cte>" for
+    # the working set of a recursive CTE, which is expected.
+    scanned = []
+    for line in lines:
+        if dialect == "sqlite":
+            match = SQLITE_FULL_SCAN.match(line.strip())
+        else:
+            match = POSTGRES_FULL_SCAN.search(line)
+        if match and (tables is None or match.group(1) in tables):
+            scanned.append(match.group(1))
+    return scanned
+
+
+def check_plans(connection: Connection, queries: dict[str, Executable]) -> list[QueryPlan]:
+    tables = set(inspect(connection).get_table_names())
+    plans = []
+    for name, statement in queries.items():
+        lines = explain(connection, statement)
+        plans.append(QueryPlan(name, lines, full_scans(lines, connection.dialect.name, tables)))
+    return plans
+
+
+def format_plans(plans: Iterable[QueryPlan]) -> str:
+    out = []
+    for plan in plans:
+        status = f"FULL SCAN: {', '.join(plan.full_scans)}" if plan.full_scans else "ok"
+        out.append(f"{plan.name} [{status}]")
+        out.extend(f"    {line}" for line in plan.lines)
+    return "\n".join(out)
@@ -0,0 +1,40 @@
+"""Hot queries of the premium bot schema; run as a module to print their plans."""
+from __future__ import annotations
+
+import asyncio
+
+from sqlalchemy import select
+from sqlalchemy.sql import Executable
+
+from .explain import check_plans, format_plans
+from .models import Transaction, User, Warn
+from .session import engine
+
+# Placeholder ids; the plan depends on the shape of the query, not on the values.
+SAMPLE_ID = 1
+
+
+def hot_queries() -> dict[str, Executable]:
+    return {
+        "top balance": select(User).order_by(User.balance.desc()).limit(10),
+        "top killers": select(User).order_by(User.kills.desc()).limit(10),
+        "warns": select(Warn)
+        .where(Warn.group_id == SAMPLE_ID, Warn.user_id == SAMPLE_ID)
+        .order_by(Warn.created_at.desc()),
+        "transactions": select(Transaction)
+        .where((Transaction.from_id == SAMPLE_ID) | (Transaction.to_id == SAMPLE_ID))
+        .order_by(Transaction.created_at.desc())
+        .limit(10),
+    }
+
+
+async def main() -> int:
+    async with engine.connect() as conn:
+        plans = await conn.run_sync(check_plans, hot_queries())
+    await engine.dispose()
+    print(format_plans(plans))
+    return sum(1 for plan in plans if plan.full_scans)
+
+
+if __name__ == "__main__":
+    raise SystemExit(1 if asyncio.run(main()) else 0)
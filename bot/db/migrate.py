@@ -0,0 +1,31 @@
+"""Run the Alembic migrations for either schema on an open connection."""
+from __future__ import annotations
+
+from pathlib import Path
+
+from alembic import command
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from sqlalchemy import inspect
+from sqlalchemy.engine import Connection
+
+ALEMBIC_INI = Path(__file__).resolve().parents[2] / "alembic.ini"
+BASELINE_REVISION = "0001"
+
+
+def alembic_config(section: str = "alembic", connection: Connection | None = None) -> Config:
+    config = Config(str(ALEMBIC_INI), ini_section=section)
+    if connection is not None:
+        config.attributes["connection"] = connection
+        config.attributes["configure_logger"] = False
+    return config
+
+
+def upgrade_schema(connection: Connection, section: str = "alembic") -> None:
+    """Upgrade to head, adopting databases that ``create_all`` built before migrations existed."""
+    config = alembic_config(section, connection)
+    current = MigrationContext.configure(connection).get_current_revision()
+    tables = set(inspect(connection).get_table_names()) - {"alembic_version"}
+    if current is None and tables:
+        command.stamp(config, BASELINE_REVISION)
+    command.upgrade(config, "head")
@@ -5,7 +5,7 @@ import enum
 from datetime import datetime
 from typing import Optional
 
-from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Integer, JSON, String, BigInteger, UniqueConstraint
+from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Index, Integer, JSON, String, BigInteger, UniqueConstraint
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from .session import Base
@@ -22,8 +22,8 @@ class User(Base):
     user_id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=False)
     username: Mapped[Optional[str]] = mapped_column(String(32))
     first_name: Mapped[Optional[str]] = mapped_column(String(128))
-    balance: Mapped[int] = mapped_column(Integer, default=0)
-    kills: Mapped[int] = mapped_column(Integer, default=0)
+    balance: Mapped[int] = mapped_column(Integer, default=0, index=True)
+    kills: Mapped[int] = mapped_column(Integer, default=0, index=True)
     deaths: Mapped[int] = mapped_column(Integer, default=0)
     streak: Mapped[int] = mapped_column(Integer, default=0)
     last_daily_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
@@ -70,7 +70,10 @@ class Warn(Base):
     group: Mapped[Group] = relationship(back_populates="warns")
     user: Mapped[User] = relationship(back_populates="warns")
 
-    __table_args__ = (UniqueConstraint("id", "group_id"),)
+    __table_args__ = (
+        UniqueConstraint("id", "group_id"),
+        Index("ix_warns_group_user", "group_id", "user_id"),
+    )
 
 
 class TransactionType(enum.StrEnum):
@@ -82,6 +85,10 @@ class TransactionType(enum.StrEnum):
 
 class Transaction(Base):
     __tablename__ = "transactions"
+    __table_args__ = (
+        Index("ix_transactions_from_created", "from_id", "created_at"),
+        Index("ix_transactions_to_created", "to_id", "created_at"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     from_id: Mapped[Optional[int]] = mapped_column(BigInteger, nullable=True)
@@ -8,6 +8,7 @@ from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine, Asyn
 from sqlalchemy.orm import DeclarativeBase
 
 from bot.config import settings
+from bot.db.commit_hooks import on_commit
 
 
 class Base(DeclarativeBase):
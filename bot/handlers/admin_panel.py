@@ -3,6 +3,7 @@ from __future__ import annotations
 from aiogram import Router, types
 from aiogram.filters import Command
 
+from bot.services.outbound import outbound
 from bot.utils.cards import render_card
 from bot.utils.permissions import ensure_private_chat
 
@@ -18,4 +19,4 @@ async def cmd_panel(message: types.Message, session):
         "Group-only tools: /rules to show your configured rules.",
         "Tip: give me delete, ban, and restrict rights so actions never fail.",
     ]
-    await message.reply(render_card("🛠 Admin Panel", lines, footer="Run moderation commands directly in your group."))
+    outbound.reply(message, render_card("🛠 Admin Panel", lines, footer="Run moderation commands directly in your group."))
@@ -8,6 +8,8 @@ from aiogram.filters import Command
 
 from bot.db import crud
 from bot.services.economy_service import EconomyService
+from bot.services.outbound import outbound
+from bot.services.render_cache import render_cache
 from bot.utils.cards import render_card
 from bot.utils.errors import BotError, CooldownError
 from bot.utils.permissions import ensure_group_chat
@@ -15,22 +17,22 @@ from bot.utils.rate_limit import RateLimiter
 
 router = Router()
 
-cooldowns = RateLimiter()
-economy_service = EconomyService(rate_limiter=cooldowns)
+economy_service = EconomyService(rate_limiter=None)
 
 
-async def _cooldown(key: str, seconds: int):
-    if not await cooldowns.hit(key, seconds):
-        rem = await cooldowns.remaining(key)
+async def _cooldown(rate_limiter: RateLimiter, key: str, seconds: int):
+    # The limiter bot/main.py injects: shared Redis behind its breaker, capped memory otherwise.
+    if not await rate_limiter.hit(key, seconds):
+        rem = await rate_limiter.remaining(key)
         raise CooldownError(rem)
 
 
 @router.message(Command("rob"))
-async def cmd_rob(message: types.Message, session):
+async def cmd_rob(message: types.Message, session, rate_limiter: RateLimiter):
     await ensure_group_chat(message)
     if not message.reply_to_message:
         raise BotError("Reply to someone to rob them")
-    await _cooldown(f"rob:{message.from_user.id}", 120)
+    await _cooldown(rate_limiter, f"rob:{message.from_user.id}", 120)
     victim = await economy_service.ensure_user(session, message.reply_to_message.from_user)
     thief = await economy_service.ensure_user(session, message.from_user)
     stolen = min(50, victim.balance)
@@ -38,36 +40,41 @@ async def cmd_rob(message: types.Message, session):
     thief.balance += stolen
     await crud.add_transaction(session, from_id=victim.user_id, to_id=thief.user_id, amount=stolen, tx_type=crud.TransactionType.penalty, meta={})
     await session.commit()
-    await message.reply(render_card("🕵️ Robbery", [f"Stole {stolen} coins from {victim.first_name or victim.user_id}"]))
+    outbound.reply(message, render_card("🕵️ Robbery", [f"Stole {stolen} coins from {victim.first_name or victim.user_id}"]))
 
 
 @router.message(Command("kill"))
-async def cmd_kill(message: types.Message, session):
+async def cmd_kill(message: types.Message, session, rate_limiter: RateLimiter):
     await ensure_group_chat(message)
     if not message.reply_to_message:
         raise BotError("Reply to someone to engage")
-    await _cooldown(f"kill:{message.from_user.id}", 180)
-    await crud.increment_kill(session, message.from_user.id, message.reply_to_message.from_user.id)
+    await _cooldown(rate_limiter, f"kill:{message.from_user.id}", 180)
+    await crud.increment_kill(session, message.from_user, message.reply_to_message.from_user)
     await session.commit()
-    await message.reply(render_card("⚔️ Duel", [f"{message.from_user.full_name} eliminated {message.reply_to_message.from_user.full_name}"]))
+    outbound.reply(message, render_card("⚔️ Duel", [f"{message.from_user.full_name} eliminated {message.reply_to_message.from_user.full_name}"]))
 
 
 @router.message(Command("revive"))
 async def cmd_revive(message: types.Message, session):
     await ensure_group_chat(message)
-    await message.reply(render_card("❤️ Revive", ["You feel refreshed."]))
+    outbound.reply(message, render_card("❤️ Revive", ["You feel refreshed."]))
 
 
 @router.message(Command("protect"))
-async def cmd_protect(message: types.Message):
+async def cmd_protect(message: types.Message, rate_limiter: RateLimiter):
     await ensure_group_chat(message)
-    await _cooldown(f"protect:{message.from_user.id}", 300)
-    await message.reply(render_card("🛡 Protection", ["Shield enabled for next hit!"]))
+    await _cooldown(rate_limiter, f"protect:{message.from_user.id}", 300)
+    outbound.reply(message, render_card("🛡 Protection", ["Shield enabled for next hit!"]))
+
+
+async def _render_topkill(session) -> str:
+    top = await crud.top_killers(session, limit=10)
+    lines = [f"{idx+1}. {u.first_name or u.user_id}: {u.kills}" for idx, u in enumerate(top)]
+    return render_card("🏴 Top Killers", lines or ["No data"])
 
 
 @router.message(Command("topkill"))
 async def cmd_topkill(message: types.Message, session):
     await ensure_group_chat(message)
-    top = await crud.top_killers(session, limit=10)
-    lines = [f"{idx+1}. {u.first_name or u.user_id}: {u.kills}" for idx, u in enumerate(top)]
-    await message.reply(render_card("🏴 Top Killers", lines or ["No data"]))
+    text = await render_cache.get("topkill", [crud.KILLS_BOARD], lambda: _render_topkill(session))
+    outbound.reply(message, text)
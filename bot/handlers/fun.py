@@ -5,6 +5,7 @@ import random
 from aiogram import Router, types
 from aiogram.filters import Command
 
+from bot.services.outbound import outbound
 from bot.utils.cards import render_card
 
 router = Router()
@@ -20,12 +21,12 @@ ACTIONS = {
 
 async def _action(message: types.Message, verb: str):
     if not message.reply_to_message:
-        await message.reply("Reply to someone to interact")
+        outbound.reply(message, "Reply to someone to interact")
         return
     actor = message.from_user.full_name
     target = message.reply_to_message.from_user.full_name
     text = ACTIONS[verb].format(actor=actor, target=target)
-    await message.reply(render_card("🎭 Action", [text]))
+    outbound.reply(message, render_card("🎭 Action", [text]))
 
 
 for verb in ACTIONS.keys():
@@ -9,6 +9,7 @@ from aiogram.types import ChatPermissions
 
 from bot.db import crud
 from bot.services import moderation_service
+from bot.services.outbound import outbound
 from bot.utils.cards import render_card
 from bot.utils.errors import BotError
 from bot.utils.permissions import ensure_admin, ensure_group_chat, ensure_target_actionable
@@ -45,8 +46,8 @@ async def cmd_warn(message: types.Message, session):
         [f"👤 Target: {replied.from_user.full_name}", f"⚠ Count: {count}", f"📝 Reason: {reason}"],
         footer=f"Action on max: {action.value.upper()}",
     )
-    await message.reply(card)
-    if count >= (await moderation_service.get_group_settings(session, message.chat))["max_warns"]:
+    outbound.reply(message, card)
+    if count >= (await moderation_service.get_group_settings(session, message.chat)).max_warns:
         if action.value == "mute":
             until = message.date + timedelta(seconds=3600)
             await _safe_telegram(
@@ -68,10 +69,10 @@ async def cmd_warns(message: types.Message, session):
     target = message.reply_to_message.from_user if message.reply_to_message else message.from_user
     warns = await crud.get_warns(session, message.chat.id, target.id)
     if not warns:
-        await message.reply("No warnings.")
+        outbound.reply(message, "No warnings.")
         return
     lines = [f"{w.created_at:%Y-%m-%d}: {w.reason}" for w in warns[:5]]
-    await message.reply(render_card("⚠ Warns", lines, footer=f"Total: {len(warns)}"))
+    outbound.reply(message, render_card("⚠ Warns", lines, footer=f"Total: {len(warns)}"))
 
 
 @router.message(Command("resetwarns"))
@@ -80,7 +81,7 @@ async def cmd_resetwarns(message: types.Message, session):
     await ensure_admin(message)
     replied = await _ensure_reply(message)
     count = await moderation_service.reset_warns(session, message.chat, replied.from_user.id)
-    await message.reply(render_card("✅ Warns reset", [f"Removed: {count}"]))
+    outbound.reply(message, render_card("✅ Warns reset", [f"Removed: {count}"]))
 
 
 @router.message(Command("mute"))
@@ -103,7 +104,7 @@ async def cmd_mute(message: types.Message):
         ),
         "I could not mute this user.",
     )
-    await message.reply(render_card("🔇 Muted", [f"Duration: {parts[1]}"]))
+    outbound.reply(message, render_card("🔇 Muted", [f"Duration: {parts[1]}"]))
 
 
 @router.message(Command("unmute"))
@@ -115,7 +116,7 @@ async def cmd_unmute(message: types.Message):
         message.bot.restrict_chat_member(message.chat.id, replied.from_user.id, ChatPermissions(can_send_messages=True)),
         "I could not unmute this user.",
     )
-    await message.reply(render_card("🔊 Unmuted", [replied.from_user.full_name]))
+    outbound.reply(message, render_card("🔊 Unmuted", [replied.from_user.full_name]))
 
 
 @router.message(Command("ban"))
@@ -125,7 +126,7 @@ async def cmd_ban(message: types.Message):
     replied = await _ensure_reply(message)
     await ensure_target_actionable(message.bot, message.chat.id, replied.from_user.id)
     await _safe_telegram(message.bot.ban_chat_member(message.chat.id, replied.from_user.id), "Unable to ban this user.")
-    await message.reply(render_card("🚫 Banned", [replied.from_user.full_name]))
+    outbound.reply(message, render_card("🚫 Banned", [replied.from_user.full_name]))
 
 
 @router.message(Command("unban"))
@@ -138,7 +139,7 @@ async def cmd_unban(message: types.Message):
     target = parts[1].lstrip("@")
     target_id = int(target) if target.isdigit() else target
     await _safe_telegram(message.bot.unban_chat_member(message.chat.id, target_id), "Unable to unban that user.")
-    await message.reply(render_card("✅ Unbanned", [str(target_id)]))
+    outbound.reply(message, render_card("✅ Unbanned", [str(target_id)]))
 
 
 @router.message(Command("kick"))
@@ -149,7 +150,7 @@ async def cmd_kick(message: types.Message):
     await ensure_target_actionable(message.bot, message.chat.id, replied.from_user.id)
     await _safe_telegram(message.bot.ban_chat_member(message.chat.id, replied.from_user.id), "Unable to kick this user.")
     await _safe_telegram(message.bot.unban_chat_member(message.chat.id, replied.from_user.id), "Unable to finalize kick.")
-    await message.reply(render_card("👢 Kicked", [replied.from_user.full_name]))
+    outbound.reply(message, render_card("👢 Kicked", [replied.from_user.full_name]))
 
 
 @router.message(Command("del"))
@@ -187,5 +188,5 @@ async def cmd_purge(message: types.Message):
 async def cmd_rules(message: types.Message, session):
     await ensure_group_chat(message)
     group = await moderation_service.get_group_settings(session, message.chat)
-    rules_text = group.get("rules_text") or "No rules set."
-    await message.reply(render_card("📜 Rules", [rules_text]))
+    rules_text = group.rules_text or "No rules set."
+    outbound.reply(message, render_card("📜 Rules", [rules_text]))
@@ -4,6 +4,7 @@ from aiogram import F, Router, types
 from aiogram.filters import Command
 
 from bot.keys.home import back_home, main_menu
+from bot.services.outbound import outbound
 from bot.utils.cards import render_card
 
 router = Router()
@@ -121,22 +122,22 @@ def _moderation_text() -> str:
 
 @router.message(Command("start"))
 async def cmd_start(message: types.Message):
-    await message.answer(_home_text(), reply_markup=main_menu())
+    outbound.answer(message, _home_text(), reply_markup=main_menu())
 
 
 @router.message(Command("help"))
 async def cmd_help(message: types.Message):
-    await message.answer(_help_text())
+    outbound.answer(message, _help_text())
 
 
 async def _handle_menu(event: types.Message | types.CallbackQuery, text: str, *, root: bool = False):
     markup = main_menu() if root else back_home()
     if isinstance(event, types.CallbackQuery):
         if event.message:
-            await event.message.edit_text(text, reply_markup=markup)
+            outbound.edit_text(event.message, text, reply_markup=markup)
         await event.answer()
     else:
-        await event.answer(text, reply_markup=markup)
+        outbound.answer(event, text, reply_markup=markup)
 
 
 @router.callback_query(F.data == "menu:home")
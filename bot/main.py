@@ -11,12 +11,17 @@ from aiogram.enums import ParseMode
 from aiogram.types import BotCommand, BotCommandScopeAllGroupChats, BotCommandScopeAllPrivateChats
 
 from bot.config import settings
-from bot.db.session import SessionLocal, engine, Base
+from bot.db import crud
+from bot.db.migrate import upgrade_schema
+from bot.db.session import SessionLocal, engine
 from bot.handlers import start, admin_panel, moderation, economy, combat, fun, games
 from bot.middlewares.antiflood import AntifloodMiddleware
 from bot.middlewares.errors import ErrorMiddleware
 from bot.services.antiflood_service import AntifloodService
+from bot.services.leaderboard_store import Boards, leaderboards
+from bot.services.outbound import outbound
 from bot.utils.rate_limit import RateLimiter
+from bot.utils.redis_pool import RedisPool
 
 
 async def setup_logging():
@@ -38,9 +43,14 @@ async def setup_logging():
 
 
 async def init_db() -> None:
-    # Ensure tables exist before polling to avoid runtime errors on new deployments.
+    # Migrate before polling so new deployments get their tables and old ones their indexes.
     async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(upgrade_schema, "bot")
+
+
+async def load_leaderboards() -> Boards:
+    async with SessionLocal() as session:
+        return await crud.leaderboard_boards(session)
 
 
 async def command_setup(bot: Bot):
@@ -90,8 +100,12 @@ async def main():
     bot = Bot(token=settings.bot_token, default=DefaultBotProperties(parse_mode=ParseMode.MARKDOWN))
     dp = Dispatcher()
 
-    rate_limiter = RateLimiter(settings.resolved_redis_url)
-    antiflood_service = AntifloodService(settings.resolved_redis_url)
+    # One client for cooldowns, antiflood and leaderboards; its breaker sends them to their
+    # fallbacks while Redis is down.
+    # Handlers get rate_limiter from the middleware below, so /rob, /kill, /protect and /daily share it.
+    redis_pool = RedisPool(settings.resolved_redis_url)
+    rate_limiter = RateLimiter(redis_pool, max_memory_keys=settings.cooldown_memory_keys)
+    antiflood_service = AntifloodService(redis_pool, max_memory_keys=settings.flood_memory_keys)
 
     dp.update.middleware(ErrorMiddleware())
 
@@ -118,7 +132,18 @@ async def main():
 
     await bot.delete_webhook(drop_pending_updates=True)
     await init_db()
-    await dp.start_polling(bot)
+    await leaderboards.start(load_leaderboards, settings.resolved_redis_url, prefix="bot:lb:", pool=redis_pool)
+    outbound.start(bot)
+    antiflood_service.start()
+    rate_limiter.start()
+    try:
+        await dp.start_polling(bot)
+    finally:
+        await rate_limiter.stop()
+        await antiflood_service.stop()
+        await outbound.stop()
+        await leaderboards.stop()
+        await redis_pool.close()
 
 
 if __name__ == "__main__":
@@ -21,9 +21,9 @@ class AntifloodMiddleware(BaseMiddleware):
         if not session:
             return await handler(event, data)
         group_settings = await moderation_service.get_group_settings(session, event.chat)
-        if not group_settings.get("antiflood_enabled", True):
+        if not group_settings.antiflood_enabled:
             return await handler(event, data)
-        flood_settings = FloodSettings(limit=group_settings["flood_limit"], window=group_settings["flood_window"])
+        flood_settings = FloodSettings(limit=group_settings.flood_limit, window=group_settings.flood_window)
         count = await self.service.hit(event.chat.id, event.from_user.id, flood_settings)
         if count > flood_settings.limit:
             try:
@@ -1,12 +1,17 @@
 from __future__ import annotations
 
+import logging
+
 from aiogram import BaseMiddleware
-from aiogram.exceptions import TelegramAPIError
-from aiogram.types import CallbackQuery, Message
+from aiogram.exceptions import TelegramAPIError, TelegramRetryAfter
+from aiogram.types import CallbackQuery, Message, Update
 
+from bot.services.outbound import outbound
 from bot.utils.cards import render_card
 from bot.utils.errors import BotError
 
+logger = logging.getLogger(__name__)
+
 
 class ErrorMiddleware(BaseMiddleware):
     """Catch user-facing errors and present consistent replies."""
@@ -16,13 +21,29 @@ class ErrorMiddleware(BaseMiddleware):
             return await handler(event, data)
         except BotError as exc:
             await self._respond(event, exc.message)
+        except TelegramRetryAfter as exc:
+            # A flood wait is not the user's fault; hold the chat back instead of replying into it.
+            chat_id = self._chat_id(event)
+            logger.warning("Flood wait of %ss in chat %s", exc.retry_after, chat_id)
+            if chat_id is not None:
+                outbound.pause(chat_id, exc.retry_after)
         except TelegramAPIError:
             await self._respond(event, "I could not complete that action. Please ensure I have the required rights.")
 
+    @staticmethod
+    def _chat_id(event) -> int | None:
+        if isinstance(event, Update):
+            event = event.event
+        if isinstance(event, CallbackQuery):
+            event = event.message
+        return event.chat.id if isinstance(event, Message) else None
+
     async def _respond(self, event, text: str):
+        if isinstance(event, Update):
+            event = event.event
         if isinstance(event, CallbackQuery):
             if event.message:
-                await event.message.answer(render_card("⚠️ Oops", [text]))
+                outbound.answer(event.message, render_card("⚠️ Oops", [text]), coalesce=True)
             await event.answer(text, show_alert=True)
         elif isinstance(event, Message):
-            await event.answer(render_card("⚠️ Oops", [text]))
+            outbound.answer(event, render_card("⚠️ Oops", [text]), coalesce=True)
@@ -0,0 +1,34 @@
+"""hot path indexes
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 03:20:11.418275
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # /toprich and /topkill ORDER BY columns.
+    op.create_index('ix_users_balance', 'users', ['balance'])
+    op.create_index('ix_users_kills', 'users', ['kills'])
+    op.create_index('ix_warns_group_user', 'warns', ['group_id', 'user_id'])
+    op.create_index('ix_transactions_from_created', 'transactions', ['from_id', 'created_at'])
+    op.create_index('ix_transactions_to_created', 'transactions', ['to_id', 'created_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_transactions_to_created', table_name='transactions')
+    op.drop_index('ix_transactions_from_created', table_name='transactions')
+    op.drop_index('ix_warns_group_user', table_name='warns')
+    op.drop_index('ix_users_kills', table_name='users')
+    op.drop_index('ix_users_balance', table_name='users')
@@ -1,14 +1,36 @@
 """Antiflood tracking leveraging Redis when available."""
 from __future__ import annotations
 
-import asyncio
 import time
+import uuid
 from dataclasses import dataclass
+from itertools import count
 
-try:
-    import redis.asyncio as redis
-except ImportError:  # pragma: no cover
-    redis = None
+from bot.utils.flood_counter import MAX_KEYS, MemoryFloodCounter
+from bot.utils.redis_pool import RedisPool
+
+
+MAX_FLAGGED = 50_000
+
+# Sliding window in one round trip. Members are unique, so hits in the same millisecond
+# all count. Returns the hit count and, once over the limit, the time in ms at which
+# enough old hits leave the window for the count to drop back to the limit.
+SLIDING_WINDOW = """
+local key = KEYS[1]
+local now = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local limit = tonumber(ARGV[3])
+redis.call('ZREMRANGEBYSCORE', key, '-inf', now - window)
+redis.call('ZADD', key, now, ARGV[4])
+redis.call('PEXPIRE', key, window)
+local hits = redis.call('ZCARD', key)
+local reset = 0
+if hits > limit then
+    local oldest = redis.call('ZRANGE', key, hits - limit - 1, hits - limit - 1, 'WITHSCORES')
+    reset = tonumber(oldest[2]) + window
+end
+return {hits, reset}
+"""
 
 
 @dataclass
@@ -18,35 +40,55 @@ class FloodSettings:
 
 
 class AntifloodService:
-    def __init__(self, redis_url: str | None = None):
-        self.redis_url = redis_url
-        self._client = None
-        self._fallback: dict[tuple[int, int], list[float]] = {}
-        self._lock = asyncio.Lock()
+    def __init__(self, pool: RedisPool | None, max_memory_keys: int = MAX_KEYS):
+        self.pool = pool
+        self._script = None
+        if pool is not None and pool.client is not None:
+            # Sent by SHA; redis-py loads the script again if the server answers NOSCRIPT.
+            self._script = pool.client.register_script(SLIDING_WINDOW)
+        self._member_prefix = uuid.uuid4().hex[:8]
+        self._sequence = count()
+        # (chat, user) -> unix time at which a flagged user drops back under the limit.
+        self._flagged: dict[tuple[int, int], float] = {}
+        # Used whenever Redis is unavailable; bounded, and swept once started.
+        self.fallback = MemoryFloodCounter(max_keys=max_memory_keys)
+        self.short_circuited = 0
 
-    async def get_client(self):
-        if redis and self.redis_url and not self._client:
-            self._client = redis.from_url(self.redis_url)
-        return self._client
+    def start(self) -> None:
+        self.fallback.start()
+
+    async def stop(self) -> None:
+        await self.fallback.stop()
 
     async def hit(self, chat_id: int, user_id: int, settings: FloodSettings) -> int:
-        key = f"flood:{chat_id}:{user_id}"
-        client = await self.get_client()
         now = time.time()
-        if client:
+        flagged_until = self._flagged.get((chat_id, user_id))
+        if flagged_until is not None:
+            if flagged_until > now:
+                # Still over the limit for this window whatever happens; skip the round trip.
+                self.short_circuited += 1
+                return settings.limit + 1
+            del self._flagged[(chat_id, user_id)]
+        if self._script is not None and self.pool.acquire() is not None:
             try:
-                pipe = client.pipeline()
-                pipe.zadd(key, {now: now})
-                pipe.zremrangebyscore(key, min=0, max=now - settings.window)
-                pipe.zcard(key)
-                pipe.expire(key, settings.window)
-                _, _, count, _ = await pipe.execute()
-                return int(count)
+                now_ms = int(now * 1000)
+                member = f"{now_ms}:{self._member_prefix}:{next(self._sequence)}"
+                hits, reset_ms = await self._script(
+                    keys=[f"flood:{chat_id}:{user_id}"], args=[now_ms, settings.window * 1000, settings.limit, member]
+                )
             except Exception:
-                pass
-        async with self._lock:
-            window_list = self._fallback.setdefault((chat_id, user_id), [])
-            window_list.append(now)
-            cutoff = now - settings.window
-            self._fallback[(chat_id, user_id)] = [ts for ts in window_list if ts >= cutoff]
-            return len(self._fallback[(chat_id, user_id)])
+                self.pool.failure()
+            else:
+                self.pool.success()
+                if reset_ms:
+                    self._flag((chat_id, user_id), int(reset_ms) / 1000, now)
+                return int(hits)
+        return self.fallback.hit((chat_id, user_id), settings.limit, settings.window)
+
+    def _flag(self, key: tuple[int, int], until: float, now: float) -> None:
+        if len(self._flagged) >= MAX_FLAGGED:
+            self._flagged = {flagged: expiry for flagged, expiry in self._flagged.items() if expiry > now}
+        self._flagged[key] = until
+
+    def stats(self) -> dict[str, int]:
+        return {**self.fallback.stats(), "flagged": len(self._flagged), "short_circuited": self.short_circuited}
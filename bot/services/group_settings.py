@@ -0,0 +1,68 @@
+"""Per-group moderation settings cached as frozen snapshots with a TTL."""
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, NamedTuple
+
+from bot.utils.identity_cache import VersionedCache
+
+SETTINGS_TTL_SECONDS = 300.0
+MAX_GROUPS = 10_000
+
+
+@dataclass(frozen=True)
+class GroupSettings:
+    max_warns: int
+    warn_action: str
+    antiflood_enabled: bool
+    flood_limit: int
+    flood_window: int
+    welcome_enabled: bool
+    goodbye_enabled: bool
+    rules_text: str
+
+
+class _Entry(NamedTuple):
+    expires_at: float
+    title: str | None
+    settings: GroupSettings
+
+
+Loader = Callable[[], Awaitable[GroupSettings]]
+
+
+class GroupSettingsCache:
+    """Settings per chat id, reloaded after ``ttl`` seconds or when the chat title changes.
+
+    Writers call :meth:`invalidate` once their change commits, and a load that was
+    running across an invalidation is not cached. The TTL only bounds how long another
+    process can serve settings changed elsewhere.
+    """
+
+    def __init__(self, ttl: float = SETTINGS_TTL_SECONDS, maxsize: int = MAX_GROUPS):
+        self.ttl = ttl
+        self._entries = VersionedCache(maxsize)
+        self.loads = 0
+
+    async def get(self, chat_id: int, title: str | None, load: Loader) -> GroupSettings:
+        entry = self._entries.get(chat_id)
+        if entry is not None and entry.title == title and entry.expires_at > time.monotonic():
+            return entry.settings
+        self.loads += 1
+        version = self._entries.version
+        settings = await load()
+        self._entries.fill(chat_id, _Entry(time.monotonic() + self.ttl, title, settings), version)
+        return settings
+
+    def invalidate(self, chat_id: int) -> None:
+        self._entries.invalidate(chat_id)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict[str, int]:
+        return {**self._entries.stats(), "loads": self.loads}
+
+
+group_settings_cache = GroupSettingsCache()
@@ -0,0 +1,343 @@
+"""Top-N leaderboards kept in Redis sorted sets with an in-process fallback."""
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Awaitable, Callable, Iterable, NamedTuple
+
+from bot.utils.ranked_set import RankedSet
+from bot.utils.redis_pool import RedisPool
+
+try:
+    import redis.asyncio as redis
+except ImportError:  # pragma: no cover - safety net
+    redis = None
+
+FLUSH_INTERVAL_SECONDS = 0.5
+MAX_PENDING_OPS = 100_000
+REBUILD_CHUNK = 1000
+REBUILD_RETRY_SECONDS = 5.0
+MAX_REBUILD_RETRY_SECONDS = 300.0
+
+logger = logging.getLogger(__name__)
+
+Boards = dict[str, dict[int, float]]
+BoardLoader = Callable[[], Awaitable[Boards]]
+
+# Pending Redis writes are coalesced per (board, member) into one of these ops.
+INCR, SET, REMOVE = "incr", "set", "remove"
+
+
+class Rank(NamedTuple):
+    position: int | None  # zero-based, None when the member is not on the board
+    total: int
+
+
+def _combine(old: tuple[str, float], new: tuple[str, float]) -> tuple[str, float]:
+    if new[0] != INCR:
+        return new
+    if old[0] == INCR:
+        return INCR, old[1] + new[1]
+    if old[0] == SET:
+        return SET, old[1] + new[1]
+    return SET, new[1]
+
+
+class LeaderboardStore:
+    """Sorted-set leaderboards that are written after commit and read for top-N/rank.
+
+    With Redis, writes are queued and sent in pipelined batches; a failed batch is kept
+    and retried so increments are not lost. Without Redis at startup, every board is
+    loaded into a :class:`RankedSet` and served from memory instead. The backend is
+    chosen once, in :meth:`start`: when Redis fails later, reads return None and callers
+    fall back to their SQL query until it answers again. Boards left stale by the outage
+    are rebuilt only after a PING succeeds, with a growing delay between attempts.
+    """
+
+    def __init__(self, redis_url: str | None = None, prefix: str = "lb:"):
+        self.redis_url = redis_url
+        self.prefix = prefix
+        self.memory: dict[str, RankedSet] | None = None
+        self._client = None
+        self._pool: RedisPool | None = None
+        self._pending: dict[tuple[str, int], tuple[str, float]] = {}
+        self._stale = False
+        self._rebuilding = False
+        self._loader: BoardLoader | None = None
+        self._task: asyncio.Task | None = None
+        self._rebuild_at = 0.0
+        self._rebuild_delay = 0.0
+        self.flushed = 0
+        self.flush_errors = 0
+        self.dropped = 0
+
+    async def get_client(self):
+        # With the shared pool this is None while its breaker is open, so callers skip
+        # Redis at once instead of waiting on a connection attempt.
+        if self._pool is not None:
+            return self._pool.acquire()
+        if redis and self.redis_url and not self._client:
+            self._client = redis.from_url(self.redis_url)
+        return self._client
+
+    @property
+    def enabled(self) -> bool:
+        return self.memory is not None or bool(self.redis_url)
+
+    def _key(self, board: str) -> str:
+        return f"{self.prefix}{board}"
+
+    def _report(self, ok: bool) -> None:
+        if self._pool is None:
+            return
+        if ok:
+            self._pool.success()
+        else:
+            self._pool.failure()
+
+    # Writes -------------------------------------------------------------------
+
+    def incr(self, board: str, member: int, delta: float) -> None:
+        if self.memory is not None:
+            self.memory.setdefault(board, RankedSet()).incr(member, delta)
+        self._queue(board, member, (INCR, delta))
+
+    def set(self, board: str, member: int, score: float) -> None:
+        if self.memory is not None:
+            self.memory.setdefault(board, RankedSet()).set(member, score)
+        self._queue(board, member, (SET, score))
+
+    def remove(self, board: str, member: int) -> None:
+        if self.memory is not None and board in self.memory:
+            self.memory[board].remove(member)
+        self._queue(board, member, (REMOVE, 0))
+
+    def _queue(self, board: str, member: int, op: tuple[str, float]) -> None:
+        if not self.redis_url:
+            return
+        key = (board, member)
+        if key in self._pending:
+            self._pending[key] = _combine(self._pending[key], op)
+        elif len(self._pending) >= MAX_PENDING_OPS:
+            # Dropping a write leaves Redis behind; stop reading it until the next rebuild.
+            if not self._stale:
+                logger.warning("Leaderboard write queue full; Redis boards marked stale")
+            self._stale = True
+            self.dropped += 1
+        else:
+            self._pending[key] = op
+
+    async def flush(self) -> int:
+        # Held while a rebuild runs: the swap would overwrite anything sent before it.
+        if not self._pending or self._rebuilding:
+            return 0
+        client = await self.get_client()
+        if not client:
+            return 0
+        batch, self._pending = self._pending, {}
+        pipe = client.pipeline(transaction=False)
+        for (board, member), (op, value) in batch.items():
+            if op == INCR:
+                pipe.zincrby(self._key(board), value, member)
+            elif op == SET:
+                pipe.zadd(self._key(board), {member: value})
+            else:
+                pipe.zrem(self._key(board), member)
+        try:
+            await pipe.execute()
+        except Exception:
+            self._report(False)
+            self.flush_errors += 1
+            for key, op in self._pending.items():
+                batch[key] = _combine(batch[key], op) if key in batch else op
+            self._pending = batch
+            raise
+        self._report(True)
+        self.flushed += len(batch)
+        return len(batch)
+
+    # Reads --------------------------------------------------------------------
+
+    async def top(self, board: str, limit: int, offset: int = 0) -> list[tuple[int, float]] | None:
+        result = await self.top_many([board], limit, offset)
+        return None if result is None else result[board]
+
+    async def top_many(
+        self, boards: Iterable[str], limit: int, offset: int = 0
+    ) -> dict[str, list[tuple[int, float]]] | None:
+        boards = list(boards)
+        if self.memory is not None:
+            return {
+                board: self.memory[board].top(limit, offset) if board in self.memory else [] for board in boards
+            }
+        client = await self._readable_client()
+        if not client:
+            return None
+        pipe = client.pipeline(transaction=False)
+        for board in boards:
+            pipe.zrevrange(self._key(board), offset, offset + limit - 1, withscores=True)
+        try:
+            replies = await pipe.execute()
+        except Exception:
+            self._report(False)
+            logger.warning("Leaderboard read from Redis failed", exc_info=True)
+            return None
+        self._report(True)
+        return {
+            board: [(int(member), score) for member, score in reply] for board, reply in zip(boards, replies)
+        }
+
+    async def rank(self, board: str, member: int) -> Rank | None:
+        if self.memory is not None:
+            ranked = self.memory.get(board)
+            return Rank(ranked.rank(member), len(ranked)) if ranked else Rank(None, 0)
+        client = await self._readable_client()
+        if not client:
+            return None
+        pipe = client.pipeline(transaction=False)
+        pipe.zrevrank(self._key(board), member)
+        pipe.zcard(self._key(board))
+        try:
+            position, total = await pipe.execute()
+        except Exception:
+            self._report(False)
+            logger.warning("Leaderboard rank lookup in Redis failed", exc_info=True)
+            return None
+        self._report(True)
+        return Rank(position, total)
+
+    async def _readable_client(self):
+        if self._stale:
+            return None
+        return await self.get_client()
+
+    # Lifecycle ----------------------------------------------------------------
+
+    async def rebuild(self, loader: BoardLoader) -> int:
+        """Replace every board with the loader's snapshot of the database.
+
+        Writes queued before the load are part of the snapshot and dropped. Writes queued
+        while it runs are held and sent after the swap; they are absolute scores, so one
+        the snapshot already saw is simply written again.
+        """
+        self._pending.clear()
+        self._rebuilding = True
+        dropped = self.dropped
+        try:
+            boards = await loader()
+            client = await self.get_client()
+            if not client:
+                self.memory = {board: RankedSet(scores.items()) for board, scores in boards.items()}
+                return len(boards)
+            await self._swap_in(client, boards)
+        finally:
+            self._rebuilding = False
+        # A write dropped while the queue was held may be in neither the snapshot nor the replay.
+        self._stale = self.dropped != dropped
+        try:
+            await self.flush()
+        except Exception:
+            logger.warning("Replaying leaderboard writes held during the rebuild failed; retrying", exc_info=True)
+        return len(boards)
+
+    async def _swap_in(self, client, boards: Boards) -> None:
+        for board, scores in boards.items():
+            key = self._key(board)
+            items = list(scores.items())
+            if not items:
+                await client.delete(key)
+                continue
+            # Build under a temporary key and swap it in so readers never see a partial board.
+            staging = f"{key}:rebuild"
+            pipe = client.pipeline(transaction=False)
+            pipe.delete(staging)
+            for start in range(0, len(items), REBUILD_CHUNK):
+                pipe.zadd(staging, dict(items[start : start + REBUILD_CHUNK]))
+            pipe.rename(staging, key)
+            await pipe.execute()
+        await client.set(self._key("meta:built"), 1)
+
+    async def start(
+        self,
+        loader: BoardLoader,
+        redis_url: str | None = None,
+        prefix: str | None = None,
+        pool: RedisPool | None = None,
+    ) -> None:
+        if redis_url is not None:
+            self.redis_url = redis_url
+        if prefix is not None:
+            self.prefix = prefix
+        if pool is not None:
+            self._pool = pool
+        self._loader = loader
+        client = await self.get_client()
+        built = False
+        if client:
+            try:
+                built = bool(await client.exists(self._key("meta:built")))
+            except Exception:
+                logger.warning("Redis unavailable; serving leaderboards from memory", exc_info=True)
+                self._client = None
+                self._pool = None
+                self.redis_url = None
+        if not built:
+            await self.rebuild(loader)
+        if self._task is None and self.redis_url:
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(FLUSH_INTERVAL_SECONDS)
+            try:
+                if self._stale and self._loader:
+                    await self._rebuild_stale()
+                await self.flush()
+            except Exception:
+                logger.warning("Leaderboard flush to Redis failed; retrying", exc_info=True)
+
+    async def _rebuild_stale(self) -> None:
+        # A rebuild reads every board from the database; an outage must not turn the
+        # flush loop into back-to-back full scans.
+        loop = asyncio.get_running_loop()
+        if loop.time() < self._rebuild_at:
+            return
+        client = await self.get_client()
+        if client is None:
+            return  # the shared breaker is open; its own probe watches for recovery
+        try:
+            await client.ping()
+            await self.rebuild(self._loader)
+        except Exception:
+            self._report(False)
+            self._rebuild_delay = min(2 * self._rebuild_delay or REBUILD_RETRY_SECONDS, MAX_REBUILD_RETRY_SECONDS)
+            self._rebuild_at = loop.time() + self._rebuild_delay
+            raise
+        self._rebuild_delay = 0.0
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        try:
+            await self.flush()
+        except Exception:
+            logger.warning("Dropping %d unflushed leaderboard writes", len(self._pending))
+
+    def stats(self) -> dict[str, int | str]:
+        return {
+            "backend": "memory" if self.memory is not None else "redis" if self.redis_url else "off",
+            "boards": len(self.memory or {}),
+            "pending": len(self._pending),
+            "flushed": self.flushed,
+            "flush_errors": self.flush_errors,
+            "dropped": self.dropped,
+            "stale": int(self._stale),
+        }
+
+
+leaderboards = LeaderboardStore()
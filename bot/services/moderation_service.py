@@ -11,6 +11,8 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from bot.config import settings
 from bot.db import crud
 from bot.db.models import WarnAction
+from bot.db.session import on_commit
+from bot.services.group_settings import GroupSettings, group_settings_cache
 from bot.utils.errors import PermissionError
 
 
@@ -22,13 +24,12 @@ async def ensure_admin_rights(actor, target_status) -> None:
 
 
 async def warn_user(session: AsyncSession, chat, actor, target, reason: str) -> tuple[int, WarnAction]:
-    group = await crud.get_or_create_group(session, chat.id, chat.title)
-    await crud.get_or_create_user(session, target.id, target.username, target.first_name)
+    group_settings = await get_group_settings(session, chat)
+    await crud.ensure_user(session, target.id, target.username, target.first_name)
     await crud.add_warn(session, group_id=chat.id, user_id=target.id, admin_id=actor.id, reason=reason)
     warns = await crud.get_warns(session, chat.id, target.id)
     await session.commit()
-    action = group.warn_action or settings.warn_action_default
-    return len(warns), WarnAction(action)
+    return len(warns), WarnAction(group_settings.warn_action)
 
 
 async def reset_warns(session: AsyncSession, chat, target_id: int) -> int:
@@ -39,19 +40,32 @@ async def reset_warns(session: AsyncSession, chat, target_id: int) -> int:
 
 async def ensure_group(session: AsyncSession, chat) -> None:
     if chat.type in (ChatType.GROUP, ChatType.SUPERGROUP):
-        await crud.get_or_create_group(session, chat.id, chat.title)
+        await crud.ensure_group(session, chat.id, chat.title)
         await session.commit()
 
 
-async def get_group_settings(session: AsyncSession, chat) -> dict:
-    group = await crud.get_or_create_group(session, chat.id, chat.title)
+async def get_group_settings(session: AsyncSession, chat) -> GroupSettings:
+    # Served from memory on a hit; a miss (or a renamed chat) pays one lookup and commit.
+    async def load() -> GroupSettings:
+        group = await crud.get_or_create_group(session, chat.id, chat.title)
+        await session.commit()
+        return GroupSettings(
+            max_warns=group.max_warns or settings.max_warns_default,
+            warn_action=group.warn_action or settings.warn_action_default,
+            antiflood_enabled=group.antiflood_enabled,
+            flood_limit=group.flood_limit or settings.flood_limit_default,
+            flood_window=group.flood_window or settings.flood_window_seconds,
+            welcome_enabled=group.welcome_enabled,
+            goodbye_enabled=group.goodbye_enabled,
+            rules_text=group.rules_text or "",
+        )
+
+    return await group_settings_cache.get(chat.id, chat.title, load)
+
+
+async def update_group_settings(session: AsyncSession, chat, **values) -> None:
+    await ensure_group(session, chat)
+    await crud.update_group(session, chat.id, **values)
+    # Dropped only once the change is visible, so no reader can re-cache the old row.
+    on_commit(session, lambda: group_settings_cache.invalidate(chat.id))
     await session.commit()
-    return {
-        "max_warns": group.max_warns or settings.max_warns_default,
-        "warn_action": group.warn_action or settings.warn_action_default,
-        "antiflood_enabled": group.antiflood_enabled,
-        "flood_limit": group.flood_limit or settings.flood_limit_default,
-        "flood_window": group.flood_window or settings.flood_window_seconds,
-        "welcome_enabled": group.welcome_enabled,
-        "goodbye_enabled": group.goodbye_enabled,
-    }
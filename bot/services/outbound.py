@@ -0,0 +1,252 @@
+"""Shared outbound queue that paces, retries and optionally merges Telegram sends."""
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any
+
+from aiogram import Bot
+from aiogram.exceptions import (
+    TelegramBadRequest,
+    TelegramNetworkError,
+    TelegramRetryAfter,
+    TelegramServerError,
+)
+from aiogram.types import Message, ReplyParameters
+
+from bot.utils.rate_limit import ChatThrottle, TokenBucket
+
+GLOBAL_RATE = 30
+GROUP_INTERVAL = 3.0
+PRIVATE_INTERVAL = 1.0
+WORKERS = 4
+MAX_ATTEMPTS = 5
+MAX_PENDING = 10_000
+MAX_TEXT_LENGTH = 4096
+COALESCE_SEPARATOR = "\n\n"
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Outgoing:
+    chat_id: int
+    text: str
+    kwargs: dict[str, Any] = field(default_factory=dict)
+    message_id: int | None = None  # set for edits
+    coalesce: bool = False
+    future: asyncio.Future | None = None
+    attempts: int = 0
+
+    def absorb(self, other: Outgoing) -> bool:
+        """Append ``other`` to this pending send when both allow it."""
+        if not (self.coalesce and other.coalesce) or self.message_id or other.message_id:
+            return False
+        if self.future or other.future or "reply_markup" in self.kwargs or "reply_markup" in other.kwargs:
+            return False
+        mine = {k: v for k, v in self.kwargs.items() if k != "reply_parameters"}
+        theirs = {k: v for k, v in other.kwargs.items() if k != "reply_parameters"}
+        if mine != theirs:
+            return False
+        text = f"{self.text}{COALESCE_SEPARATOR}{other.text}"
+        if len(text) > MAX_TEXT_LENGTH:
+            return False
+        self.text = text
+        return True
+
+
+def _reply_kwargs(message: Message, kwargs: dict[str, Any]) -> dict[str, Any]:
+    if message.is_topic_message:
+        kwargs.setdefault("message_thread_id", message.message_thread_id)
+    kwargs.setdefault(
+        "reply_parameters", ReplyParameters(message_id=message.message_id, allow_sending_without_reply=True)
+    )
+    return kwargs
+
+
+class OutboundQueue:
+    """Per-chat FIFO queues drained by a small worker pool.
+
+    Each chat is queued for delivery at most once, so one busy chat waiting on its
+    pacing interval never blocks sends to other chats.
+    """
+
+    def __init__(
+        self,
+        *,
+        rate: float = GLOBAL_RATE,
+        group_interval: float = GROUP_INTERVAL,
+        private_interval: float = PRIVATE_INTERVAL,
+        max_attempts: int = MAX_ATTEMPTS,
+        max_pending: int = MAX_PENDING,
+    ):
+        self.bot: Bot | None = None
+        self.bucket = TokenBucket(rate)
+        self.throttle = ChatThrottle(group_interval)
+        self.group_interval = group_interval
+        self.private_interval = private_interval
+        self.max_attempts = max_attempts
+        self.max_pending = max_pending
+        self._chats: dict[int, deque[Outgoing]] = {}
+        self._ready: asyncio.Queue[int] = asyncio.Queue()
+        self._workers: list[asyncio.Task] = []
+        self._pending = 0
+        self.sent = 0
+        self.failed = 0
+        self.retried = 0
+        self.coalesced = 0
+        self.dropped = 0
+
+    def send(self, chat_id: int, text: str, *, coalesce: bool = False, **kwargs) -> None:
+        self._enqueue(Outgoing(chat_id, text, kwargs, coalesce=coalesce))
+
+    async def send_and_wait(self, chat_id: int, text: str, **kwargs) -> Message:
+        future = asyncio.get_running_loop().create_future()
+        self._enqueue(Outgoing(chat_id, text, kwargs, future=future))
+        return await future
+
+    def answer(self, message: Message, text: str, *, coalesce: bool = False, **kwargs) -> None:
+        if message.is_topic_message:
+            kwargs.setdefault("message_thread_id", message.message_thread_id)
+        self.send(message.chat.id, text, coalesce=coalesce, **kwargs)
+
+    def reply(self, message: Message, text: str, *, coalesce: bool = False, **kwargs) -> None:
+        self.send(message.chat.id, text, coalesce=coalesce, **_reply_kwargs(message, kwargs))
+
+    async def reply_and_wait(self, message: Message, text: str, **kwargs) -> Message:
+        return await self.send_and_wait(message.chat.id, text, **_reply_kwargs(message, kwargs))
+
+    def edit_text(self, message: Message, text: str, **kwargs) -> None:
+        self.edit(message.chat.id, message.message_id, text, **kwargs)
+
+    def edit(self, chat_id: int, message_id: int, text: str, **kwargs) -> None:
+        self._enqueue(Outgoing(chat_id, text, kwargs, message_id=message_id))
+
+    def _enqueue(self, item: Outgoing) -> None:
+        pending = self._chats.get(item.chat_id)
+        if pending is None:
+            pending = self._chats[item.chat_id] = deque()
+            self._ready.put_nowait(item.chat_id)
+        elif pending:
+            last = pending[-1]
+            if last.absorb(item):
+                self.coalesced += 1
+                return
+            if item.message_id is not None and item.future is None:
+                # Only the newest text matters for a message that has not been edited yet.
+                for queued in pending:
+                    if queued.message_id == item.message_id and queued.future is None:
+                        queued.text, queued.kwargs = item.text, item.kwargs
+                        self.coalesced += 1
+                        return
+        if self._pending >= self.max_pending:
+            self.dropped += 1
+            logger.warning("Outbound queue full; dropping message to %s", item.chat_id)
+            if item.future:
+                item.future.set_exception(asyncio.QueueFull())
+            return
+        pending.append(item)
+        self._pending += 1
+
+    def _interval(self, chat_id: int) -> float:
+        return self.group_interval if chat_id < 0 else self.private_interval
+
+    async def _worker(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            chat_id = await self._ready.get()
+            pending = self._chats.get(chat_id)
+            if not pending:
+                self._chats.pop(chat_id, None)
+                continue
+            delay = self.throttle.wait_time(chat_id)
+            if delay > 0:
+                loop.call_later(delay, self._ready.put_nowait, chat_id)
+                continue
+            item = pending.popleft()
+            self._pending -= 1
+            await self.throttle.acquire(chat_id, self._interval(chat_id))
+            await self.bucket.acquire()
+            retry_in = await self._deliver(item)
+            if retry_in is not None:
+                pending.appendleft(item)
+                self._pending += 1
+                self.throttle.pause(chat_id, retry_in)
+            if pending:
+                self._ready.put_nowait(chat_id)
+            else:
+                self._chats.pop(chat_id, None)
+
+    async def _deliver(self, item: Outgoing) -> float | None:
+        try:
+            if item.message_id is None:
+                result = await self.bot.send_message(item.chat_id, item.text, **item.kwargs)
+            else:
+                result = await self.bot.edit_message_text(
+                    text=item.text, chat_id=item.chat_id, message_id=item.message_id, **item.kwargs
+                )
+        except TelegramRetryAfter as exc:
+            return self._retry(item, exc, exc.retry_after)
+        except (TelegramNetworkError, TelegramServerError) as exc:
+            return self._retry(item, exc, 2 ** item.attempts)
+        except TelegramBadRequest as exc:
+            if "message is not modified" not in exc.message:
+                self._fail(item, exc)
+            elif item.future:
+                item.future.set_result(None)
+            return None
+        except Exception as exc:
+            self._fail(item, exc)
+            return None
+        self.sent += 1
+        if item.future and not item.future.done():
+            item.future.set_result(result)
+        return None
+
+    def _retry(self, item: Outgoing, exc: Exception, delay: float) -> float | None:
+        item.attempts += 1
+        if item.attempts >= self.max_attempts:
+            self._fail(item, exc)
+            return None
+        self.retried += 1
+        return delay
+
+    def _fail(self, item: Outgoing, exc: Exception) -> None:
+        self.failed += 1
+        logger.warning("Outbound message to %s failed: %s", item.chat_id, exc)
+        if item.future and not item.future.done():
+            item.future.set_exception(exc)
+
+    def pause(self, chat_id: int, seconds: float) -> None:
+        self.throttle.pause(chat_id, seconds)
+
+    def start(self, bot: Bot, workers: int = WORKERS) -> None:
+        self.bot = bot
+        if not self._workers:
+            self._workers = [asyncio.create_task(self._worker()) for _ in range(workers)]
+
+    async def stop(self, timeout: float = 5.0) -> None:
+        # Give queued replies a chance to go out before shutdown.
+        deadline = asyncio.get_running_loop().time() + timeout
+        while self._chats and asyncio.get_running_loop().time() < deadline:
+            await asyncio.sleep(0.05)
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "pending": self._pending,
+            "chats": len(self._chats),
+            "sent": self.sent,
+            "failed": self.failed,
+            "retried": self.retried,
+            "coalesced": self.coalesced,
+            "dropped": self.dropped,
+        }
+
+
+outbound = OutboundQueue()
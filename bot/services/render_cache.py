@@ -0,0 +1,82 @@
+"""Rendered replies cached per version of the rankings they were built from."""
+from __future__ import annotations
+
+import asyncio
+from typing import Awaitable, Callable, Hashable, Iterable
+
+from bot.utils.identity_cache import MISSING, LRUCache
+
+MAX_ENTRIES = 10_000
+
+Builder = Callable[[], Awaitable[str]]
+
+
+class RenderCache:
+    """Text keyed by the version counters of the scopes it depends on.
+
+    Write paths call :meth:`bump` after commit for every scope whose ranking changed,
+    so a cached reply stays valid until one of its scopes moves. Concurrent misses for
+    the same key and versions share a single build. Scopes track ranking changes
+    only: a renamed user or group shows up with the next bump of its scope.
+    """
+
+    def __init__(self, maxsize: int = MAX_ENTRIES):
+        self._versions: dict[Hashable, int] = {}
+        self._entries = LRUCache(maxsize)
+        self._inflight: dict[tuple, asyncio.Future] = {}
+        self.hits = 0
+        self.builds = 0
+        self.shared = 0
+
+    def versions(self, scopes: Iterable[Hashable]) -> tuple[int, ...]:
+        return tuple(self._versions.get(scope, 0) for scope in scopes)
+
+    def bump(self, *scopes: Hashable) -> None:
+        for scope in scopes:
+            self._versions[scope] = self._versions.get(scope, 0) + 1
+
+    def clear(self) -> None:
+        # Bumping nothing cannot invalidate entries whose scopes are unknown, so drop them all.
+        self._entries.clear()
+
+    async def get(self, key: Hashable, scopes: Iterable[Hashable], build: Builder) -> str:
+        versions = self.versions(scopes)
+        entry = self._entries.get(key, MISSING)
+        if entry is not MISSING and entry[0] == versions:
+            self.hits += 1
+            return entry[1]
+        flight = (key, versions)
+        future = self._inflight.get(flight)
+        if future is not None:
+            self.shared += 1
+            return await asyncio.shield(future)
+        future = self._inflight[flight] = asyncio.get_running_loop().create_future()
+        self.builds += 1
+        try:
+            text = await build()
+        except Exception as exc:
+            future.set_exception(exc)
+            # Mark the exception retrieved when nobody else was waiting on this build.
+            future.exception()
+            raise
+        else:
+            future.set_result(text)
+            # Stored under the versions read before the build, so a bump during it wins.
+            self._entries.set(key, (versions, text))
+            return text
+        finally:
+            if not future.done():
+                future.cancel()
+            del self._inflight[flight]
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "size": len(self._entries),
+            "scopes": len(self._versions),
+            "hits": self.hits,
+            "builds": self.builds,
+            "shared": self.shared,
+        }
+
+
+render_cache = RenderCache()
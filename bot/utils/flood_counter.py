@@ -0,0 +1,116 @@
+"""In-memory sliding-window flood counters with bounded memory."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict, deque
+from typing import Hashable
+
+SHARDS = 16
+MAX_KEYS = 100_000
+SWEEP_INTERVAL_SECONDS = 30.0
+
+logger = logging.getLogger(__name__)
+
+
+class _Window:
+    __slots__ = ("hits", "window")
+
+    def __init__(self, size: int, window: float):
+        self.hits: deque[float] = deque(maxlen=size)
+        self.window = window
+
+
+class MemoryFloodCounter:
+    """Per-key ring buffers of the last ``limit + 1`` hit times.
+
+    Older hits cannot change whether a key is over its limit, so counts saturate at
+    ``limit + 1`` and a key never holds more than that many timestamps. Keys live in
+    LRU-ordered shards: a shard over its share of ``max_keys`` drops its least recently
+    seen key, and the sweeper drops every key whose newest hit has left its own window,
+    yielding to the event loop between shards.
+    """
+
+    def __init__(self, max_keys: int = MAX_KEYS, shards: int = SHARDS):
+        self._shards: list[OrderedDict[Hashable, _Window]] = [OrderedDict() for _ in range(shards)]
+        self._shard_cap = max(1, -(-max_keys // shards))
+        self._task: asyncio.Task | None = None
+        self.idle_evictions = 0
+        self.cap_evictions = 0
+
+    def __len__(self) -> int:
+        return sum(len(shard) for shard in self._shards)
+
+    def _shard(self, key: Hashable) -> OrderedDict[Hashable, _Window]:
+        return self._shards[hash(key) % len(self._shards)]
+
+    def hit(self, key: Hashable, limit: int, window: float, now: float | None = None) -> int:
+        # No awaits in here, so each hit is atomic on the event loop without a lock.
+        now = time.monotonic() if now is None else now
+        shard = self._shard(key)
+        entry = shard.get(key)
+        if entry is None:
+            entry = shard[key] = _Window(limit + 1, window)
+            while len(shard) > self._shard_cap:
+                shard.popitem(last=False)
+                self.cap_evictions += 1
+        else:
+            shard.move_to_end(key)
+            if entry.hits.maxlen != limit + 1:
+                entry.hits = deque(entry.hits, maxlen=limit + 1)
+            entry.window = window
+        hits = entry.hits
+        hits.append(now)
+        cutoff = now - window
+        while hits[0] < cutoff:
+            hits.popleft()
+        return len(hits)
+
+    def sweep_shard(self, index: int, now: float | None = None) -> int:
+        # Windows differ per key, so a recent long-window key can sit in front of idle
+        # short-window ones; every entry is checked against its own window.
+        now = time.monotonic() if now is None else now
+        shard = self._shards[index]
+        idle = [key for key, entry in shard.items() if entry.hits[-1] < now - entry.window]
+        for key in idle:
+            del shard[key]
+        self.idle_evictions += len(idle)
+        return len(idle)
+
+    async def sweep(self) -> int:
+        evicted = 0
+        for index in range(len(self._shards)):
+            evicted += self.sweep_shard(index)
+            await asyncio.sleep(0)
+        return evicted
+
+    async def _run(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                if await self.sweep():
+                    logger.debug("Flood counter swept: %s", self.stats())
+            except Exception:
+                logger.exception("Flood counter sweep failed")
+
+    def start(self, interval: float = SWEEP_INTERVAL_SECONDS) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(interval))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "keys": len(self),
+            "max_keys": self._shard_cap * len(self._shards),
+            "idle_evictions": self.idle_evictions,
+            "cap_evictions": self.cap_evictions,
+        }
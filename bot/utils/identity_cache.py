@@ -0,0 +1,107 @@
+"""Bounded LRU caches for identity and membership lookups."""
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import Any, Hashable, NamedTuple
+
+MISSING = object()
+
+
+class LRUCache:
+    def __init__(self, maxsize: int = 10_000):
+        self.maxsize = maxsize
+        self._entries: OrderedDict[Hashable, Any] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._entries.get(key, MISSING)
+        if entry is MISSING:
+            self.misses += 1
+            return default
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def peek(self, key: Hashable, default: Any = None) -> Any:
+        # For callers that load the row anyway: a hit saves no query, so only misses count.
+        entry = self._entries.get(key, MISSING)
+        if entry is MISSING:
+            self.misses += 1
+            return default
+        self._entries.move_to_end(key)
+        return entry
+
+    def set(self, key: Hashable, value: Any) -> None:
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+class VersionedCache(LRUCache):
+    """LRU filled by readers only when no committed write landed during their query.
+
+    Writers store through :meth:`commit` or drop through :meth:`invalidate`, both of
+    which bump :attr:`version`. A reader takes
+    the version before its query and hands it to :meth:`fill`; a fill from before the
+    latest write is dropped, so a stale read never replaces a fresh committed value.
+    """
+
+    def __init__(self, maxsize: int = 10_000):
+        super().__init__(maxsize)
+        self.version = 0
+        self.dropped_fills = 0
+
+    def commit(self, key: Hashable, value: Any) -> None:
+        self.version += 1
+        self.set(key, value)
+
+    def invalidate(self, key: Hashable) -> None:
+        self.version += 1
+        super().invalidate(key)
+
+    def fill(self, key: Hashable, value: Any, version: int) -> None:
+        if version == self.version:
+            self.set(key, value)
+        else:
+            self.dropped_fills += 1
+
+    def clear(self) -> None:
+        self.version += 1
+        super().clear()
+
+    def stats(self) -> dict[str, int]:
+        return {**super().stats(), "dropped_fills": self.dropped_fills}
+
+
+class CachedIdentity(NamedTuple):
+    db_id: int
+    profile: tuple
+
+
+class IdentityCache(LRUCache):
+    """Maps Telegram ids to database ids and the last-known profile fields."""
+
+    def put(self, key: Hashable, db_id: int, profile: tuple) -> None:
+        self.set(key, CachedIdentity(db_id, profile))
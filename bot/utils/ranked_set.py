@@ -0,0 +1,127 @@
+"""In-memory order-statistic set ranking members by score, highest first."""
+from __future__ import annotations
+
+from bisect import bisect_left, insort
+from typing import Hashable, Iterable
+
+BUCKET_SIZE = 1000
+
+
+class RankedSet:
+    """Sorted buckets of ``(-score, member)`` keys plus a Fenwick tree over bucket sizes.
+
+    Updates touch one bucket, and rank/offset lookups walk the tree, so both stay
+    logarithmic in the number of buckets. Equal scores are ordered by member.
+    """
+
+    def __init__(self, items: Iterable[tuple[Hashable, float]] = (), bucket_size: int = BUCKET_SIZE):
+        self.bucket_size = bucket_size
+        self._scores: dict[Hashable, float] = dict(items)
+        keys = sorted((-score, member) for member, score in self._scores.items())
+        self._buckets = [keys[i : i + bucket_size] for i in range(0, len(keys), bucket_size)]
+        self._reindex()
+
+    def __len__(self) -> int:
+        return len(self._scores)
+
+    def __contains__(self, member: Hashable) -> bool:
+        return member in self._scores
+
+    def score(self, member: Hashable) -> float | None:
+        return self._scores.get(member)
+
+    def set(self, member: Hashable, score: float) -> None:
+        if member in self._scores:
+            self._discard((-self._scores[member], member))
+        self._scores[member] = score
+        self._insert((-score, member))
+
+    def incr(self, member: Hashable, delta: float) -> float:
+        score = self._scores.get(member, 0) + delta
+        self.set(member, score)
+        return score
+
+    def remove(self, member: Hashable) -> None:
+        score = self._scores.pop(member, None)
+        if score is not None:
+            self._discard((-score, member))
+
+    def rank(self, member: Hashable) -> int | None:
+        """Zero-based position of ``member``, or None when it is not ranked."""
+        score = self._scores.get(member)
+        if score is None:
+            return None
+        key = (-score, member)
+        index = self._bucket_for(key)
+        return self._prefix(index) + bisect_left(self._buckets[index], key)
+
+    def top(self, limit: int, offset: int = 0) -> list[tuple[Hashable, float]]:
+        result: list[tuple[Hashable, float]] = []
+        if offset >= len(self._scores) or limit <= 0:
+            return result
+        index, position = self._locate(offset)
+        while index < len(self._buckets) and len(result) < limit:
+            for neg_score, member in self._buckets[index][position : position + limit - len(result)]:
+                result.append((member, -neg_score))
+            index, position = index + 1, 0
+        return result
+
+    def _bucket_for(self, key: tuple) -> int:
+        return min(bisect_left(self._maxes, key), len(self._buckets) - 1)
+
+    def _insert(self, key: tuple) -> None:
+        if not self._buckets:
+            self._buckets.append([key])
+            self._reindex()
+            return
+        index = self._bucket_for(key)
+        bucket = self._buckets[index]
+        insort(bucket, key)
+        self._maxes[index] = bucket[-1]
+        if len(bucket) > 2 * self.bucket_size:
+            self._buckets[index : index + 1] = [bucket[: self.bucket_size], bucket[self.bucket_size :]]
+            self._reindex()
+        else:
+            self._add(index, 1)
+
+    def _discard(self, key: tuple) -> None:
+        index = self._bucket_for(key)
+        bucket = self._buckets[index]
+        del bucket[bisect_left(bucket, key)]
+        if bucket:
+            self._maxes[index] = bucket[-1]
+            self._add(index, -1)
+        else:
+            del self._buckets[index]
+            self._reindex()
+
+    def _reindex(self) -> None:
+        self._maxes = [bucket[-1] for bucket in self._buckets]
+        self._tree = [0] * (len(self._buckets) + 1)
+        for index, bucket in enumerate(self._buckets):
+            self._add(index, len(bucket))
+
+    def _add(self, index: int, delta: int) -> None:
+        index += 1
+        while index < len(self._tree):
+            self._tree[index] += delta
+            index += index & -index
+
+    def _prefix(self, index: int) -> int:
+        # Number of keys stored in buckets before ``index``.
+        total = 0
+        while index > 0:
+            total += self._tree[index]
+            index -= index & -index
+        return total
+
+    def _locate(self, offset: int) -> tuple[int, int]:
+        # Fenwick descent to the bucket holding the ``offset``-th key.
+        index, step = 0, 1 << (len(self._tree).bit_length())
+        while step:
+            nxt = index + step
+            if nxt < len(self._tree) and self._tree[nxt] <= offset:
+                index = nxt
+                offset -= self._tree[nxt]
+            step >>= 1
+        return index, offset
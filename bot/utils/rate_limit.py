@@ -2,34 +2,124 @@
 from __future__ import annotations
 
 import asyncio
+import heapq
+import logging
 import time
+from collections import OrderedDict
 from typing import Callable, Awaitable
 
-try:
-    import redis.asyncio as redis
-except ImportError:  # pragma: no cover - safety net
-    redis = None
+from bot.utils.redis_pool import RedisPool
 
+SHARDS = 16
+SWEEP_INTERVAL_SECONDS = 60.0
+
+logger = logging.getLogger(__name__)
+
+
+class _Shard:
+    __slots__ = ("expiry", "heap")
 
-class MemoryLimiter:
     def __init__(self):
-        self.storage: dict[str, float] = {}
-        self.lock = asyncio.Lock()
+        self.expiry: OrderedDict[str, float] = OrderedDict()  # least recently used first
+        self.heap: list[tuple[float, str]] = []  # may hold entries for replaced or evicted keys
+
+
+class MemoryLimiter:
+    """Cooldown expiry times spread over ``shards`` independent maps.
+
+    Every set pushes ``(expires, key)`` onto its shard's min-heap, so a sweep pops only
+    the entries that are due instead of scanning every key, skipping any whose key has
+    since been set again or evicted. With ``max_keys`` a shard over its share drops its
+    least recently used key, which ends that cooldown early.
+    """
+
+    def __init__(self, shards: int = SHARDS, max_keys: int | None = None):
+        self._shards = [_Shard() for _ in range(shards)]
+        self._shard_cap = -(-max_keys // shards) if max_keys else None
+        self._task: asyncio.Task | None = None
+        self.expired = 0
+        self.cap_evictions = 0
+
+    def __len__(self) -> int:
+        return sum(len(shard.expiry) for shard in self._shards)
+
+    def _shard(self, key: str) -> _Shard:
+        return self._shards[hash(key) % len(self._shards)]
 
     async def hit(self, key: str, cooldown: int) -> bool:
-        async with self.lock:
-            now = time.time()
-            expires = self.storage.get(key, 0)
-            if expires > now:
-                return False
-            self.storage[key] = now + cooldown
-            return True
+        # No awaits between the read and the write, so a hit is atomic on the event loop
+        # and shards need no lock.
+        now = time.time()
+        shard = self._shard(key)
+        expires = shard.expiry.get(key, 0)
+        if expires:
+            shard.expiry.move_to_end(key)
+        if expires > now:
+            return False
+        expires = shard.expiry[key] = now + cooldown
+        heapq.heappush(shard.heap, (expires, key))
+        if self._shard_cap is not None:
+            while len(shard.expiry) > self._shard_cap:
+                shard.expiry.popitem(last=False)
+                self.cap_evictions += 1
+            # Evicted keys leave their heap entries behind; rebuild before they outnumber live ones.
+            if len(shard.heap) > 2 * self._shard_cap:
+                shard.heap = [(expires, key) for key, expires in shard.expiry.items()]
+                heapq.heapify(shard.heap)
+        return True
 
     async def remaining(self, key: str) -> float:
-        async with self.lock:
-            now = time.time()
-            expires = self.storage.get(key, 0)
-            return max(0.0, expires - now)
+        expires = self._shard(key).expiry.get(key, 0)
+        return max(0.0, expires - time.time())
+
+    def sweep_shard(self, index: int, now: float | None = None) -> int:
+        now = time.time() if now is None else now
+        shard = self._shards[index]
+        heap = shard.heap
+        expired = 0
+        while heap and heap[0][0] <= now:
+            expires, key = heapq.heappop(heap)
+            if shard.expiry.get(key) == expires:
+                del shard.expiry[key]
+                expired += 1
+        self.expired += expired
+        return expired
+
+    async def sweep(self) -> int:
+        expired = 0
+        for index in range(len(self._shards)):
+            expired += self.sweep_shard(index)
+            await asyncio.sleep(0)
+        return expired
+
+    async def _run(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.sweep()
+            except Exception:
+                logger.exception("Cooldown sweep failed")
+
+    def start(self, interval: float = SWEEP_INTERVAL_SECONDS) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(interval))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "keys": len(self),
+            "pending_expiries": sum(len(shard.heap) for shard in self._shards),
+            "expired": self.expired,
+            "cap_evictions": self.cap_evictions,
+        }
 
 
 class RedisLimiter:
@@ -44,31 +134,91 @@ class RedisLimiter:
         return max(0.0, float(ttl if ttl else 0))
 
 
+class TokenBucket:
+    """Async token bucket used to pace outbound Telegram calls."""
+
+    def __init__(self, rate: float, capacity: float | None = None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def pause(self, seconds: float) -> None:
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    async def acquire(self) -> None:
+        # Waiters queue on the lock, so tokens are handed out in arrival order.
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class ChatThrottle:
+    """Spaces consecutive sends to the same chat by a minimum interval."""
+
+    def __init__(self, interval: float, max_chats: int = 50_000):
+        self.interval = interval
+        self.max_chats = max_chats
+        self._next_slot: dict[int, float] = {}
+
+    def pause(self, chat_id: int, seconds: float) -> None:
+        self._next_slot[chat_id] = max(self._next_slot.get(chat_id, 0.0), time.monotonic() + seconds)
+
+    def wait_time(self, chat_id: int) -> float:
+        return max(0.0, self._next_slot.get(chat_id, 0.0) - time.monotonic())
+
+    async def acquire(self, chat_id: int, interval: float | None = None) -> None:
+        now = time.monotonic()
+        if len(self._next_slot) >= self.max_chats:
+            self._next_slot = {key: slot for key, slot in self._next_slot.items() if slot > now}
+        slot = max(now, self._next_slot.get(chat_id, 0.0))
+        self._next_slot[chat_id] = slot + (self.interval if interval is None else interval)
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
 class RateLimiter:
-    def __init__(self, redis_url: str | None = None):
-        self.redis_url = redis_url
-        self.memory = MemoryLimiter()
-        self._redis_client = None
+    # The pool is required so no limiter quietly ends up per-process; pass None deliberately.
+    def __init__(self, pool: RedisPool | None, max_memory_keys: int | None = None):
+        self.pool = pool
+        self.memory = MemoryLimiter(max_keys=max_memory_keys)
+        self._redis = RedisLimiter(pool.client) if pool is not None and pool.client is not None else None
+
+    def start(self) -> None:
+        self.memory.start()
 
-    async def get_client(self):
-        if redis and self.redis_url and not self._redis_client:
-            self._redis_client = redis.from_url(self.redis_url)
-        return self._redis_client
+    async def stop(self) -> None:
+        await self.memory.stop()
 
     async def hit(self, key: str, cooldown: int) -> bool:
-        client = await self.get_client()
-        if client:
+        if self._redis is not None and self.pool.acquire() is not None:
             try:
-                return bool(await RedisLimiter(client).hit(key, cooldown))
+                allowed = bool(await self._redis.hit(key, cooldown))
             except Exception:
-                pass
+                self.pool.failure()
+            else:
+                self.pool.success()
+                return allowed
         return await self.memory.hit(key, cooldown)
 
     async def remaining(self, key: str) -> float:
-        client = await self.get_client()
-        if client:
+        if self._redis is not None and self.pool.acquire() is not None:
             try:
-                return await RedisLimiter(client).remaining(key)
+                remaining = await self._redis.remaining(key)
             except Exception:
-                pass
+                self.pool.failure()
+            else:
+                self.pool.success()
+                return remaining
         return await self.memory.remaining(key)
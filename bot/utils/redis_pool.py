@@ -0,0 +1,145 @@
+"""One shared Redis client per process, guarded by a circuit breaker."""
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Awaitable, Callable
+
+try:
+    import redis.asyncio as redis
+except ImportError:  # pragma: no cover - safety net
+    redis = None
+
+FAILURE_THRESHOLD = 3
+PROBE_INTERVAL_SECONDS = 5.0
+TIMEOUT_SECONDS = 1.0
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitBreaker:
+    """Opens after ``failure_threshold`` consecutive failures and stays open until a probe succeeds.
+
+    While open, :meth:`allow` refuses at once so callers go straight to their fallback
+    instead of waiting on a dead backend. A background task runs ``probe`` every
+    ``probe_interval`` seconds and closes the breaker on the first success.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        probe: Callable[[], Awaitable[object]],
+        failure_threshold: int = FAILURE_THRESHOLD,
+        probe_interval: float = PROBE_INTERVAL_SECONDS,
+    ):
+        self.name = name
+        self.probe = probe
+        self.failure_threshold = failure_threshold
+        self.probe_interval = probe_interval
+        self.is_open = False
+        self._failures = 0
+        self._task: asyncio.Task | None = None
+        self.opened = 0
+        self.closed = 0
+        self.rejected = 0
+        self.failed_probes = 0
+
+    def allow(self) -> bool:
+        if self.is_open:
+            self.rejected += 1
+            return False
+        return True
+
+    def success(self) -> None:
+        # Calls that were already in flight when the breaker opened do not close it;
+        # only the probe does.
+        if not self.is_open:
+            self._failures = 0
+
+    def failure(self) -> None:
+        if self.is_open:
+            return
+        self._failures += 1
+        if self._failures >= self.failure_threshold:
+            self.is_open = True
+            self.opened += 1
+            logger.warning("%s circuit opened after %s consecutive failures", self.name, self._failures)
+            if self._task is None:
+                self._task = asyncio.create_task(self._probe())
+
+    async def _probe(self) -> None:
+        try:
+            while self.is_open:
+                await asyncio.sleep(self.probe_interval)
+                try:
+                    await asyncio.wait_for(self.probe(), self.probe_interval)
+                except Exception:
+                    self.failed_probes += 1
+                    continue
+                self.is_open = False
+                self._failures = 0
+                self.closed += 1
+                logger.info("%s circuit closed; probe succeeded", self.name)
+        finally:
+            self._task = None
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict[str, int | str]:
+        return {
+            "state": "open" if self.is_open else "closed",
+            "opened": self.opened,
+            "closed": self.closed,
+            "rejected": self.rejected,
+            "failed_probes": self.failed_probes,
+        }
+
+
+class RedisPool:
+    """The process-wide Redis client and the breaker its users report to.
+
+    Callers take the client from :meth:`acquire` (``None`` when Redis is not configured
+    or the breaker is open) and report each call with :meth:`success` or :meth:`failure`.
+    """
+
+    def __init__(
+        self,
+        url: str | None,
+        failure_threshold: int = FAILURE_THRESHOLD,
+        probe_interval: float = PROBE_INTERVAL_SECONDS,
+        timeout: float = TIMEOUT_SECONDS,
+    ):
+        self.client = None
+        if redis and url:
+            # Short timeouts: a hung Redis should trip the breaker, not stall handlers.
+            self.client = redis.from_url(url, socket_connect_timeout=timeout, socket_timeout=timeout)
+        self.breaker = CircuitBreaker("redis", self._ping, failure_threshold, probe_interval)
+
+    async def _ping(self) -> None:
+        await self.client.ping()
+
+    def acquire(self):
+        if self.client is None or not self.breaker.allow():
+            return None
+        return self.client
+
+    def success(self) -> None:
+        self.breaker.success()
+
+    def failure(self) -> None:
+        self.breaker.failure()
+
+    async def close(self) -> None:
+        await self.breaker.stop()
+        if self.client is not None:
+            await self.client.aclose()
+
+    def stats(self) -> dict[str, int | str]:
+        return {"configured": int(self.client is not None), **self.breaker.stats()}
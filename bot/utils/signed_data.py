@@ -0,0 +1,52 @@
+"""Compact HMAC-signed integer payloads for Telegram callback data."""
+from __future__ import annotations
+
+import base64
+import hashlib
+import hmac
+from typing import Sequence
+
+MAX_CALLBACK_BYTES = 64
+SIGNATURE_CHARS = 16  # 96 bits of HMAC-SHA256 in base64url
+DIGITS = "0123456789abcdefghijklmnopqrstuvwxyz"
+
+
+def to_base36(value: int) -> str:
+    if value < 0:
+        return "-" + to_base36(-value)
+    digits = []
+    while True:
+        value, digit = divmod(value, 36)
+        digits.append(DIGITS[digit])
+        if not value:
+            return "".join(reversed(digits))
+
+
+class CallbackSigner:
+    """Signs ``prefix:v1.v2...vn.signature`` tokens of base36 integers.
+
+    The token carries its own state, so a button press can be checked without a
+    lookup; callers append any unsigned suffix (such as the chosen option) after it.
+    """
+
+    def __init__(self, secret: bytes, signature_chars: int = SIGNATURE_CHARS):
+        self._secret = secret
+        self.signature_chars = signature_chars
+
+    def _signature(self, body: str) -> str:
+        digest = hmac.new(self._secret, body.encode(), hashlib.sha256).digest()
+        return base64.urlsafe_b64encode(digest).decode()[: self.signature_chars]
+
+    def sign(self, prefix: str, values: Sequence[int]) -> str:
+        body = f"{prefix}:{'.'.join(to_base36(value) for value in values)}"
+        return f"{body}.{self._signature(body)}"
+
+    def verify(self, token: str) -> tuple[str, tuple[int, ...]] | None:
+        body, _, signature = token.rpartition(".")
+        prefix, _, fields = body.partition(":")
+        if not fields or not hmac.compare_digest(signature.encode(), self._signature(body).encode()):
+            return None
+        try:
+            return prefix, tuple(int(field, 36) for field in fields.split("."))
+        except ValueError:
+            return None
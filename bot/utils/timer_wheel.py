@@ -0,0 +1,61 @@
+"""Hashed timer wheel for many short deadlines with O(1) schedule and cancel."""
+from __future__ import annotations
+
+import math
+import time
+from typing import Hashable
+
+TICK_SECONDS = 1.0
+SLOTS = 512
+
+
+class TimerWheel:
+    """Deadlines hashed into ``slots`` buckets by the tick they fall due on.
+
+    :meth:`advance` visits only the slots between the last tick it processed and
+    now, and fires the keys whose tick has passed; keys more than one revolution
+    away simply stay in their slot until a later pass. Deadlines are rounded up to
+    the next tick, so a key never fires early.
+    """
+
+    def __init__(self, tick: float = TICK_SECONDS, slots: int = SLOTS, start: float | None = None):
+        self.tick = tick
+        self._slots: list[dict[Hashable, int]] = [{} for _ in range(slots)]
+        self._where: dict[Hashable, int] = {}
+        self._current = math.floor((time.time() if start is None else start) / tick)
+
+    def __len__(self) -> int:
+        return len(self._where)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._where
+
+    def schedule(self, key: Hashable, when: float) -> None:
+        self.cancel(key)
+        # Anything already due fires on the next advance.
+        due = max(math.ceil(when / self.tick), self._current + 1)
+        slot = due % len(self._slots)
+        self._slots[slot][key] = due
+        self._where[key] = slot
+
+    def cancel(self, key: Hashable) -> bool:
+        slot = self._where.pop(key, None)
+        if slot is None:
+            return False
+        del self._slots[slot][key]
+        return True
+
+    def advance(self, now: float | None = None) -> list[Hashable]:
+        target = math.floor((time.time() if now is None else now) / self.tick)
+        fired: list[Hashable] = []
+        # Past a full revolution every slot has been visited once; comparing against
+        # the target tick catches everything due in the skipped revolutions too.
+        for due_tick in range(self._current + 1, self._current + 1 + min(target - self._current, len(self._slots))):
+            entries = self._slots[due_tick % len(self._slots)]
+            ready = [key for key, due in entries.items() if due <= target]
+            for key in ready:
+                del entries[key]
+                del self._where[key]
+            fired.extend(ready)
+        self._current = max(self._current, target)
+        return fired
@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Iterable
+
+from aiogram import Bot
+from aiogram.exceptions import (
+    TelegramBadRequest,
+    TelegramForbiddenError,
+    TelegramNetworkError,
+    TelegramRetryAfter,
+    TelegramServerError,
+)
+
+from bot.utils.rate_limit import ChatThrottle, TokenBucket
+
+GLOBAL_RATE = 30
+CHAT_INTERVAL_SECONDS = 3.0
+CONCURRENCY = 8
+MAX_ATTEMPTS = 4
+BACKOFF_SECONDS = 1.0
+
+logger = logging.getLogger(__name__)
+
+UNREACHABLE_ERRORS = ("chat not found", "bot was kicked", "group chat was deactivated", "chat_write_forbidden")
+
+
+@dataclass
+class BroadcastReport:
+    total: int = 0
+    sent: int = 0
+    failed: int = 0
+    retries: int = 0
+    unreachable: list[int] = field(default_factory=list)
+    started: float = field(default_factory=time.monotonic)
+    elapsed: float = 0.0
+
+    @property
+    def throughput(self) -> float:
+        return self.sent / self.elapsed if self.elapsed else 0.0
+
+    def summary(self) -> str:
+        return (
+            f"sent={self.sent}/{self.total} failed={self.failed} unreachable={len(self.unreachable)} "
+            f"retries={self.retries} elapsed={self.elapsed:.1f}s rate={self.throughput:.1f} msg/s"
+        )
+
+
+def _is_unreachable(error: TelegramBadRequest) -> bool:
+    message = error.message.lower()
+    return any(reason in message for reason in UNREACHABLE_ERRORS)
+
+
+class Broadcaster:
+    def __init__(
+        self,
+        bot: Bot,
+        *,
+        concurrency: int = CONCURRENCY,
+        rate: float = GLOBAL_RATE,
+        chat_interval: float = CHAT_INTERVAL_SECONDS,
+        max_attempts: int = MAX_ATTEMPTS,
+        bucket: TokenBucket | None = None,
+    ):
+        self.bot = bot
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self.bucket = bucket or TokenBucket(rate)
+        self.throttle = ChatThrottle(chat_interval)
+
+    async def send_all(self, messages: Iterable[tuple[int, str]], **kwargs) -> BroadcastReport:
+        report = BroadcastReport()
+        queue: asyncio.Queue[tuple[int, str]] = asyncio.Queue()
+        for message in messages:
+            queue.put_nowait(message)
+        report.total = queue.qsize()
+
+        async def worker() -> None:
+            while True:
+                try:
+                    chat_id, text = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                await self._deliver(chat_id, text, report, kwargs)
+
+        await asyncio.gather(*(worker() for _ in range(min(self.concurrency, report.total))))
+        report.elapsed = time.monotonic() - report.started
+        return report
+
+    async def _deliver(self, chat_id: int, text: str, report: BroadcastReport, kwargs: dict) -> None:
+        for attempt in range(1, self.max_attempts + 1):
+            await self.throttle.acquire(chat_id)
+            await self.bucket.acquire()
+            try:
+                await self.bot.send_message(chat_id, text, **kwargs)
+                report.sent += 1
+                return
+            except TelegramRetryAfter as e:
+                # Flood waits are applied to the whole bot, so every worker backs off.
+                self.bucket.pause(e.retry_after)
+                self.throttle.pause(chat_id, e.retry_after)
+            except TelegramForbiddenError:
+                report.unreachable.append(chat_id)
+                return
+            except TelegramBadRequest as e:
+                if _is_unreachable(e):
+                    report.unreachable.append(chat_id)
+                else:
+                    logger.warning("Broadcast to %s rejected: %s", chat_id, e.message)
+                    report.failed += 1
+                return
+            except (TelegramNetworkError, TelegramServerError) as e:
+                logger.warning("Broadcast to %s failed (attempt %d): %s", chat_id, attempt, e)
+                await asyncio.sleep(BACKOFF_SECONDS * 2 ** (attempt - 1))
+            except Exception:
+                logger.exception("Broadcast to %s failed", chat_id)
+                report.failed += 1
+                return
+            if attempt < self.max_attempts:
+                report.retries += 1
+        report.failed += 1
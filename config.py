@@ -1,7 +1,7 @@
 import os
 from functools import lru_cache
-from pydantic import BaseSettings, Field
-from pydantic_settings import SettingsConfigDict
+from pydantic import Field
+from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
 class Settings(BaseSettings):
@@ -13,6 +13,10 @@ class Settings(BaseSettings):
         validation_alias="DATABASE_URL",
     )
     admin_ids: str | None = Field(default=None, validation_alias="ADMINS")
+    redis_url: str | None = Field(default=None, validation_alias="REDIS_URL")
+    # Carry kiss/lover/son requests in signed button data instead of pending_requests rows.
+    signed_requests: bool = Field(default=False, validation_alias="SIGNED_REQUESTS")
+    callback_secret: str | None = Field(default=None, validation_alias="CALLBACK_SECRET")
 
     @property
     def admin_list(self) -> list[int]:
@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import secrets
+import time
+from typing import NamedTuple
+
+from aiogram.types import CallbackQuery, InlineKeyboardButton, InlineKeyboardMarkup
+
+from bot.utils.redis_pool import RedisPool
+from bot.utils.signed_data import MAX_CALLBACK_BYTES, CallbackSigner
+from models import RequestType
+
+SEEN_PREFIX = "consent:"
+# Codes for the request type inside a signed token; append only, tokens in flight use them.
+TYPE_CODES = {RequestType.KISS: 1, RequestType.LOVER: 2, RequestType.SON: 3}
+TYPES_BY_CODE = {code: req_type for req_type, code in TYPE_CODES.items()}
+# Up to four base36 characters, so two requests for the same pair in the same second
+# get different tokens and claiming one does not burn the other.
+NONCE_RANGE = 36**4
+
+logger = logging.getLogger(__name__)
+
+
+class SignedRequest(NamedTuple):
+    type: RequestType
+    requester_id: int  # Telegram ids, so checking the presser needs no lookup
+    target_id: int
+    expires_at: int  # unix seconds
+    token: str
+
+
+class ConsentTokens:
+    """Kiss/lover/son requests carried in signed callback data instead of ``pending_requests``.
+
+    Issuing a request writes nothing; a press is checked against the signature and
+    the expiry in the token, then claimed once in a seen-set (Redis through the shared
+    pool while its breaker is closed, otherwise this process) so a replayed or second
+    button press is refused. Only an accepted request touches the database.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self._pool: RedisPool | None = None
+        self._signer: CallbackSigner | None = None
+        self._seen: dict[str, float] = {}
+        self._prune_at = 1024
+        self.issued = 0
+        self.replayed = 0
+
+    def configure(self, enabled: bool, secret: str, pool: RedisPool | None = None) -> None:
+        self.enabled = enabled
+        self._pool = pool
+        self._signer = CallbackSigner(hashlib.sha256(f"consent:{secret}".encode()).digest())
+
+    def issue(self, prefix: str, req_type: RequestType, requester_id: int, target_id: int, ttl_seconds: int) -> str:
+        expires_at = int(time.time()) + ttl_seconds
+        nonce = secrets.randbelow(NONCE_RANGE)
+        token = self._signer.sign(prefix, (TYPE_CODES[req_type], requester_id, target_id, expires_at, nonce))
+        # Room for the ":1"/":0" choice the buttons append.
+        if len(token.encode()) + 2 > MAX_CALLBACK_BYTES:
+            raise ValueError(f"Signed request is {len(token)} bytes, over the callback limit")
+        self.issued += 1
+        return token
+
+    def read(self, token: str) -> SignedRequest | None:
+        verified = self._signer.verify(token) if self._signer else None
+        if verified is None:
+            return None
+        _, values = verified
+        if len(values) != 5 or values[0] not in TYPES_BY_CODE or values[3] < time.time():
+            return None
+        return SignedRequest(TYPES_BY_CODE[values[0]], values[1], values[2], values[3], token)
+
+    async def claim(self, request: SignedRequest) -> bool:
+        # The seen entry only has to outlive the token; after that the expiry check refuses it.
+        ttl = max(1, int(request.expires_at - time.time()) + 1)
+        client = self._pool.acquire() if self._pool is not None else None
+        if client is not None:
+            try:
+                claimed = bool(await client.set(f"{SEEN_PREFIX}{request.token}", 1, nx=True, ex=ttl))
+            except Exception:
+                self._pool.failure()
+                logger.exception("Consent seen-set unavailable; falling back to memory")
+            else:
+                self._pool.success()
+                if not claimed:
+                    self.replayed += 1
+                return claimed
+        return self._claim_locally(request.token, time.time() + ttl)
+
+    def _claim_locally(self, token: str, until: float) -> bool:
+        now = time.time()
+        if self._seen.get(token, 0) > now:
+            self.replayed += 1
+            return False
+        self._seen[token] = until
+        if len(self._seen) >= self._prune_at:
+            self._seen = {key: expiry for key, expiry in self._seen.items() if expiry > now}
+            self._prune_at = max(1024, 2 * len(self._seen))
+        return True
+
+    def stats(self) -> dict[str, int]:
+        return {"issued": self.issued, "seen": len(self._seen), "replayed": self.replayed}
+
+
+consent = ConsentTokens()
+
+
+def consent_keyboard(callback_prefix: str) -> InlineKeyboardMarkup:
+    return InlineKeyboardMarkup(
+        inline_keyboard=[
+            [
+                InlineKeyboardButton(text="Accept", callback_data=f"{callback_prefix}:1"),
+                InlineKeyboardButton(text="Decline", callback_data=f"{callback_prefix}:0"),
+            ]
+        ]
+    )
+
+
+async def claim_signed(call: CallbackQuery) -> tuple[SignedRequest, bool] | None:
+    # Answers the press itself when the request is forged, expired, meant for someone
+    # else or already answered.
+    token, _, choice = call.data.rpartition(":")
+    request = consent.read(token)
+    if request is None or request.target_id != call.from_user.id or not await consent.claim(request):
+        await call.answer("Expired", show_alert=True)
+        return None
+    return request, choice == "1"
@@ -6,8 +6,9 @@ from contextlib import asynccontextmanager
 from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
+from bot.db.migrate import upgrade_schema
 from config import get_settings
-from models import Base, Gift
+from gift_catalog import reload_gifts
 
 _engine: AsyncEngine | None = None
 _sessionmaker: async_sessionmaker[AsyncSession] | None = None
@@ -19,32 +20,17 @@ async def init_db() -> None:
     _engine = create_async_engine(settings.database_url, echo=False, future=True)
     _sessionmaker = async_sessionmaker(_engine, expire_on_commit=False)
     async with _engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
-    await _seed_gifts()
-
-
-async def _seed_gifts() -> None:
-    gifts = [
-        ("rose", "🌹", 200, 0),
-        ("heart", "❤️", 500, 0),
-        ("yellow_rose", "💛🌹", 350, 0),
-        ("chocolate", "🍫", 800, 0),
-        ("teddy", "🧸", 1200, 0),
-        ("crown", "👑", 2500, 0),
-        ("diamond", "💎", 5000, 5),
-        ("fire", "🔥", 1500, 0),
-        ("star", "⭐", 1000, 0),
-        ("bouquet", "💐", 2000, 0),
-    ]
+        await conn.run_sync(upgrade_schema)
+    await _load_gifts()
+
+
+async def _load_gifts() -> None:
     async with async_session() as session:
-        for key, emoji, price, bonus in gifts:
-            if await session.get(Gift, key) is None:
-                session.add(Gift(key=key, emoji=emoji, price=price, bonus_points=bonus))
-        await session.commit()
+        await reload_gifts(session)
 
 
 @asynccontextmanager
-def async_session() -> AsyncSession:
+async def async_session() -> AsyncSession:
     if _sessionmaker is None:
         raise RuntimeError("Database not initialized")
     session = _sessionmaker()
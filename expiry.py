@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Iterable
+
+from aiogram.types import Message
+from sqlalchemy import Row
+
+from bot.services.outbound import outbound
+from bot.utils.timer_wheel import TimerWheel
+from db import async_session
+from models import PendingRequest, RequestStatus
+from repositories import (
+    REQUEST_PURGE_BATCH,
+    attach_request_message,
+    expire_requests,
+    pending_request_deadlines,
+    purge_settled_requests,
+)
+from utils import italic
+
+TICK_SECONDS = 1.0
+WHEEL_SLOTS = 512
+EXPIRE_BATCH = 500
+EXPIRED_TEXT = "Request expired."
+# Settled rows are deleted this long after their deadline, a few batches every interval.
+SETTLED_RETENTION = timedelta(days=1)
+PURGE_INTERVAL_SECONDS = 600.0
+
+EPOCH = datetime(1970, 1, 1)
+
+logger = logging.getLogger(__name__)
+
+
+def _seconds(moment: datetime) -> float:
+    # expires_at is naive UTC, so the wheel runs on the same clock.
+    return (moment - EPOCH).total_seconds()
+
+
+class RequestExpiry:
+    def __init__(self, tick: float = TICK_SECONDS, slots: int = WHEEL_SLOTS):
+        self.tick = tick
+        self._wheel = TimerWheel(tick, slots, start=_seconds(datetime.utcnow()))
+        self._task: asyncio.Task | None = None
+        self._next_purge = 0.0
+        self.expired = 0
+        self.purged = 0
+
+    def __len__(self) -> int:
+        return len(self._wheel)
+
+    def track(self, request_id: int, expires_at: datetime) -> None:
+        self._wheel.schedule(request_id, _seconds(expires_at))
+
+    def cancel(self, request_id: int) -> None:
+        self._wheel.cancel(request_id)
+
+    def retire(self, rows: Iterable[Row]) -> None:
+        # Requests already marked EXPIRED elsewhere (e.g. superseded): drop their timers
+        # and take the buttons off their messages.
+        for request_id, chat_id, message_id in rows:
+            self._wheel.cancel(request_id)
+            if chat_id is not None and message_id is not None:
+                outbound.edit(chat_id, message_id, italic(EXPIRED_TEXT))
+
+    async def post(self, message: Message, request: PendingRequest, text: str, **kwargs) -> None:
+        # Sends the Accept/Decline prompt and records where it landed so expiry can edit it.
+        self.track(request.id, request.expires_at)
+        try:
+            sent = await outbound.reply_and_wait(message, text, **kwargs)
+        except Exception:
+            # The timer stays, so the row still expires; there is just no prompt to edit.
+            logger.exception("Posting the prompt for request %s failed", request.id)
+            return
+        if sent is None:
+            return
+        async with async_session() as session:
+            status = await attach_request_message(session, request.id, sent.chat.id, sent.message_id)
+            await session.commit()
+        # Expired or superseded before the prompt went out, so nobody retired it yet.
+        if status == RequestStatus.EXPIRED:
+            outbound.edit(sent.chat.id, sent.message_id, italic(EXPIRED_TEXT))
+
+    async def load(self) -> int:
+        loaded = 0
+        async with async_session() as session:
+            async for request_id, expires_at in pending_request_deadlines(session):
+                self.track(request_id, expires_at)
+                loaded += 1
+        return loaded
+
+    async def expire_due(self, now: datetime | None = None) -> int:
+        now = now or datetime.utcnow()
+        due = self._wheel.advance(_seconds(now))
+        expired = 0
+        for start in range(0, len(due), EXPIRE_BATCH):
+            try:
+                async with async_session() as session:
+                    rows = await expire_requests(session, due[start : start + EXPIRE_BATCH], now)
+                    await session.commit()
+            except Exception:
+                # Put the unprocessed timers back so the next tick retries them.
+                for request_id in due[start:]:
+                    self._wheel.schedule(request_id, _seconds(now))
+                raise
+            self.retire(rows)
+            expired += len(rows)
+        self.expired += expired
+        return expired
+
+    async def purge(self, now: datetime | None = None) -> int:
+        before = (now or datetime.utcnow()) - SETTLED_RETENTION
+        purged = 0
+        while True:
+            async with async_session() as session:
+                deleted = await purge_settled_requests(session, before)
+                await session.commit()
+            purged += deleted
+            if deleted < REQUEST_PURGE_BATCH:
+                break
+            await asyncio.sleep(0)
+        self.purged += purged
+        return purged
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.tick)
+            try:
+                await self.expire_due()
+            except Exception:
+                logger.exception("Request expiry failed; timers kept for the next tick")
+            if loop.time() >= self._next_purge:
+                self._next_purge = loop.time() + PURGE_INTERVAL_SECONDS
+                try:
+                    await self.purge()
+                except Exception:
+                    logger.exception("Purging settled requests failed")
+
+    async def start(self) -> None:
+        # The wheel lives in memory, so it is rebuilt from the still-pending rows on startup;
+        # rows that lapsed while the bot was down fire on the first tick.
+        if self._task is None:
+            loaded = await self.load()
+            logger.info("Tracking %d pending requests", loaded)
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict[str, int]:
+        return {"tracked": len(self._wheel), "expired": self.expired, "purged": self.purged}
+
+
+request_expiry = RequestExpiry()
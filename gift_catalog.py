@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from types import MappingProxyType
+from typing import Iterable, Mapping
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import Gift
+from upserts import upsert
+from utils import italic
+
+GIFTS_FILE = Path(__file__).resolve().parent / "data" / "gifts.json"
+GIFT_FIELDS = ("key", "emoji", "price", "bonus_points")
+
+
+@dataclass(frozen=True)
+class CatalogGift:
+    key: str
+    emoji: str
+    price: int
+    bonus_points: int
+
+
+@dataclass(frozen=True)
+class GiftCatalog:
+    gifts: Mapping[str, CatalogGift]
+    reply: str
+
+    @classmethod
+    def build(cls, gifts: Iterable[CatalogGift]) -> GiftCatalog:
+        index = {gift.key: gift for gift in gifts}
+        lines = ["Gifts:"]
+        for gift in index.values():
+            lines.append(f"{gift.key} {gift.emoji} - {gift.price}p")
+        return cls(MappingProxyType(index), italic("\n".join(lines)))
+
+    def get(self, key: str) -> CatalogGift | None:
+        return self.gifts.get(key)
+
+    def __len__(self) -> int:
+        return len(self.gifts)
+
+
+# Replaced wholesale on reload, so readers always see one consistent catalog.
+_catalog = GiftCatalog.build(())
+
+
+def gift_catalog() -> GiftCatalog:
+    return _catalog
+
+
+def read_gift_file(path: Path = GIFTS_FILE) -> list[dict]:
+    with open(path, encoding="utf-8") as f:
+        rows = json.load(f)
+    gifts = []
+    for row in rows:
+        missing = [name for name in GIFT_FIELDS if name not in row]
+        if missing:
+            raise ValueError(f"Gift {row.get('key', '?')} is missing {', '.join(missing)}")
+        gifts.append(
+            {"key": str(row["key"]), "emoji": row["emoji"], "price": int(row["price"]), "bonus_points": int(row["bonus_points"])}
+        )
+    return gifts
+
+
+async def seed_gifts(session: AsyncSession, rows: list[dict]) -> None:
+    if rows:
+        await session.execute(upsert(session, Gift, rows, "key", update=("emoji", "price", "bonus_points")))
+
+
+async def load_catalog(session: AsyncSession) -> GiftCatalog:
+    result = await session.execute(select(Gift).order_by(Gift.price, Gift.key))
+    return GiftCatalog.build(
+        CatalogGift(gift.key, gift.emoji, gift.price, gift.bonus_points) for gift in result.scalars()
+    )
+
+
+async def reload_gifts(session: AsyncSession, path: Path = GIFTS_FILE) -> GiftCatalog:
+    # The file is the source of truth for prices; gifts only in the database stay listed.
+    global _catalog
+    await seed_gifts(session, read_gift_file(path))
+    catalog = await load_catalog(session)
+    await session.commit()
+    _catalog = catalog
+    return catalog
@@ -4,8 +4,12 @@ from aiogram import F, Router
 from aiogram.filters import Command
 from aiogram.types import Message
 
+from activity import activity_buffer
+from bot.services.outbound import outbound
+from bot.services.render_cache import render_cache
+from config import get_settings
 from db import async_session
-from repositories import get_or_create_group, get_or_create_user, log_message
+from repositories import get_group_id, get_user_id, identity_cache_stats
 from utils import ensure_group_message, italic
 
 router = Router()
@@ -16,11 +20,11 @@ async def start_cmd(message: Message):
     if not message.from_user:
         return
     async with async_session() as session:
-        await get_or_create_user(session, message.from_user)
+        await get_user_id(session, message.from_user)
         if ensure_group_message(message):
-            await get_or_create_group(session, message.chat)
+            await get_group_id(session, message.chat)
         await session.commit()
-    await message.reply(italic("Hello! I'm ready to manage clans, points, and gifts."))
+    outbound.reply(message, italic("Hello! I'm ready to manage clans, points, and gifts."))
 
 
 @router.message(Command("help"))
@@ -28,19 +32,42 @@ async def help_cmd(message: Message):
     text = (
         "BASIC: /start /help /ping\n"
         "SOCIAL: /hug /kiss /punch /bite /dare\n"
-        "STATS: /points /top /stats\n"
-        "RELATIONSHIPS: /lover /unlover /son /unson\n"
+        "STATS: /points /top /stats /rank\n"
+        "RELATIONSHIPS: /lover /unlover /son /unson /family /lovers\n"
         "CLANS: /createclan NAME /joinclan NAME /leaveclan /clan /topclans /clans /claninfo NAME\n"
         "CLAN ADMIN: /setclanminpoints N /setcoleader (reply) /removecoleader /clean_topmembers\n"
-        "GIFTS: /gifts /gift <gift_key> (reply) /gifthistory\n"
+        "GIFTS: /gifts /gift <gift_key> (reply) /gifthistory /topgifted\n"
         "LEADERBOARDS: /leaderboard_on /leaderboard_off /leaderboard_now"
     )
-    await message.reply(italic(text))
+    outbound.reply(message, italic(text))
 
 
 @router.message(Command("ping"))
 async def ping_cmd(message: Message):
-    await message.reply(italic("Pong."))
+    outbound.reply(message, italic("Pong."))
+
+
+@router.message(Command("cachestats"))
+async def cachestats_cmd(message: Message):
+    if not message.from_user or message.from_user.id not in get_settings().admin_list:
+        return
+    lines = ["Caches:"]
+    for name, stats in identity_cache_stats().items():
+        lines.append(
+            f"{name}: {stats['size']}/{stats['maxsize']} entries, "
+            f"{stats['hits']} hits, {stats['misses']} misses, {stats['evictions']} evictions"
+        )
+    queue = outbound.stats()
+    lines.append(
+        f"outbound: {queue['pending']} pending, {queue['sent']} sent, {queue['retried']} retried, "
+        f"{queue['coalesced']} coalesced, {queue['failed']} failed"
+    )
+    rendered = render_cache.stats()
+    lines.append(
+        f"rendered: {rendered['size']} entries, {rendered['hits']} hits, {rendered['builds']} builds, "
+        f"{rendered['shared']} shared"
+    )
+    outbound.reply(message, italic("\n".join(lines)))
 
 
 @router.message(F.chat.type.in_({"group", "supergroup"}), F.text)
@@ -48,7 +75,7 @@ async def track_activity(message: Message):
     if not message.from_user or message.from_user.is_bot:
         return
     async with async_session() as session:
-        user = await get_or_create_user(session, message.from_user)
-        group = await get_or_create_group(session, message.chat)
-        await log_message(session, user, group)
+        user_id = await get_user_id(session, message.from_user)
+        group_id = await get_group_id(session, message.chat)
         await session.commit()
+    activity_buffer.record(user_id, group_id)
@@ -1,25 +1,52 @@
 from __future__ import annotations
 
-from aiogram import Router
+from datetime import datetime, timedelta
+
+from aiogram import F, Router
 from aiogram.filters import Command
-from aiogram.types import Message
+from aiogram.types import CallbackQuery, InlineKeyboardButton, InlineKeyboardMarkup, Message, User as TgUser
 
+from bot.services.outbound import outbound
+from bot.services.render_cache import render_cache
+from config import get_settings
 from db import async_session
-from repositories import adjust_points, ensure_participants, gift_history, get_gift, record_gift, get_or_create_user
+from gift_catalog import gift_catalog, reload_gifts
+from repositories import (
+    GIFTED_BOARD,
+    GiftCursor,
+    apply_points,
+    ensure_participants,
+    get_user_id,
+    gift_history,
+    record_gift,
+    top_gifted,
+    user_names,
+)
 from utils import ensure_group_message, italic
 
 router = Router()
 
+HISTORY_PAGE_SIZE = 10
+# Cursors travel in callback data as integer microseconds since this (naive UTC) epoch.
+EPOCH = datetime(1970, 1, 1)
+
 
 @router.message(Command("gifts"))
 async def gifts_cmd(message: Message):
-    async with async_session() as session:
-        result = await session.execute("select key, emoji, price from gifts")
-        rows = result.all()
-    lines = ["Gifts:"]
-    for key, emoji, price in rows:
-        lines.append(f"{key} {emoji} - {price}p")
-    await message.reply(italic("\n".join(lines)))
+    outbound.reply(message, gift_catalog().reply)
+
+
+@router.message(Command("reloadgifts"))
+async def reloadgifts_cmd(message: Message):
+    if not message.from_user or message.from_user.id not in get_settings().admin_list:
+        return
+    try:
+        async with async_session() as session:
+            catalog = await reload_gifts(session)
+    except (OSError, ValueError) as exc:
+        outbound.reply(message, italic(f"Gift catalog not reloaded: {exc}"))
+        return
+    outbound.reply(message, italic(f"Gift catalog reloaded: {len(catalog)} gifts."))
 
 
 @router.message(Command("gift"))
@@ -28,41 +55,114 @@ async def gift_cmd(message: Message):
         return
     parts = message.text.split()
     if len(parts) < 2:
-        await message.reply(italic("Specify a gift key."))
+        outbound.reply(message, italic("Specify a gift key."))
         return
     if not message.reply_to_message or not message.reply_to_message.from_user:
-        await message.reply(italic("Reply to a user to use this command."))
+        outbound.reply(message, italic("Reply to a user to use this command."))
         return
     target = message.reply_to_message.from_user
     if target.is_bot or target.id == message.from_user.id:
-        await message.reply(italic("Invalid target."))
+        outbound.reply(message, italic("Invalid target."))
+        return
+    gift = gift_catalog().get(parts[1].strip())
+    if not gift:
+        outbound.reply(message, italic("Unknown gift."))
         return
-    key = parts[1].strip()
     async with async_session() as session:
         actor, target_user, group = await ensure_participants(session, message.from_user, message.chat, target)
-        gift = await get_gift(session, key)
-        if not gift:
-            await message.reply(italic("Unknown gift."))
-            return
         if actor.points < gift.price:
-            await message.reply(italic("Not enough points."))
+            outbound.reply(message, italic("Not enough points."))
             return
-        await adjust_points(session, actor, -gift.price)
-        await adjust_points(session, target_user, gift.bonus_points)
+        await apply_points(session, [(actor.id, -gift.price), (target_user.id, gift.bonus_points)])
         await record_gift(session, actor, target_user, gift, group)
         await session.commit()
     bonus_text = f" Receiver +{gift.bonus_points}p" if gift.bonus_points else ""
-    await message.reply(italic(f"Gift sent: {gift.key} {gift.emoji}.{bonus_text}"))
+    outbound.reply(message, italic(f"Gift sent: {gift.key} {gift.emoji}.{bonus_text}"))
+
+
+async def _render_topgifted() -> str:
+    async with async_session() as session:
+        rows = await top_gifted(session, limit=10)
+    lines = ["Most gifted:"]
+    for idx, (user, totals) in enumerate(rows, start=1):
+        name = user.username or user.first_name or "User"
+        lines.append(f"{idx}. {name} - {totals.received} gifts ({totals.received_value}p)")
+    return italic("\n".join(lines))
+
+
+@router.message(Command("topgifted"))
+async def topgifted_cmd(message: Message):
+    outbound.reply(message, await render_cache.get("topgifted", [GIFTED_BOARD], _render_topgifted))
+
+
+def _encode_cursor(cursor: GiftCursor | None) -> str:
+    if cursor is None:
+        return "0:0"
+    created_at, entry_id = cursor
+    return f"{(created_at - EPOCH) // timedelta(microseconds=1)}:{entry_id}"
+
+
+def _decode_cursor(micros: str, entry_id: str) -> GiftCursor | None:
+    if micros == "0":
+        return None
+    return EPOCH + timedelta(microseconds=int(micros)), int(entry_id)
+
+
+def _parse_history_data(data: str) -> tuple[int, GiftCursor | None] | None:
+    # "gh:<owner>:<micros>:<entry id>"; None for anything malformed or out of range.
+    parts = data.split(":")
+    if len(parts) != 4 or not all(part.isdigit() for part in parts[1:]):
+        return None
+    _, owner_id, micros, entry_id = parts
+    try:
+        return int(owner_id), _decode_cursor(micros, entry_id)
+    except (OverflowError, ValueError):
+        return None
+
+
+async def _history_page(owner: TgUser, before: GiftCursor | None) -> tuple[str, InlineKeyboardMarkup | None]:
+    async with async_session() as session:
+        user_id = await get_user_id(session, owner)
+        await session.commit()
+        entries, next_cursor = await gift_history(session, user_id, limit=HISTORY_PAGE_SIZE, before=before)
+        names = await user_names(session, {e.sender_id for e in entries} | {e.receiver_id for e in entries})
+    if not entries:
+        return italic("No gifts yet." if before is None else "No older gifts."), None
+    catalog = gift_catalog()
+    lines = ["Recent gifts:" if before is None else "Older gifts:"]
+    for entry in entries:
+        gift = catalog.get(entry.gift_key)
+        label = f"{gift.emoji} {entry.gift_key}" if gift else entry.gift_key
+        lines.append(f"{label} from {names.get(entry.sender_id, 'User')} to {names.get(entry.receiver_id, 'User')}")
+    buttons = []
+    if before is not None:
+        buttons.append(InlineKeyboardButton(text="⏮ Newest", callback_data=f"gh:{owner.id}:{_encode_cursor(None)}"))
+    if next_cursor is not None:
+        buttons.append(InlineKeyboardButton(text="Older ▶", callback_data=f"gh:{owner.id}:{_encode_cursor(next_cursor)}"))
+    keyboard = InlineKeyboardMarkup(inline_keyboard=[buttons]) if buttons else None
+    return italic("\n".join(lines)), keyboard
 
 
 @router.message(Command("gifthistory"))
 async def gifthistory_cmd(message: Message):
     if not message.from_user:
         return
-    async with async_session() as session:
-        user = await get_or_create_user(session, message.from_user)
-        history = await gift_history(session, user)
-    lines = ["Recent gifts:"]
-    for entry in history:
-        lines.append(f"{entry.gift_key} from {entry.sender_id} to {entry.receiver_id}")
-    await message.reply(italic("\n".join(lines)))
+    text, keyboard = await _history_page(message.from_user, None)
+    outbound.reply(message, text, reply_markup=keyboard)
+
+
+@router.callback_query(F.data.startswith("gh:"))
+async def gifthistory_callback(call: CallbackQuery):
+    if not call.data or not call.from_user or not call.message:
+        return
+    parsed = _parse_history_data(call.data)
+    if parsed is None:
+        await call.answer("This page is no longer available. Use /gifthistory again.", show_alert=True)
+        return
+    owner_id, cursor = parsed
+    if owner_id != call.from_user.id:
+        await call.answer("Use /gifthistory to see your own gifts.", show_alert=True)
+        return
+    text, keyboard = await _history_page(call.from_user, cursor)
+    outbound.edit_text(call.message, text, reply_markup=keyboard)
+    await call.answer()
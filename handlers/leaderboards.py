@@ -2,10 +2,22 @@ from __future__ import annotations
 
 from aiogram import Router
 from aiogram.filters import Command
-from aiogram.types import Message
+from aiogram.types import Chat, Message
 
+from activity import activity_buffer
+from bot.services.outbound import outbound
+from bot.services.render_cache import render_cache
 from db import async_session
-from repositories import get_or_create_group, set_group_leaderboard, top_clans, top_groups, top_users_for_group
+from leaderboard import build_snapshot
+from repositories import (
+    CLANS_BOARD,
+    GROUPS_BOARD,
+    get_group_id,
+    get_or_create_group,
+    group_board,
+    set_group_leaderboard,
+    top_groups,
+)
 from utils import ensure_group_message, italic
 
 router = Router()
@@ -21,23 +33,18 @@ async def _is_admin(message: Message) -> bool:
         return False
 
 
-async def build_leaderboard_text(chat_id: int) -> str:
+async def _render_leaderboard(group_id: int) -> str:
     async with async_session() as session:
-        group = await get_or_create_group(session, type("obj", (), {"id": chat_id, "title": ""}))
-        users = await top_users_for_group(session, group, limit=5)
-        clans = await top_clans(session, limit=5)
-        groups = await top_groups(session, limit=5)
-    lines = ["🏆 Top Users:"]
-    for idx, (user, stats) in enumerate(users, start=1):
-        name = user.username or user.first_name or "User"
-        lines.append(f"{idx}. {name} - {user.points}p, msgs {stats.message_count}")
-    lines.append("\n🏰 Top Clans:")
-    for idx, clan in enumerate(clans, start=1):
-        lines.append(f"{idx}. {clan.name} - {clan.score}")
-    lines.append("\n🌍 Top Groups:")
-    for idx, group in enumerate(groups, start=1):
-        lines.append(f"{idx}. {group.title} - {group.total_messages} msgs")
-    return "\n".join(lines)
+        snapshot = await build_snapshot(session, [group_id])
+    return italic(snapshot.render(group_id))
+
+
+async def build_leaderboard_text(chat: Chat) -> str:
+    async with async_session() as session:
+        group_id = await get_group_id(session, chat)
+        await session.commit()
+    scopes = [group_board(group_id), CLANS_BOARD, GROUPS_BOARD]
+    return await render_cache.get(("leaderboard", group_id), scopes, lambda: _render_leaderboard(group_id))
 
 
 @router.message(Command("leaderboard_on"))
@@ -48,7 +55,7 @@ async def leaderboard_on(message: Message):
         group = await get_or_create_group(session, message.chat)
         await set_group_leaderboard(session, group, True)
         await session.commit()
-    await message.reply(italic("Leaderboards enabled."))
+    outbound.reply(message, italic("Leaderboards enabled."))
 
 
 @router.message(Command("leaderboard_off"))
@@ -59,22 +66,26 @@ async def leaderboard_off(message: Message):
         group = await get_or_create_group(session, message.chat)
         await set_group_leaderboard(session, group, False)
         await session.commit()
-    await message.reply(italic("Leaderboards disabled."))
+    outbound.reply(message, italic("Leaderboards disabled."))
 
 
 @router.message(Command("leaderboard_now"))
 async def leaderboard_now(message: Message):
     if not ensure_group_message(message):
         return
-    text = await build_leaderboard_text(message.chat.id)
-    await message.reply(italic(text))
+    outbound.reply(message, await build_leaderboard_text(message.chat))
 
 
-@router.message(Command("topgroups"))
-async def topgroups_cmd(message: Message):
+async def _render_topgroups() -> str:
     async with async_session() as session:
         groups = await top_groups(session, limit=10)
     lines = ["Top groups:"]
     for idx, group in enumerate(groups, start=1):
-        lines.append(f"{idx}. {group.title} - {group.total_messages} msgs")
-    await message.reply(italic("\n".join(lines)))
+        msgs = group.total_messages + activity_buffer.pending_group_messages(group.id)
+        lines.append(f"{idx}. {group.title} - {msgs} msgs")
+    return italic("\n".join(lines))
+
+
+@router.message(Command("topgroups"))
+async def topgroups_cmd(message: Message):
+    outbound.reply(message, await render_cache.get("topgroups", [GROUPS_BOARD], _render_topgroups))
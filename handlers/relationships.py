@@ -1,22 +1,34 @@
 from __future__ import annotations
 
 from aiogram import F, Router
-from aiogram.filters import Command
-from aiogram.types import CallbackQuery, InlineKeyboardButton, InlineKeyboardMarkup, Message
+from aiogram.filters import Command, CommandObject
+from aiogram.types import CallbackQuery, Message
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from bot.services.outbound import outbound
+from consent import claim_signed, consent, consent_keyboard
 from db import async_session
+from expiry import request_expiry
 from models import RelationshipType, RequestStatus, RequestType, User
+from relationship_graph import FAMILY_DEPTH, MAX_FAMILY_DEPTH, relationship_graph
 from repositories import (
     create_pending_request,
     ensure_participants,
+    ensure_user_by_telegram_id,
+    get_or_create_user,
+    get_user_id,
     remove_relationship,
     resolve_request,
     set_relationship,
+    user_names,
 )
 from utils import ensure_group_message, extract_name, italic
 
 router = Router()
 
+REQUEST_TTL_SECONDS = 300
+SIGNED_RELATIONSHIP = "rs"
+
 
 async def _relationship_request(message: Message, req_type: RequestType):
     if not ensure_group_message(message):
@@ -24,26 +36,26 @@ async def _relationship_request(message: Message, req_type: RequestType):
     if not message.from_user or message.from_user.is_bot:
         return
     if not message.reply_to_message or not message.reply_to_message.from_user:
-        await message.reply(italic("Reply to a user to use this command."))
+        outbound.reply(message, italic("Reply to a user to use this command."))
         return
     target = message.reply_to_message.from_user
     if target.is_bot or target.id == message.from_user.id:
-        await message.reply(italic("You cannot target yourself."))
+        outbound.reply(message, italic("You cannot target yourself."))
+        return
+    label = "love" if req_type == RequestType.LOVER else "family"
+    text = italic(f"{extract_name(message.from_user)} wants to be your {label}. Accept?")
+    if consent.enabled:
+        token = consent.issue(SIGNED_RELATIONSHIP, req_type, message.from_user.id, target.id, REQUEST_TTL_SECONDS)
+        outbound.reply(message, text, reply_markup=consent_keyboard(token))
         return
     async with async_session() as session:
         actor, target_user, group = await ensure_participants(session, message.from_user, message.chat, target)
-        req = await create_pending_request(session, actor, target_user, group, req_type, ttl_seconds=300)
+        req, superseded = await create_pending_request(
+            session, actor, target_user, group, req_type, ttl_seconds=REQUEST_TTL_SECONDS
+        )
         await session.commit()
-    keyboard = InlineKeyboardMarkup(
-        inline_keyboard=[
-            [
-                InlineKeyboardButton(text="Accept", callback_data=f"rel:{req.id}:1"),
-                InlineKeyboardButton(text="Decline", callback_data=f"rel:{req.id}:0"),
-            ]
-        ]
-    )
-    label = "love" if req_type == RequestType.LOVER else "family"
-    await message.reply(italic(f"{extract_name(message.from_user)} wants to be your {label}. Accept?"), reply_markup=keyboard)
+    request_expiry.retire(superseded)
+    await request_expiry.post(message, req, text, reply_markup=consent_keyboard(f"rel:{req.id}"))
 
 
 @router.message(Command("lover"))
@@ -63,17 +75,17 @@ async def unlover_cmd(message: Message):
     if not message.from_user or message.from_user.is_bot:
         return
     if not message.reply_to_message or not message.reply_to_message.from_user:
-        await message.reply(italic("Reply to a user to use this command."))
+        outbound.reply(message, italic("Reply to a user to use this command."))
         return
     target = message.reply_to_message.from_user
     if target.is_bot or target.id == message.from_user.id:
-        await message.reply(italic("You cannot target yourself."))
+        outbound.reply(message, italic("You cannot target yourself."))
         return
     async with async_session() as session:
         actor, target_user, _ = await ensure_participants(session, message.from_user, message.chat, target)
         await remove_relationship(session, actor, target_user, RelationshipType.LOVER)
         await session.commit()
-    await message.reply(italic("Relationship cleared."))
+    outbound.reply(message, italic("Relationship cleared."))
 
 
 @router.message(Command("unson"))
@@ -83,17 +95,80 @@ async def unson_cmd(message: Message):
     if not message.from_user or message.from_user.is_bot:
         return
     if not message.reply_to_message or not message.reply_to_message.from_user:
-        await message.reply(italic("Reply to a user to use this command."))
+        outbound.reply(message, italic("Reply to a user to use this command."))
         return
     target = message.reply_to_message.from_user
     if target.is_bot or target.id == message.from_user.id:
-        await message.reply(italic("You cannot target yourself."))
+        outbound.reply(message, italic("You cannot target yourself."))
         return
     async with async_session() as session:
         actor, target_user, _ = await ensure_participants(session, message.from_user, message.chat, target)
         await remove_relationship(session, actor, target_user, RelationshipType.PARENT)
         await session.commit()
-    await message.reply(italic("Family link cleared."))
+    outbound.reply(message, italic("Family link cleared."))
+
+
+def _subject(message: Message):
+    if message.reply_to_message and message.reply_to_message.from_user and not message.reply_to_message.from_user.is_bot:
+        return message.reply_to_message.from_user
+    return message.from_user
+
+
+@router.message(Command("family"))
+async def family_cmd(message: Message, command: CommandObject):
+    if not message.from_user or message.from_user.is_bot:
+        return
+    depth = FAMILY_DEPTH
+    if command.args:
+        if not command.args.strip().isdigit():
+            outbound.reply(message, italic(f"Usage: /family [generations, 1-{MAX_FAMILY_DEPTH}]"))
+            return
+        depth = int(command.args)
+    subject = _subject(message)
+    async with async_session() as session:
+        user_id = await get_user_id(session, subject)
+        tree = await relationship_graph.family(session, user_id, depth)
+        members = [user_id for generation in tree.ancestors for user_id in generation]
+        members += [member_id for _, member_id in tree.descendants]
+        names = await user_names(session, members)
+        await session.commit()
+    lines = [f"Family of {extract_name(subject)}:"]
+    for generation, ids in reversed(list(enumerate(tree.ancestors, 1))):
+        lines.append(f"{_generation_label(generation)}: {', '.join(names.get(i, 'User') for i in ids)}")
+    if tree.descendants:
+        lines.append("Children:")
+        lines.extend(f"{'  ' * (level - 1)}└ {names.get(member_id, 'User')}" for level, member_id in tree.descendants)
+    if len(lines) == 1:
+        lines.append("No family yet.")
+    if tree.truncated:
+        lines.append("…")
+    outbound.reply(message, italic("\n".join(lines)))
+
+
+def _generation_label(generation: int) -> str:
+    if generation == 1:
+        return "Parents"
+    if generation == 2:
+        return "Grandparents"
+    return "Great-" * (generation - 2) + "grandparents"
+
+
+@router.message(Command("lovers"))
+async def lovers_cmd(message: Message):
+    if not message.from_user or message.from_user.is_bot:
+        return
+    subject = _subject(message)
+    async with async_session() as session:
+        user_id = await get_user_id(session, subject)
+        lovers = await relationship_graph.lovers(session, user_id)
+        names = await user_names(session, lovers)
+        await session.commit()
+    if not lovers:
+        outbound.reply(message, italic(f"{extract_name(subject)} has no lovers yet."))
+        return
+    outbound.reply(
+        message, italic(f"Lovers of {extract_name(subject)}: {', '.join(names.get(i, 'User') for i in lovers)}")
+    )
 
 
 @router.callback_query(F.data.startswith("rel:"))
@@ -107,17 +182,42 @@ async def rel_callback(call: CallbackQuery):
         if not req:
             await call.answer("Expired", show_alert=True)
             return
+        # Answered now; a timer firing later would only find a settled row.
+        request_expiry.cancel(req.id)
         if req.status != RequestStatus.ACCEPTED:
             await session.commit()
             await call.answer("Updated", show_alert=True)
             return
         requester = await session.get(User, req.requester_id)
         target = await session.get(User, req.target_id)
-        if not requester or not target:
-            await call.answer("Missing", show_alert=True)
-            return
-        rel_type = RelationshipType.LOVER if req.type == RequestType.LOVER else RelationshipType.PARENT
-        await set_relationship(session, requester, target, rel_type)
-        await session.commit()
-    await call.message.edit_text(italic("Request accepted."))
+        await _accept_relationship(call, session, req.type, requester, target)
+
+
+@router.callback_query(F.data.startswith(f"{SIGNED_RELATIONSHIP}:"))
+async def signed_rel_callback(call: CallbackQuery):
+    if not call.data or not call.from_user:
+        return
+    claimed = await claim_signed(call)
+    if claimed is None:
+        return
+    request, accept = claimed
+    if not accept:
+        await call.answer("Updated", show_alert=True)
+        return
+    async with async_session() as session:
+        requester = await ensure_user_by_telegram_id(session, request.requester_id)
+        target = await get_or_create_user(session, call.from_user)
+        await _accept_relationship(call, session, request.type, requester, target)
+
+
+async def _accept_relationship(
+    call: CallbackQuery, session: AsyncSession, req_type: RequestType, requester: User | None, target: User | None
+):
+    if not requester or not target:
+        await call.answer("Missing", show_alert=True)
+        return
+    rel_type = RelationshipType.LOVER if req_type == RequestType.LOVER else RelationshipType.PARENT
+    await set_relationship(session, requester, target, rel_type)
+    await session.commit()
+    outbound.edit_text(call.message, italic("Request accepted."))
     await call.answer()
@@ -2,15 +2,29 @@ from __future__ import annotations
 
 from aiogram import F, Router
 from aiogram.filters import Command
-from aiogram.types import CallbackQuery, InlineKeyboardButton, InlineKeyboardMarkup, Message
+from aiogram.types import CallbackQuery, Message
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from bot.services.outbound import outbound
+from consent import claim_signed, consent, consent_keyboard
 from db import async_session
+from expiry import request_expiry
 from models import RequestStatus, RequestType, User
-from repositories import adjust_points, create_pending_request, ensure_participants, resolve_request
+from repositories import (
+    apply_points,
+    create_pending_request,
+    ensure_participants,
+    ensure_user_by_telegram_id,
+    get_or_create_user,
+    resolve_request,
+)
 from utils import extract_name, ensure_group_message, italic
 
 router = Router()
 
+KISS_TTL_SECONDS = 120
+SIGNED_KISS = "ks"
+
 
 def _display_user(user: User) -> str:
     if user.username:
@@ -24,18 +38,18 @@ async def handle_social(message: Message, action: str, actor_delta: int, target_
     if not message.from_user or message.from_user.is_bot:
         return
     if not message.reply_to_message or not message.reply_to_message.from_user:
-        await message.reply(italic("Reply to a user to use this command."))
+        outbound.reply(message, italic("Reply to a user to use this command."))
         return
     target = message.reply_to_message.from_user
     if target.is_bot or target.id == message.from_user.id:
-        await message.reply(italic("You cannot target yourself."))
+        outbound.reply(message, italic("You cannot target yourself."))
         return
     async with async_session() as session:
         actor, target_user, group = await ensure_participants(session, message.from_user, message.chat, target)
-        await adjust_points(session, actor, actor_delta)
-        await adjust_points(session, target_user, target_delta)
+        await apply_points(session, [(actor.id, actor_delta), (target_user.id, target_delta)])
         await session.commit()
-    await message.reply(
+    outbound.reply(
+        message,
         italic(
             f"{extract_name(message.from_user)} {action} {extract_name(target)} ({actor_delta:+}p | target {target_delta:+}p)"
         )
@@ -63,11 +77,12 @@ async def dare_cmd(message: Message):
         return
     dare_text = "Complete a creative challenge today!"
     if message.reply_to_message and message.reply_to_message.from_user and not message.reply_to_message.from_user.is_bot:
-        await message.reply(
+        outbound.reply(
+            message,
             italic(f"{extract_name(message.from_user)} dares {extract_name(message.reply_to_message.from_user)}: {dare_text}")
         )
     else:
-        await message.reply(italic(f"Dare: {dare_text}"))
+        outbound.reply(message, italic(f"Dare: {dare_text}"))
 
 
 @router.message(Command("kiss"))
@@ -77,28 +92,25 @@ async def kiss_cmd(message: Message):
     if not message.from_user or message.from_user.is_bot:
         return
     if not message.reply_to_message or not message.reply_to_message.from_user:
-        await message.reply(italic("Reply to a user to use this command."))
+        outbound.reply(message, italic("Reply to a user to use this command."))
         return
     target = message.reply_to_message.from_user
     if target.is_bot or target.id == message.from_user.id:
-        await message.reply(italic("You cannot target yourself."))
+        outbound.reply(message, italic("You cannot target yourself."))
+        return
+    text = italic(f"{extract_name(message.from_user)} wants to kiss {extract_name(target)}. Accept?")
+    if consent.enabled:
+        token = consent.issue(SIGNED_KISS, RequestType.KISS, message.from_user.id, target.id, KISS_TTL_SECONDS)
+        outbound.reply(message, text, reply_markup=consent_keyboard(token))
         return
     async with async_session() as session:
         actor, target_user, group = await ensure_participants(session, message.from_user, message.chat, target)
-        req = await create_pending_request(session, actor, target_user, group, RequestType.KISS, ttl_seconds=120)
+        req, superseded = await create_pending_request(
+            session, actor, target_user, group, RequestType.KISS, ttl_seconds=KISS_TTL_SECONDS
+        )
         await session.commit()
-    keyboard = InlineKeyboardMarkup(
-        inline_keyboard=[
-            [
-                InlineKeyboardButton(text="Accept", callback_data=f"kiss:{req.id}:1"),
-                InlineKeyboardButton(text="Decline", callback_data=f"kiss:{req.id}:0"),
-            ]
-        ]
-    )
-    await message.reply(
-        italic(f"{extract_name(message.from_user)} wants to kiss {extract_name(target)}. Accept?"),
-        reply_markup=keyboard,
-    )
+    request_expiry.retire(superseded)
+    await request_expiry.post(message, req, text, reply_markup=consent_keyboard(f"kiss:{req.id}"))
 
 
 @router.callback_query(F.data.startswith("kiss:"))
@@ -112,19 +124,42 @@ async def kiss_callback(call: CallbackQuery):
         if not req:
             await call.answer("Expired", show_alert=True)
             return
+        # Answered now; a timer firing later would only find a settled row.
+        request_expiry.cancel(req.id)
         if req.status != RequestStatus.ACCEPTED:
             await session.commit()
             await call.answer("Updated", show_alert=True)
             return
         requester = await session.get(User, req.requester_id)
         target = await session.get(User, req.target_id)
-        if not requester or not target:
-            await call.answer("Missing user", show_alert=True)
-            return
-        await adjust_points(session, requester, 3)
-        await adjust_points(session, target, 1)
-        await session.commit()
-    await call.message.edit_text(
+        await _accept_kiss(call, session, requester, target)
+
+
+@router.callback_query(F.data.startswith(f"{SIGNED_KISS}:"))
+async def signed_kiss_callback(call: CallbackQuery):
+    if not call.data or not call.from_user:
+        return
+    claimed = await claim_signed(call)
+    if claimed is None:
+        return
+    request, accept = claimed
+    if not accept:
+        await call.answer("Updated", show_alert=True)
+        return
+    async with async_session() as session:
+        requester = await ensure_user_by_telegram_id(session, request.requester_id)
+        target = await get_or_create_user(session, call.from_user)
+        await _accept_kiss(call, session, requester, target)
+
+
+async def _accept_kiss(call: CallbackQuery, session: AsyncSession, requester: User | None, target: User | None):
+    if not requester or not target:
+        await call.answer("Missing user", show_alert=True)
+        return
+    await apply_points(session, [(requester.id, 3), (target.id, 1)])
+    await session.commit()
+    outbound.edit_text(
+        call.message,
         italic(f"Kiss accepted! {_display_user(requester)} +3p, {_display_user(target)} +1p."),
     )
     await call.answer()
@@ -4,8 +4,22 @@ from aiogram import Router
 from aiogram.filters import Command
 from aiogram.types import Message
 
+from activity import activity_buffer
+from bot.services.outbound import outbound
+from bot.services.render_cache import render_cache
 from db import async_session
-from repositories import get_or_create_group, get_or_create_user, get_user_group_stats, top_users_for_group
+from gift_catalog import gift_catalog
+from repositories import (
+    GiftSummary,
+    get_group_id,
+    get_or_create_group,
+    get_or_create_user,
+    get_user_group_stats,
+    gift_summary,
+    group_board,
+    top_users_for_group,
+    user_rank,
+)
 from utils import ensure_group_message, italic
 
 router = Router()
@@ -16,14 +30,15 @@ async def points_cmd(message: Message):
     if not message.from_user:
         return
     if not ensure_group_message(message):
-        await message.reply(italic("Use this in a group."))
+        outbound.reply(message, italic("Use this in a group."))
         return
     async with async_session() as session:
         user = await get_or_create_user(session, message.from_user)
         group = await get_or_create_group(session, message.chat)
         stats = await get_user_group_stats(session, user, group)
         await session.commit()
-    await message.reply(italic(f"You have {user.points} points. Messages in this group: {stats.message_count}."))
+    group_messages = stats.message_count + activity_buffer.pending_user_group_messages(user.id, group.id)
+    outbound.reply(message, italic(f"You have {user.points} points. Messages in this group: {group_messages}."))
 
 
 @router.message(Command("stats"))
@@ -31,30 +46,78 @@ async def stats_cmd(message: Message):
     if not message.from_user:
         return
     if not ensure_group_message(message):
-        await message.reply(italic("Use this in a group."))
+        outbound.reply(message, italic("Use this in a group."))
         return
     async with async_session() as session:
         user = await get_or_create_user(session, message.from_user)
         group = await get_or_create_group(session, message.chat)
         stats = await get_user_group_stats(session, user, group)
         await session.commit()
-    await message.reply(
+        group_rank = await user_rank(session, user, group)
+        gifts = await gift_summary(session, user.id)
+    group_messages = stats.message_count + activity_buffer.pending_user_group_messages(user.id, group.id)
+    total_messages = user.total_messages + activity_buffer.pending_user_messages(user.id)
+    outbound.reply(
+        message,
         italic(
-            f"Points: {user.points}\nMessages (group): {stats.message_count}\nMessages (global): {user.total_messages}"
-        )
+            f"Points: {user.points}\nMessages (group): {group_messages}\nMessages (global): {total_messages}"
+            f"\nRank (group): {_format_rank(group_rank)}\n{_format_gifts(gifts)}"
+        ),
     )
 
 
-@router.message(Command("top"))
-async def top_cmd(message: Message):
+def _format_gifts(gifts: GiftSummary) -> str:
+    text = f"Gifts: {gifts.sent} sent ({gifts.sent_value}p), {gifts.received} received ({gifts.received_value}p)"
+    if gifts.favourite:
+        gift = gift_catalog().get(gifts.favourite)
+        text += f"\nFavourite gift: {gift.emoji + ' ' if gift else ''}{gifts.favourite}"
+    return text
+
+
+def _format_rank(rank: tuple[int, int] | None) -> str:
+    if rank is None:
+        return "unranked"
+    position, total = rank
+    return f"#{position} of {total}"
+
+
+@router.message(Command("rank"))
+async def rank_cmd(message: Message):
+    if not message.from_user:
+        return
     if not ensure_group_message(message):
-        await message.reply(italic("Use this in a group."))
+        outbound.reply(message, italic("Use this in a group."))
         return
     async with async_session() as session:
+        user = await get_or_create_user(session, message.from_user)
         group = await get_or_create_group(session, message.chat)
-        top_users = await top_users_for_group(session, group, limit=10)
+        await session.commit()
+        group_rank = await user_rank(session, user, group)
+        global_rank = await user_rank(session, user)
+    outbound.reply(
+        message,
+        italic(f"Rank in this group: {_format_rank(group_rank)}\nGlobal rank: {_format_rank(global_rank)}"),
+    )
+
+
+async def _render_top(group_id: int) -> str:
+    async with async_session() as session:
+        top_users = await top_users_for_group(session, group_id, limit=10)
     lines = ["Top users:"]
     for idx, (user, ug) in enumerate(top_users, start=1):
         name = user.username or user.first_name or "User"
-        lines.append(f"{idx}. {name} - {user.points}p, msgs {ug.message_count}")
-    await message.reply(italic("\n".join(lines)))
+        msgs = ug.message_count + activity_buffer.pending_user_group_messages(user.id, group_id)
+        lines.append(f"{idx}. {name} - {user.points}p, msgs {msgs}")
+    return italic("\n".join(lines))
+
+
+@router.message(Command("top"))
+async def top_cmd(message: Message):
+    if not ensure_group_message(message):
+        outbound.reply(message, italic("Use this in a group."))
+        return
+    async with async_session() as session:
+        group_id = await get_group_id(session, message.chat)
+        await session.commit()
+    text = await render_cache.get(("top", group_id), [group_board(group_id)], lambda: _render_top(group_id))
+    outbound.reply(message, text)
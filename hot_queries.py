@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.sql import Executable
+
+from models import (
+    Clan,
+    DailyActivity,
+    GiftHistory,
+    GiftStat,
+    GiftTotal,
+    Group,
+    PendingRequest,
+    RequestStatus,
+    User,
+    UserGroup,
+)
+from relationship_graph import FAMILY_DEPTH, family_query
+
+# Placeholder ids; the plan depends on the shape of the query, not on the values.
+SAMPLE_ID = 1
+
+
+def hot_queries() -> dict[str, Executable]:
+    now = datetime(2024, 1, 1)
+    return {
+        "top users": select(User).order_by(User.points.desc()).limit(10),
+        "user rank": select(func.count()).select_from(User).where(User.points > 100),
+        "top clans": select(Clan).order_by(Clan.score.desc()).limit(10),
+        "top groups": select(Group).order_by(Group.total_messages.desc()).limit(5),
+        "group members": select(User, UserGroup)
+        .join(UserGroup, UserGroup.user_id == User.id)
+        .where(UserGroup.group_id == SAMPLE_ID)
+        .order_by(User.points.desc(), UserGroup.message_count.desc())
+        .limit(10),
+        "daily activity": select(DailyActivity).where(
+            DailyActivity.user_id == SAMPLE_ID, DailyActivity.day == now.date()
+        ),
+        "gifts sent": select(GiftHistory)
+        .where(GiftHistory.sender_id == SAMPLE_ID)
+        .order_by(GiftHistory.created_at.desc())
+        .limit(10),
+        "gifts received": select(GiftHistory)
+        .where(GiftHistory.receiver_id == SAMPLE_ID)
+        .order_by(GiftHistory.created_at.desc())
+        .limit(10),
+        "gift history page": select(GiftHistory)
+        .where(
+            GiftHistory.receiver_id == SAMPLE_ID,
+            tuple_(GiftHistory.created_at, GiftHistory.id) < tuple_(now, SAMPLE_ID),
+        )
+        .order_by(GiftHistory.created_at.desc(), GiftHistory.id.desc())
+        .limit(11),
+        "top gifted": select(GiftTotal).order_by(GiftTotal.received.desc()).limit(10),
+        "favourite gift": select(GiftStat.gift_key)
+        .where(GiftStat.user_id == SAMPLE_ID, GiftStat.received > 0)
+        .order_by(GiftStat.received.desc(), GiftStat.gift_key)
+        .limit(1),
+        "family tree": family_query(SAMPLE_ID, FAMILY_DEPTH),
+        "expired requests": select(PendingRequest.id).where(
+            PendingRequest.status == RequestStatus.PENDING, PendingRequest.expires_at <= now
+        ),
+        "pending deadlines": select(PendingRequest.id, PendingRequest.expires_at).where(
+            PendingRequest.status == RequestStatus.PENDING
+        ),
+        "settled requests": select(PendingRequest.id)
+        .where(
+            PendingRequest.status.in_((RequestStatus.ACCEPTED, RequestStatus.DECLINED, RequestStatus.EXPIRED)),
+            PendingRequest.expires_at < now,
+        )
+        .limit(500),
+    }
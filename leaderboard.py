@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Sequence
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from activity import activity_buffer
+from bot.services.leaderboard_store import Boards
+from db import async_session
+from models import Clan, Group, User, UserGroup
+from repositories import leaderboard_boards, top_clans, top_groups, top_users_for_groups
+
+SECTION_LIMIT = 5
+GROUP_BATCH_SIZE = 500
+BOARD_PREFIX = "game:lb:"
+
+
+def render_top_users(rows: Sequence[tuple[User, UserGroup]]) -> str:
+    lines = ["🏆 Top Users:"]
+    for idx, (user, stats) in enumerate(rows, start=1):
+        name = user.username or user.first_name or "User"
+        msgs = stats.message_count + activity_buffer.pending_user_group_messages(user.id, stats.group_id)
+        lines.append(f"{idx}. {name} - {user.points}p, msgs {msgs}")
+    return "\n".join(lines)
+
+
+def render_global_sections(clans: Sequence[Clan], groups: Sequence[Group]) -> str:
+    lines = ["\n🏰 Top Clans:"]
+    for idx, clan in enumerate(clans, start=1):
+        lines.append(f"{idx}. {clan.name} - {clan.score}")
+    lines.append("\n🌍 Top Groups:")
+    for idx, group in enumerate(groups, start=1):
+        msgs = group.total_messages + activity_buffer.pending_group_messages(group.id)
+        lines.append(f"{idx}. {group.title} - {msgs} msgs")
+    return "\n".join(lines)
+
+
+@dataclass(frozen=True)
+class LeaderboardSnapshot:
+    global_sections: str
+    top_users: dict[int, list[tuple[User, UserGroup]]] = field(default_factory=dict)
+
+    def render(self, group_id: int) -> str:
+        return f"{render_top_users(self.top_users.get(group_id, []))}\n{self.global_sections}"
+
+
+async def build_snapshot(
+    session: AsyncSession, group_ids: Sequence[int], batch_size: int = GROUP_BATCH_SIZE
+) -> LeaderboardSnapshot:
+    # Clans and groups are global, so they are ranked and rendered once per cycle;
+    # only the per-group top users are fetched per group, in batches.
+    clans = await top_clans(session, limit=SECTION_LIMIT)
+    groups = await top_groups(session, limit=SECTION_LIMIT)
+    top_users: dict[int, list[tuple[User, UserGroup]]] = {}
+    for start in range(0, len(group_ids), batch_size):
+        batch = group_ids[start : start + batch_size]
+        top_users.update(await top_users_for_groups(session, batch, limit=SECTION_LIMIT))
+    return LeaderboardSnapshot(render_global_sections(clans, groups), top_users)
+
+
+async def load_boards() -> Boards:
+    async with async_session() as session:
+        return await leaderboard_boards(session)
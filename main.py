@@ -4,9 +4,16 @@ from datetime import datetime
 from aiogram import Bot, Dispatcher
 from aiogram.enums import ParseMode
 
+from activity import activity_buffer
+from bot.services.leaderboard_store import leaderboards as leaderboard_store
+from bot.services.outbound import outbound
+from bot.utils.redis_pool import RedisPool
 from config import get_settings
-from db import init_db
+from consent import consent
+from db import init_db, shutdown_db
+from expiry import request_expiry
 from handlers import basic, clans, gifts, leaderboards, relationships, social, stats
+from leaderboard import BOARD_PREFIX, load_boards
 from scheduler import leaderboard_scheduler
 
 
@@ -15,6 +22,10 @@ async def main():
     bot = Bot(settings.token, parse_mode=ParseMode.HTML)
     bot["start_time"] = datetime.utcnow()
     await init_db()
+    # Consent claims and leaderboards share one client and skip Redis while its breaker is open.
+    redis_pool = RedisPool(settings.redis_url)
+    consent.configure(settings.signed_requests, settings.callback_secret or settings.token, redis_pool)
+    await leaderboard_store.start(load_boards, settings.redis_url, prefix=BOARD_PREFIX, pool=redis_pool)
     dp = Dispatcher()
     dp.include_router(social.router)
     dp.include_router(stats.router)
@@ -24,7 +35,18 @@ async def main():
     dp.include_router(gifts.router)
     dp.include_router(basic.router)
     asyncio.create_task(leaderboard_scheduler(bot))
-    await dp.start_polling(bot)
+    activity_buffer.start()
+    outbound.start(bot)
+    await request_expiry.start()
+    try:
+        await dp.start_polling(bot)
+    finally:
+        await request_expiry.stop()
+        await outbound.stop()
+        await activity_buffer.stop()
+        await leaderboard_store.stop()
+        await redis_pool.close()
+        await shutdown_db()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+
+from bot.db.explain import check_plans, format_plans
+from bot.services.leaderboard_store import leaderboards
+from config import get_settings
+from db import async_session, init_db, shutdown_db
+from hot_queries import hot_queries
+from leaderboard import BOARD_PREFIX, load_boards
+from repositories import GIFT_STATS_BATCH, STREAK_BACKFILL_BATCH, backfill_streaks, rebuild_gift_stats
+
+
+async def _backfill_streaks(args: argparse.Namespace) -> None:
+    async with async_session() as session:
+        updated = await backfill_streaks(session, batch_size=args.batch_size)
+    print(f"Backfilled streaks for {updated} users.")
+
+
+async def _rebuild_gift_stats(args: argparse.Namespace) -> None:
+    async with async_session() as session:
+        rebuilt = await rebuild_gift_stats(session, batch_size=args.batch_size)
+    print(f"Rebuilt gift statistics for {rebuilt} users.")
+    if get_settings().redis_url:
+        print("Run rebuild-leaderboards to refresh the /topgifted board in Redis.")
+
+
+async def _rebuild_leaderboards(args: argparse.Namespace) -> None:
+    redis_url = get_settings().redis_url
+    if not redis_url:
+        print("REDIS_URL is not set; leaderboards are loaded into memory when the bot starts.")
+        return
+    leaderboards.redis_url, leaderboards.prefix = redis_url, BOARD_PREFIX
+    boards = await leaderboards.rebuild(load_boards)
+    print(f"Rebuilt {boards} leaderboards in Redis.")
+
+
+async def _explain(args: argparse.Namespace) -> None:
+    async with async_session() as session:
+        conn = await session.connection()
+        plans = await conn.run_sync(check_plans, hot_queries())
+    print(format_plans(plans))
+    if any(plan.full_scans for plan in plans):
+        raise SystemExit(1)
+
+
+async def _run(args: argparse.Namespace) -> None:
+    await init_db()
+    try:
+        await args.handler(args)
+    finally:
+        await shutdown_db()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Maintenance commands for the clan bot database.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    streaks = commands.add_parser("backfill-streaks", help="Recompute user streaks from daily_activity history.")
+    streaks.add_argument("--batch-size", type=int, default=STREAK_BACKFILL_BATCH)
+    streaks.set_defaults(handler=_backfill_streaks)
+
+    gift_stats = commands.add_parser("rebuild-gift-stats", help="Recompute gift counters and totals from gift history.")
+    gift_stats.add_argument("--batch-size", type=int, default=GIFT_STATS_BATCH)
+    gift_stats.set_defaults(handler=_rebuild_gift_stats)
+
+    boards = commands.add_parser("rebuild-leaderboards", help="Reload the Redis leaderboards from the database.")
+    boards.set_defaults(handler=_rebuild_leaderboards)
+
+    explain = commands.add_parser("explain", help="Print query plans for the hot queries; exits 1 on full scans.")
+    explain.set_defaults(handler=_explain)
+
+    asyncio.run(_run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
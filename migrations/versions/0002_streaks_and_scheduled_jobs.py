@@ -0,0 +1,53 @@
+"""streaks and scheduled jobs
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 03:12:47.905163
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Databases created with create_all before migrations existed may already have these.
+    inspector = sa.inspect(op.get_bind())
+    user_columns = {column['name'] for column in inspector.get_columns('users')}
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        if 'current_streak' not in user_columns:
+            batch_op.add_column(sa.Column('current_streak', sa.Integer(), server_default='0', nullable=False))
+        if 'longest_streak' not in user_columns:
+            batch_op.add_column(sa.Column('longest_streak', sa.Integer(), server_default='0', nullable=False))
+        if 'last_active_day' not in user_columns:
+            batch_op.add_column(sa.Column('last_active_day', sa.Date(), nullable=True))
+
+    if not inspector.has_table('scheduled_jobs'):
+        op.create_table('scheduled_jobs',
+        sa.Column('chat_id', sa.BigInteger(), nullable=False),
+        sa.Column('job_type', sa.String(), nullable=False),
+        sa.Column('enabled', sa.Boolean(), nullable=False),
+        sa.Column('last_run_at', sa.DateTime(), nullable=True),
+        sa.Column('next_run_at', sa.DateTime(), nullable=True),
+        sa.Column('locked_by', sa.String(), nullable=True),
+        sa.Column('locked_until', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('chat_id')
+        )
+        op.create_index('ix_scheduled_jobs_due', 'scheduled_jobs', ['job_type', 'enabled', 'next_run_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_scheduled_jobs_due', table_name='scheduled_jobs')
+    op.drop_table('scheduled_jobs')
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_column('last_active_day')
+        batch_op.drop_column('longest_streak')
+        batch_op.drop_column('current_streak')
@@ -0,0 +1,40 @@
+"""hot path indexes
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 03:20:11.418275
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Leaderboard ORDER BY columns.
+    op.create_index('ix_users_points', 'users', ['points'])
+    op.create_index('ix_clans_score', 'clans', ['score'])
+    op.create_index('ix_groups_total_messages', 'groups', ['total_messages'])
+    # Per-group member lists; uq_user_group leads with user_id and cannot serve these.
+    op.create_index('ix_user_groups_group_id', 'user_groups', ['group_id'])
+    # daily_activity(user_id, day) is already covered by uq_user_day.
+    op.create_index('ix_gift_history_sender_created', 'gift_history', ['sender_id', 'created_at'])
+    op.create_index('ix_gift_history_receiver_created', 'gift_history', ['receiver_id', 'created_at'])
+    op.create_index('ix_pending_requests_status_expires', 'pending_requests', ['status', 'expires_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_pending_requests_status_expires', table_name='pending_requests')
+    op.drop_index('ix_gift_history_receiver_created', table_name='gift_history')
+    op.drop_index('ix_gift_history_sender_created', table_name='gift_history')
+    op.drop_index('ix_user_groups_group_id', table_name='user_groups')
+    op.drop_index('ix_groups_total_messages', table_name='groups')
+    op.drop_index('ix_clans_score', table_name='clans')
+    op.drop_index('ix_users_points', table_name='users')
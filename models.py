@@ -4,12 +4,14 @@ import enum
 from datetime import datetime
 
 from sqlalchemy import (
+    BigInteger,
     Boolean,
     Column,
     Date,
     DateTime,
     Enum,
     ForeignKey,
+    Index,
     Integer,
     String,
     UniqueConstraint,
@@ -52,8 +54,11 @@ class User(Base):
     username = Column(String, nullable=True)
     first_name = Column(String, nullable=True)
     last_name = Column(String, nullable=True)
-    points = Column(Integer, default=0, nullable=False)
+    points = Column(Integer, default=0, nullable=False, index=True)
     total_messages = Column(Integer, default=0, nullable=False)
+    current_streak = Column(Integer, default=0, nullable=False)
+    longest_streak = Column(Integer, default=0, nullable=False)
+    last_active_day = Column(Date, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
 
     memberships = relationship("ClanMember", back_populates="user")
@@ -66,7 +71,7 @@ class Group(Base):
     telegram_id = Column(Integer, unique=True, nullable=False, index=True)
     title = Column(String, nullable=False)
     leaderboard_enabled = Column(Boolean, default=True, nullable=False)
-    total_messages = Column(Integer, default=0, nullable=False)
+    total_messages = Column(Integer, default=0, nullable=False, index=True)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
 
 
@@ -76,7 +81,7 @@ class UserGroup(Base):
 
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
-    group_id = Column(Integer, ForeignKey("groups.id", ondelete="CASCADE"), nullable=False)
+    group_id = Column(Integer, ForeignKey("groups.id", ondelete="CASCADE"), nullable=False, index=True)
     message_count = Column(Integer, default=0, nullable=False)
 
     user = relationship("User")
@@ -100,7 +105,7 @@ class Clan(Base):
     name = Column(String, unique=True, nullable=False)
     leader_id = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"))
     coleader_id = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
-    score = Column(Integer, default=0, nullable=False)
+    score = Column(Integer, default=0, nullable=False, index=True)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
 
     leader = relationship("User", foreign_keys=[leader_id])
@@ -146,6 +151,7 @@ class ClanWeeklyPoints(Base):
 
 class PendingRequest(Base):
     __tablename__ = "pending_requests"
+    __table_args__ = (Index("ix_pending_requests_status_expires", "status", "expires_at"),)
 
     id = Column(Integer, primary_key=True)
     requester_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
@@ -155,6 +161,9 @@ class PendingRequest(Base):
     status = Column(Enum(RequestStatus), default=RequestStatus.PENDING, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     expires_at = Column(DateTime, nullable=False)
+    # Where the Accept/Decline keyboard was posted, so expiry can retire it.
+    chat_id = Column(BigInteger)
+    message_id = Column(Integer)
 
 
 class Relationship(Base):
@@ -179,6 +188,10 @@ class Gift(Base):
 
 class GiftHistory(Base):
     __tablename__ = "gift_history"
+    __table_args__ = (
+        Index("ix_gift_history_sender_created", "sender_id", "created_at"),
+        Index("ix_gift_history_receiver_created", "receiver_id", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True)
     sender_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
@@ -188,6 +201,42 @@ class GiftHistory(Base):
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
 
 
+class GiftStat(Base):
+    __tablename__ = "gift_stats"
+    __table_args__ = (UniqueConstraint("user_id", "gift_key", name="uq_gift_stat_user_key"),)
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    gift_key = Column(String, ForeignKey("gifts.key"), nullable=False)
+    sent = Column(Integer, default=0, nullable=False)
+    received = Column(Integer, default=0, nullable=False)
+    sent_value = Column(Integer, default=0, nullable=False)
+    received_value = Column(Integer, default=0, nullable=False)
+
+
+class GiftTotal(Base):
+    __tablename__ = "gift_totals"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    sent = Column(Integer, default=0, nullable=False)
+    received = Column(Integer, default=0, nullable=False, index=True)
+    sent_value = Column(Integer, default=0, nullable=False)
+    received_value = Column(Integer, default=0, nullable=False)
+
+
+class ScheduledJob(Base):
+    __tablename__ = "scheduled_jobs"
+    __table_args__ = (Index("ix_scheduled_jobs_due", "job_type", "enabled", "next_run_at"),)
+
+    chat_id = Column(BigInteger, primary_key=True)
+    job_type = Column(String, nullable=False, default="leaderboard")
+    enabled = Column(Boolean, default=True, nullable=False)
+    last_run_at = Column(DateTime, nullable=True)
+    next_run_at = Column(DateTime, nullable=True)
+    locked_by = Column(String, nullable=True)
+    locked_until = Column(DateTime, nullable=True)
+
+
 __all__ = [
     "Base",
     "User",
@@ -206,4 +255,7 @@ __all__ = [
     "ClanRole",
     "Gift",
     "GiftHistory",
+    "GiftStat",
+    "GiftTotal",
+    "ScheduledJob",
 ]
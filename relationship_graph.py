@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+from typing import Callable, NamedTuple
+
+from sqlalchemy import Integer, cast, literal, null, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from bot.utils.identity_cache import MISSING, LRUCache
+from models import Relationship, RelationshipType
+
+GRAPH_CACHE_SIZE = 20_000
+FAMILY_DEPTH = 3
+MAX_FAMILY_DEPTH = 5
+MAX_FAMILY_MEMBERS = 100
+
+
+class Adjacency(NamedTuple):
+    lovers: tuple[int, ...] = ()
+    children: tuple[int, ...] = ()  # PARENT rows: this user is their parent
+    parents: tuple[int, ...] = ()  # CHILD rows: this user is their child
+
+
+EMPTY = Adjacency()
+# Which adjacency list a row of each type lands in.
+FIELDS = {RelationshipType.LOVER: "lovers", RelationshipType.PARENT: "children", RelationshipType.CHILD: "parents"}
+
+
+def _linked(adjacency: Adjacency, rel_type: RelationshipType, target_id: int, present: bool) -> Adjacency:
+    field = FIELDS[rel_type]
+    others = tuple(other for other in getattr(adjacency, field) if other != target_id)
+    return adjacency._replace(**{field: others + (target_id,) if present else others})
+
+
+class FamilyTree(NamedTuple):
+    ancestors: list[list[int]]  # parents first, then grandparents, ...
+    descendants: list[tuple[int, int]]  # (generation, user_id) in tree order
+    truncated: bool
+
+
+def family_query(root: int, depth: int):
+    # Typed anchor columns: Postgres wants both halves of the recursive CTE to agree.
+    family = select(
+        cast(literal(root), Integer).label("user_id"),
+        cast(literal(0), Integer).label("depth"),
+        cast(null(), Relationship.type.type).label("kind"),
+    ).cte("family", recursive=True)
+    family = family.union(
+        select(Relationship.target_id, family.c.depth + 1, Relationship.type)
+        .join(family, Relationship.user_id == family.c.user_id)
+        .where(
+            family.c.depth < depth,
+            Relationship.type.in_((RelationshipType.PARENT, RelationshipType.CHILD)),
+            # Ancestors keep climbing and descendants keep descending; no sideways steps.
+            or_(family.c.kind.is_(None), Relationship.type == family.c.kind),
+        )
+    )
+    # Every row of every user reached, so each one's adjacency can be cached whole.
+    return select(Relationship.user_id, Relationship.target_id, Relationship.type).where(
+        Relationship.user_id.in_(select(family.c.user_id))
+    )
+
+
+class RelationshipGraph:
+    """Per-user adjacency lists cached in an LRU and patched in place on commit.
+
+    A miss loads the whole neighbourhood a view needs with one recursive CTE, walking
+    up CHILD rows and down PARENT rows to the requested depth, so a family tree never
+    costs one query per generation.
+    """
+
+    def __init__(self, maxsize: int = GRAPH_CACHE_SIZE):
+        self._cache = LRUCache(maxsize)
+        self._writes = 0
+        self.loads = 0
+
+    def link(self, user_id: int, target_id: int, rel_type: RelationshipType, present: bool = True) -> None:
+        # Only cached users are patched; anyone else is loaded fresh on their next view.
+        self._writes += 1
+        adjacency = self._cache.get(user_id, MISSING)
+        if adjacency is not MISSING:
+            self._cache.set(user_id, _linked(adjacency, rel_type, target_id, present))
+
+    def clear(self) -> None:
+        self._writes += 1
+        self._cache.clear()
+
+    async def load(self, session: AsyncSession, root: int, depth: int) -> dict[int, Adjacency]:
+        self.loads += 1
+        writes = self._writes
+        result = await session.execute(family_query(root, depth))
+        loaded = {root: EMPTY}
+        for user_id, target_id, rel_type in result.all():
+            loaded[user_id] = _linked(loaded.get(user_id, EMPTY), rel_type, target_id, True)
+        # A link committed while the query ran may be missing from these rows.
+        if writes == self._writes:
+            for user_id, adjacency in loaded.items():
+                self._cache.set(user_id, adjacency)
+        return loaded
+
+    async def adjacency(self, session: AsyncSession, user_id: int) -> Adjacency:
+        adjacency = self._cache.get(user_id, MISSING)
+        if adjacency is MISSING:
+            adjacency = (await self.load(session, user_id, 0))[user_id]
+        return adjacency
+
+    async def lovers(self, session: AsyncSession, user_id: int) -> tuple[int, ...]:
+        return (await self.adjacency(session, user_id)).lovers
+
+    async def family(self, session: AsyncSession, root: int, depth: int = FAMILY_DEPTH) -> FamilyTree:
+        depth = max(1, min(depth, MAX_FAMILY_DEPTH))
+        tree = _walk(root, depth, lambda user_id: self._cache.get(user_id, None))
+        if tree is None:
+            loaded = await self.load(session, root, depth)
+            tree = _walk(root, depth, lambda user_id: loaded.get(user_id, EMPTY))
+        return tree
+
+    def stats(self) -> dict[str, int]:
+        return {**self._cache.stats(), "loads": self.loads}
+
+
+def _walk(root: int, depth: int, lookup: Callable[[int], Adjacency | None]) -> FamilyTree | None:
+    # Returns None as soon as a user within range is not cached.
+    seen = {root}
+    members = 0
+    truncated = False
+    ancestors: list[list[int]] = []
+    generation = [root]
+    for _ in range(depth):
+        parents = []
+        for user_id in generation:
+            adjacency = lookup(user_id)
+            if adjacency is None:
+                return None
+            for parent_id in adjacency.parents:
+                if parent_id in seen:
+                    continue
+                if members >= MAX_FAMILY_MEMBERS:
+                    truncated = True
+                    break
+                seen.add(parent_id)
+                parents.append(parent_id)
+                members += 1
+        if not parents:
+            break
+        ancestors.append(parents)
+        generation = parents
+    descendants: list[tuple[int, int]] = []
+    stack = [(1, child_id) for child_id in reversed(lookup(root).children)]
+    while stack:
+        level, user_id = stack.pop()
+        if user_id in seen:
+            continue
+        if members >= MAX_FAMILY_MEMBERS:
+            truncated = True
+            break
+        seen.add(user_id)
+        descendants.append((level, user_id))
+        members += 1
+        if level < depth:
+            adjacency = lookup(user_id)
+            if adjacency is None:
+                return None
+            stack.extend((level + 1, child_id) for child_id in reversed(adjacency.children))
+    return FamilyTree(ancestors, descendants, truncated)
+
+
+relationship_graph = RelationshipGraph()
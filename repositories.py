@@ -1,13 +1,21 @@
 from __future__ import annotations
 
+import heapq
+from collections import defaultdict
 from datetime import date, datetime, timedelta
-from typing import Iterable, Sequence
+from typing import AsyncIterator, Iterable, NamedTuple, Sequence
 
 from aiogram.types import Chat, User as TgUser
-from sqlalchemy import and_, delete, func, select, update
-from sqlalchemy.exc import IntegrityError
+from sqlalchemy import Row, and_, bindparam, case, delete, exists, func, literal, or_, select, true, tuple_, update
 from sqlalchemy.ext.asyncio import AsyncSession
-
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.orm.util import identity_key
+
+from bot.db.commit_hooks import on_commit
+from bot.services.leaderboard_store import Boards, leaderboards
+from bot.services.render_cache import render_cache
+from bot.utils.identity_cache import MISSING, IdentityCache, VersionedCache
+from gift_catalog import CatalogGift
 from models import (
     Clan,
     ClanMember,
@@ -17,49 +25,174 @@ from models import (
     DailyActivity,
     Gift,
     GiftHistory,
+    GiftStat,
+    GiftTotal,
     Group,
     PendingRequest,
     Relationship,
     RelationshipType,
     RequestStatus,
     RequestType,
+    ScheduledJob,
     User,
     UserGroup,
 )
-from utils import consecutive_streak
+from relationship_graph import relationship_graph
+from upserts import dialect_insert, upsert
+from utils import chunked, next_leaderboard_slot, streak_summary
+
+STREAK_BACKFILL_BATCH = 500
+REQUEST_PURGE_BATCH = 500
+SETTLED_STATUSES = (RequestStatus.ACCEPTED, RequestStatus.DECLINED, RequestStatus.EXPIRED)
+GIFT_STATS_BATCH = 1000
+GIFT_STATS_UPSERT_CHUNK = 500
+GIFT_COUNTERS = ("sent", "received", "sent_value", "received_value")
+LEADERBOARD_JOB = "leaderboard"
+
+# Keyset position in a gift history page: (created_at, id) of the last row shown.
+GiftCursor = tuple[datetime, int]
+
+USERS_BOARD = "users"
+CLANS_BOARD = "clans"
+GROUPS_BOARD = "groups"
+GIFTED_BOARD = "gifted"
+# Group boards rank by points, then messages; both are packed into one sorted-set score.
+# Scores are float64, exact only below 2**53, so messages get 22 bits and points the
+# rest: ranks stay exact for |points| < 2**30 and messages < 2**22, and saturate beyond.
+MESSAGE_SCALE = 2**22
+MAX_SCORED_POINTS = 2**30 - 1
+
+
+USER_CACHE_SIZE = 50_000
+GROUP_CACHE_SIZE = 10_000
+MEMBERSHIP_CACHE_SIZE = 100_000
+
+user_cache = IdentityCache(maxsize=USER_CACHE_SIZE)
+group_cache = IdentityCache(maxsize=GROUP_CACHE_SIZE)
+# user id -> Membership, or None for users known to have no clan.
+membership_cache = VersionedCache(maxsize=MEMBERSHIP_CACHE_SIZE)
+
+
+def _user_profile(user: TgUser) -> tuple:
+    return (user.username, user.first_name, user.last_name)
+
+
+def _remember(session: AsyncSession, cache: IdentityCache, key: int, db_id: int, profile: tuple) -> None:
+    # Only committed rows are cached, so a rolled back insert never leaks an id.
+    on_commit(session, lambda: cache.put(key, db_id, profile))
 
 
 async def get_or_create_user(session: AsyncSession, user: TgUser) -> User:
-    result = await session.execute(select(User).where(User.telegram_id == user.id))
-    db_user = result.scalar_one_or_none()
+    profile = _user_profile(user)
+    cached = user_cache.peek(user.id)
+    if cached:
+        db_user = await session.get(User, cached.db_id)
+        if db_user:
+            if cached.profile != profile:
+                db_user.username, db_user.first_name, db_user.last_name = profile
+                _remember(session, user_cache, user.id, db_user.id, profile)
+            return db_user
+        user_cache.invalidate(user.id)
+    return await _upsert_user(session, user)
+
+
+async def get_user_id(session: AsyncSession, user: TgUser) -> int:
+    profile = _user_profile(user)
+    cached = user_cache.get(user.id)
+    if not cached:
+        return (await _upsert_user(session, user)).id
+    if cached.profile != profile:
+        await session.execute(
+            update(User)
+            .where(User.id == cached.db_id)
+            .values(username=user.username, first_name=user.first_name, last_name=user.last_name)
+        )
+        _remember(session, user_cache, user.id, cached.db_id, profile)
+    return cached.db_id
+
+
+async def get_user_by_telegram_id(session: AsyncSession, telegram_id: int) -> User | None:
+    cached = user_cache.get(telegram_id)
+    if cached:
+        db_user = await session.get(User, cached.db_id)
+        if db_user:
+            return db_user
+    return await session.scalar(select(User).where(User.telegram_id == telegram_id))
+
+
+async def ensure_user_by_telegram_id(session: AsyncSession, telegram_id: int) -> User:
+    # For users known only by id (signed requests store no row); names fill in on their next message.
+    db_user = await get_user_by_telegram_id(session, telegram_id)
     if db_user:
-        db_user.username = user.username
-        db_user.first_name = user.first_name
-        db_user.last_name = user.last_name
         return db_user
-    db_user = User(
-        telegram_id=user.id,
-        username=user.username,
-        first_name=user.first_name,
-        last_name=user.last_name,
+    stmt = upsert(session, User, {"telegram_id": telegram_id}, "telegram_id", update=("telegram_id",))
+    result = await session.execute(stmt.returning(User), execution_options={"populate_existing": True})
+    db_user = result.scalar_one()
+    _remember(session, user_cache, telegram_id, db_user.id, (None, None, None))
+    return db_user
+
+
+async def _upsert_user(session: AsyncSession, user: TgUser) -> User:
+    stmt = upsert(
+        session,
+        User,
+        {
+            "telegram_id": user.id,
+            "username": user.username,
+            "first_name": user.first_name,
+            "last_name": user.last_name,
+        },
+        "telegram_id",
+        update=("username", "first_name", "last_name"),
     )
-    session.add(db_user)
-    await session.flush()
+    result = await session.execute(stmt.returning(User), execution_options={"populate_existing": True})
+    db_user = result.scalar_one()
+    _remember(session, user_cache, user.id, db_user.id, _user_profile(user))
     return db_user
 
 
 async def get_or_create_group(session: AsyncSession, chat: Chat) -> Group:
-    result = await session.execute(select(Group).where(Group.telegram_id == chat.id))
-    group = result.scalar_one_or_none()
-    if group:
-        group.title = chat.title or group.title
-        return group
-    group = Group(telegram_id=chat.id, title=chat.title or "Group")
-    session.add(group)
-    await session.flush()
+    cached = group_cache.peek(chat.id)
+    if cached:
+        group = await session.get(Group, cached.db_id)
+        if group:
+            if chat.title and cached.profile != (chat.title,):
+                group.title = chat.title
+                _remember(session, group_cache, chat.id, group.id, (chat.title,))
+            return group
+        group_cache.invalidate(chat.id)
+    return await _upsert_group(session, chat)
+
+
+async def get_group_id(session: AsyncSession, chat: Chat) -> int:
+    cached = group_cache.get(chat.id)
+    if not cached:
+        return (await _upsert_group(session, chat)).id
+    if chat.title and cached.profile != (chat.title,):
+        await session.execute(update(Group).where(Group.id == cached.db_id).values(title=chat.title))
+        _remember(session, group_cache, chat.id, cached.db_id, (chat.title,))
+    return cached.db_id
+
+
+async def _upsert_group(session: AsyncSession, chat: Chat) -> Group:
+    # An empty title keeps the stored one; the no-op update still returns the row.
+    stmt = upsert(
+        session,
+        Group,
+        {"telegram_id": chat.id, "title": chat.title or "Group"},
+        "telegram_id",
+        update=("title",) if chat.title else ("telegram_id",),
+    )
+    result = await session.execute(stmt.returning(Group), execution_options={"populate_existing": True})
+    group = result.scalar_one()
+    _remember(session, group_cache, chat.id, group.id, (group.title,))
     return group
 
 
+def identity_cache_stats() -> dict[str, dict[str, int]]:
+    return {"users": user_cache.stats(), "groups": group_cache.stats(), "memberships": membership_cache.stats()}
+
+
 async def ensure_participants(session: AsyncSession, actor: TgUser, chat: Chat, target: TgUser | None = None):
     user_db = await get_or_create_user(session, actor)
     group_db = await get_or_create_group(session, chat)
@@ -72,74 +205,215 @@ async def ensure_participants(session: AsyncSession, actor: TgUser, chat: Chat,
     return user_db, target_db, group_db
 
 
-async def ensure_user_group(session: AsyncSession, user: User, group: Group) -> UserGroup:
+async def ensure_user_group(session: AsyncSession, user: User, group: Group) -> None:
+    await session.execute(upsert(session, UserGroup, {"user_id": user.id, "group_id": group.id}, "uq_user_group"))
+
+
+def _sync_loaded(session: AsyncSession, model, attribute: str, values: dict[int, int]) -> None:
+    # Bulk UPDATEs skip the identity map; copy the returned values onto loaded rows.
+    for pk, value in values.items():
+        loaded = session.sync_session.identity_map.get(identity_key(model, pk))
+        if loaded is not None:
+            set_committed_value(loaded, attribute, value)
+
+
+async def apply_points(session: AsyncSession, changes: Iterable[tuple[int, int]]) -> dict[int, int]:
+    # Applies (user_id, delta) pairs to users, clan scores and weekly clan stats
+    # with one statement per table, returning the new balance of each user.
+    deltas: dict[int, int] = defaultdict(int)
+    weekly_gains: dict[int, int] = defaultdict(int)
+    for user_id, delta in changes:
+        deltas[user_id] += delta
+        weekly_gains[user_id] += max(delta, 0)
+    if not deltas:
+        return {}
     result = await session.execute(
-        select(UserGroup).where(UserGroup.user_id == user.id, UserGroup.group_id == group.id)
+        update(User)
+        .where(User.id.in_(deltas))
+        .values(points=User.points + case(deltas, value=User.id, else_=0))
+        .returning(User.id, User.points)
+        .execution_options(synchronize_session=False)
     )
-    ug = result.scalar_one_or_none()
-    if ug:
-        return ug
-    ug = UserGroup(user_id=user.id, group_id=group.id)
-    session.add(ug)
-    await session.flush()
-    return ug
+    balances = dict(result.all())
+    _sync_loaded(session, User, "points", balances)
+    _publish(session, USERS_BOARD, balances)
+    await publish_member_scores(session, balances)
+    clan_of = await _clan_ids(session, deltas)
+    if not clan_of:
+        return balances
+    clan_deltas: dict[int, int] = defaultdict(int)
+    for user_id, clan_id in clan_of.items():
+        clan_deltas[clan_id] += deltas[user_id]
+    scores = await session.execute(
+        update(Clan)
+        .where(Clan.id.in_(clan_deltas))
+        .values(score=Clan.score + case(clan_deltas, value=Clan.id, else_=0))
+        .returning(Clan.id, Clan.score)
+        .execution_options(synchronize_session=False)
+    )
+    clan_scores = dict(scores.all())
+    _sync_loaded(session, Clan, "score", clan_scores)
+    _publish(session, CLANS_BOARD, clan_scores)
+    await session.execute(
+        upsert(
+            session,
+            ClanWeeklyPoints,
+            [
+                {"clan_id": clan_id, "user_id": user_id, "weekly_points": weekly_gains[user_id]}
+                for user_id, clan_id in clan_of.items()
+            ],
+            "uq_weekly_clan_user",
+            increment=("weekly_points",),
+        )
+    )
+    return balances
 
 
-async def adjust_points(session: AsyncSession, user: User, delta: int) -> None:
-    user.points += delta
-    await session.flush()
-    membership = await session.execute(select(ClanMember).where(ClanMember.user_id == user.id))
-    member = membership.scalar_one_or_none()
-    if member:
-        clan = await session.get(Clan, member.clan_id)
-        if clan:
-            clan.score += delta
-            await session.flush()
-            weekly = await session.execute(
-                select(ClanWeeklyPoints).where(
-                    ClanWeeklyPoints.clan_id == clan.id, ClanWeeklyPoints.user_id == user.id
-                )
-            )
-            wp = weekly.scalar_one_or_none()
-            if not wp:
-                wp = ClanWeeklyPoints(clan_id=clan.id, user_id=user.id, weekly_points=0)
-                session.add(wp)
-            wp.weekly_points += max(delta, 0)
+def group_board(group_id: int) -> str:
+    return f"group:{group_id}"
 
 
-async def log_message(session: AsyncSession, user: User, group: Group) -> None:
-    await ensure_user_group(session, user, group)
-    user.total_messages += 1
-    group.total_messages += 1
-    await session.execute(
-        update(UserGroup)
-        .where(UserGroup.user_id == user.id, UserGroup.group_id == group.id)
-        .values(message_count=UserGroup.message_count + 1)
+def member_score(points: int, messages: int) -> int:
+    points = max(-MAX_SCORED_POINTS, min(points, MAX_SCORED_POINTS))
+    return points * MESSAGE_SCALE + min(messages, MESSAGE_SCALE - 1)
+
+
+def _publish(session: AsyncSession, board: str, scores: dict[int, int]) -> None:
+    # Boards double as render cache scopes, so every ranking change also retires cached replies.
+    if not scores:
+        return
+
+    def publish() -> None:
+        if leaderboards.enabled:
+            for member, score in scores.items():
+                leaderboards.set(board, member, score)
+        render_cache.bump(board)
+
+    on_commit(session, publish)
+
+
+async def publish_member_scores(
+    session: AsyncSession, user_ids: Iterable[int], group_ids: Iterable[int] | None = None
+) -> None:
+    # Re-reads the (points, messages) pairs so group boards get absolute, self-correcting scores.
+    if not leaderboards.enabled:
+        # Without the rows there is no telling which group boards moved.
+        on_commit(session, render_cache.clear)
+        return
+    stmt = (
+        select(UserGroup.group_id, UserGroup.user_id, User.points, UserGroup.message_count)
+        .join(User, User.id == UserGroup.user_id)
+        .where(UserGroup.user_id.in_(list(user_ids)))
     )
-    today = date.today()
-    result = await session.execute(
-        select(DailyActivity).where(DailyActivity.user_id == user.id, DailyActivity.day == today)
+    if group_ids is not None:
+        stmt = stmt.where(UserGroup.group_id.in_(list(group_ids)))
+    rows = (await session.execute(stmt)).all()
+
+    def publish() -> None:
+        for group_id, user_id, points, messages in rows:
+            leaderboards.set(group_board(group_id), user_id, member_score(points, messages))
+        render_cache.bump(*{group_board(group_id) for group_id, *_ in rows})
+
+    on_commit(session, publish)
+
+
+async def publish_group_totals(session: AsyncSession, group_ids: Iterable[int]) -> None:
+    if not leaderboards.enabled:
+        on_commit(session, lambda: render_cache.bump(GROUPS_BOARD))
+        return
+    result = await session.execute(select(Group.id, Group.total_messages).where(Group.id.in_(list(group_ids))))
+    _publish(session, GROUPS_BOARD, dict(result.all()))
+
+
+async def leaderboard_boards(session: AsyncSession) -> Boards:
+    boards: Boards = defaultdict(dict)
+    boards[USERS_BOARD] = dict((await session.execute(select(User.id, User.points))).all())
+    boards[CLANS_BOARD] = dict((await session.execute(select(Clan.id, Clan.score))).all())
+    boards[GROUPS_BOARD] = dict((await session.execute(select(Group.id, Group.total_messages))).all())
+    boards[GIFTED_BOARD] = dict((await session.execute(select(GiftTotal.user_id, GiftTotal.received))).all())
+    rows = await session.stream(
+        select(UserGroup.group_id, UserGroup.user_id, User.points, UserGroup.message_count).join(
+            User, User.id == UserGroup.user_id
+        )
+    )
+    async for group_id, user_id, points, messages in rows:
+        boards[group_board(group_id)][user_id] = member_score(points, messages)
+    return boards
+
+
+async def _ranked_rows(session: AsyncSession, model, ranked: list[tuple[int, float]]) -> list:
+    ids = [member for member, _ in ranked]
+    if not ids:
+        return []
+    rows = {row.id: row for row in (await session.execute(select(model).where(model.id.in_(ids)))).scalars()}
+    return [rows[member] for member in ids if member in rows]
+
+
+def streak_values(day, previous) -> dict:
+    # Streak columns after activity on ``day``; repeated days leave them unchanged.
+    already_counted = User.last_active_day >= day
+    current = case(
+        (already_counted, User.current_streak),
+        (User.last_active_day == previous, User.current_streak + 1),
+        else_=1,
     )
-    activity = result.scalar_one_or_none()
-    if not activity:
-        activity = DailyActivity(user_id=user.id, day=today, count=0)
-        session.add(activity)
-    activity.count += 1
+    return {
+        User.current_streak: current,
+        User.longest_streak: case((current > User.longest_streak, current), else_=User.longest_streak),
+        User.last_active_day: case((already_counted, User.last_active_day), else_=day),
+    }
 
 
 async def get_streak(session: AsyncSession, user: User) -> int:
-    thirty_days_ago = date.today() - timedelta(days=60)
-    result = await session.execute(
-        select(DailyActivity.day).where(DailyActivity.user_id == user.id, DailyActivity.day >= thirty_days_ago)
-    )
-    days = [row[0] for row in result.all()]
-    return consecutive_streak(days)
+    # As before the columns existed, only a streak that includes today counts.
+    if user.last_active_day == date.today():
+        return user.current_streak
+    return 0
+
+
+async def backfill_streaks(session: AsyncSession, batch_size: int = STREAK_BACKFILL_BATCH) -> int:
+    updated = 0
+    last_user_id = 0
+    while True:
+        result = await session.execute(
+            select(User.id).where(User.id > last_user_id).order_by(User.id).limit(batch_size)
+        )
+        user_ids = result.scalars().all()
+        if not user_ids:
+            return updated
+        last_user_id = user_ids[-1]
+        days_by_user: dict[int, list[date]] = {user_id: [] for user_id in user_ids}
+        activity = await session.stream(
+            select(DailyActivity.user_id, DailyActivity.day)
+            .where(DailyActivity.user_id.in_(user_ids))
+            .order_by(DailyActivity.user_id, DailyActivity.day)
+        )
+        async for user_id, day in activity:
+            days_by_user[user_id].append(day)
+        rows = []
+        for user_id, days in days_by_user.items():
+            current, longest, last = streak_summary(days)
+            rows.append({"b_id": user_id, "b_current": current, "b_longest": longest, "b_last": last})
+        users = User.__table__
+        await session.execute(
+            update(users)
+            .where(users.c.id == bindparam("b_id"))
+            .values(
+                current_streak=bindparam("b_current"),
+                longest_streak=bindparam("b_longest"),
+                last_active_day=bindparam("b_last"),
+            ),
+            rows,
+        )
+        await session.commit()
+        updated += len(rows)
 
 
 async def create_pending_request(
     session: AsyncSession, requester: User, target: User, group: Group, req_type: RequestType, ttl_seconds: int
-) -> PendingRequest:
-    await session.execute(
+) -> tuple[PendingRequest, list[Row]]:
+    # Returns the new request plus the (id, chat_id, message_id) of the ones it superseded.
+    result = await session.execute(
         update(PendingRequest)
         .where(
             PendingRequest.requester_id == requester.id,
@@ -148,7 +422,9 @@ async def create_pending_request(
             PendingRequest.status == RequestStatus.PENDING,
         )
         .values(status=RequestStatus.EXPIRED)
+        .returning(PendingRequest.id, PendingRequest.chat_id, PendingRequest.message_id)
     )
+    superseded = result.all()
     req = PendingRequest(
         requester_id=requester.id,
         target_id=target.id,
@@ -159,7 +435,60 @@ async def create_pending_request(
     )
     session.add(req)
     await session.flush()
-    return req
+    return req, superseded
+
+
+async def attach_request_message(
+    session: AsyncSession, request_id: int, chat_id: int, message_id: int
+) -> RequestStatus | None:
+    result = await session.execute(
+        update(PendingRequest)
+        .where(PendingRequest.id == request_id)
+        .values(chat_id=chat_id, message_id=message_id)
+        .returning(PendingRequest.status)
+    )
+    return result.scalar()
+
+
+async def pending_request_deadlines(session: AsyncSession) -> AsyncIterator[tuple[int, datetime]]:
+    rows = await session.stream(
+        select(PendingRequest.id, PendingRequest.expires_at).where(PendingRequest.status == RequestStatus.PENDING)
+    )
+    async for request_id, expires_at in rows:
+        yield request_id, expires_at
+
+
+async def expire_requests(session: AsyncSession, request_ids: Sequence[int], now: datetime | None = None) -> list[Row]:
+    # Guarded on status and deadline, so requests answered or re-armed meanwhile are left
+    # alone and only rows this call actually expired come back for their message edits.
+    if not request_ids:
+        return []
+    result = await session.execute(
+        update(PendingRequest)
+        .where(
+            PendingRequest.id.in_(request_ids),
+            PendingRequest.status == RequestStatus.PENDING,
+            PendingRequest.expires_at <= (now or datetime.utcnow()),
+        )
+        .values(status=RequestStatus.EXPIRED)
+        .returning(PendingRequest.id, PendingRequest.chat_id, PendingRequest.message_id)
+    )
+    return result.all()
+
+
+async def purge_settled_requests(session: AsyncSession, before: datetime, limit: int = REQUEST_PURGE_BATCH) -> int:
+    # Answered and expired rows only matter to a late button press, which reads as expired
+    # once they are gone; deletes at most ``limit`` of those whose deadline is before ``before``.
+    request_ids = (
+        await session.scalars(
+            select(PendingRequest.id)
+            .where(PendingRequest.status.in_(SETTLED_STATUSES), PendingRequest.expires_at < before)
+            .limit(limit)
+        )
+    ).all()
+    if request_ids:
+        await session.execute(delete(PendingRequest).where(PendingRequest.id.in_(request_ids)))
+    return len(request_ids)
 
 
 async def resolve_request(
@@ -176,39 +505,95 @@ async def resolve_request(
     return req
 
 
+def _relationship_rows(user: User, target: User, rel_type: RelationshipType) -> list[tuple[int, int, RelationshipType]]:
+    # Every link is stored from both ends, so either user's rows hold their whole neighbourhood.
+    if rel_type == RelationshipType.LOVER:
+        return [(user.id, target.id, rel_type), (target.id, user.id, rel_type)]
+    if rel_type == RelationshipType.PARENT:
+        return [(user.id, target.id, rel_type), (target.id, user.id, RelationshipType.CHILD)]
+    return [(user.id, target.id, rel_type)]
+
+
+def _sync_graph(session: AsyncSession, rows: list[tuple[int, int, RelationshipType]], present: bool) -> None:
+    def apply():
+        for user_id, target_id, rel_type in rows:
+            relationship_graph.link(user_id, target_id, rel_type, present)
+
+    on_commit(session, apply)
+
+
 async def set_relationship(session: AsyncSession, user: User, target: User, rel_type: RelationshipType) -> None:
-    try:
-        session.add(Relationship(user_id=user.id, target_id=target.id, type=rel_type))
-        if rel_type == RelationshipType.LOVER:
-            session.add(Relationship(user_id=target.id, target_id=user.id, type=rel_type))
-        elif rel_type == RelationshipType.PARENT:
-            session.add(Relationship(user_id=target.id, target_id=user.id, type=RelationshipType.CHILD))
-    except IntegrityError:
-        await session.rollback()
+    rows = _relationship_rows(user, target, rel_type)
+    await session.execute(
+        upsert(
+            session,
+            Relationship,
+            [{"user_id": user_id, "target_id": target_id, "type": row_type} for user_id, target_id, row_type in rows],
+            "uq_relationship",
+        )
+    )
+    _sync_graph(session, rows, True)
 
 
 async def remove_relationship(session: AsyncSession, user: User, target: User, rel_type: RelationshipType) -> None:
-    if rel_type == RelationshipType.LOVER:
-        await session.execute(
-            delete(Relationship).where(
-                and_(
-                    Relationship.type == rel_type,
-                    Relationship.user_id.in_([user.id, target.id]),
-                    Relationship.target_id.in_([user.id, target.id]),
+    rows = _relationship_rows(user, target, rel_type)
+    await session.execute(
+        delete(Relationship).where(
+            or_(
+                *(
+                    and_(Relationship.user_id == user_id, Relationship.target_id == target_id, Relationship.type == row_type)
+                    for user_id, target_id, row_type in rows
                 )
             )
         )
-    else:
-        await session.execute(
-            delete(Relationship).where(
-                Relationship.user_id == user.id, Relationship.target_id == target.id, Relationship.type == rel_type
-            )
-        )
+    )
+    _sync_graph(session, rows, False)
 
 
-async def get_membership(session: AsyncSession, user: User) -> ClanMember | None:
-    result = await session.execute(select(ClanMember).where(ClanMember.user_id == user.id))
-    return result.scalar_one_or_none()
+class Membership(NamedTuple):
+    clan_id: int
+    role: ClanRole
+
+
+def _remember_membership(session: AsyncSession, user_id: int, membership: Membership | None) -> None:
+    on_commit(session, lambda: membership_cache.commit(user_id, membership))
+
+
+async def get_membership(session: AsyncSession, user: User) -> Membership | None:
+    cached = membership_cache.get(user.id, MISSING)
+    if cached is not MISSING:
+        return cached
+    # A join or leave committing while this runs must win over what it read.
+    version = membership_cache.version
+    result = await session.execute(
+        select(ClanMember.clan_id, ClanMember.role).where(ClanMember.user_id == user.id)
+    )
+    row = result.first()
+    membership = Membership(*row) if row else None
+    membership_cache.fill(user.id, membership, version)
+    return membership
+
+
+async def _clan_ids(session: AsyncSession, user_ids: Iterable[int]) -> dict[int, int]:
+    clan_of: dict[int, int] = {}
+    missing = []
+    for user_id in user_ids:
+        cached = membership_cache.get(user_id, MISSING)
+        if cached is MISSING:
+            missing.append(user_id)
+        elif cached:
+            clan_of[user_id] = cached.clan_id
+    if missing:
+        version = membership_cache.version
+        result = await session.execute(
+            select(ClanMember.user_id, ClanMember.clan_id, ClanMember.role).where(ClanMember.user_id.in_(missing))
+        )
+        found = {user_id: Membership(clan_id, role) for user_id, clan_id, role in result.all()}
+        for user_id in missing:
+            membership_cache.fill(user_id, found.get(user_id), version)
+            if user_id in found:
+                clan_of[user_id] = found[user_id].clan_id
+    return clan_of
 
 
 async def create_clan(session: AsyncSession, name: str, leader: User) -> Clan:
@@ -218,6 +603,8 @@ async def create_clan(session: AsyncSession, name: str, leader: User) -> Clan:
     settings = ClanSettings(clan_id=clan.id, min_join_points=0)
     session.add(settings)
     session.add(ClanMember(clan_id=clan.id, user_id=leader.id, role=ClanRole.LEADER))
+    _remember_membership(session, leader.id, Membership(clan.id, ClanRole.LEADER))
+    _publish(session, CLANS_BOARD, {clan.id: clan.score})
     return clan
 
 
@@ -228,6 +615,8 @@ async def join_clan(session: AsyncSession, user: User, clan: Clan) -> bool:
     session.add(ClanMember(clan_id=clan.id, user_id=user.id, role=ClanRole.MEMBER))
     clan.score += user.points
     await session.flush()
+    _remember_membership(session, user.id, Membership(clan.id, ClanRole.MEMBER))
+    _publish(session, CLANS_BOARD, {clan.id: clan.score})
     return True
 
 
@@ -236,9 +625,11 @@ async def leave_clan(session: AsyncSession, user: User) -> None:
     if not membership:
         return
     clan = await session.get(Clan, membership.clan_id)
-    await session.execute(delete(ClanMember).where(ClanMember.id == membership.id))
+    await session.execute(delete(ClanMember).where(ClanMember.user_id == user.id))
+    _remember_membership(session, user.id, None)
     if clan:
         clan.score -= user.points
+        _publish(session, CLANS_BOARD, {clan.id: clan.score})
         if clan.leader_id == user.id:
             clan.leader_id = None
         if clan.coleader_id == user.id:
@@ -253,6 +644,7 @@ async def set_coleader(session: AsyncSession, clan: Clan, user: User | None) ->
     member_obj = member.scalar_one_or_none() if member else None
     if member_obj:
         member_obj.role = ClanRole.CO_LEADER
+        _remember_membership(session, user.id, Membership(clan.id, ClanRole.CO_LEADER))
 
 
 async def set_leader_cooldown(session: AsyncSession, clan: Clan, seconds: int = 30) -> bool:
@@ -267,56 +659,378 @@ async def set_leader_cooldown(session: AsyncSession, clan: Clan, seconds: int =
     return True
 
 
-async def top_users_for_group(session: AsyncSession, group: Group, limit: int = 10) -> list[tuple[User, UserGroup]]:
+async def top_users_for_group(session: AsyncSession, group_id: int, limit: int = 10) -> list[tuple[User, UserGroup]]:
+    ranked = await leaderboards.top(group_board(group_id), limit)
+    if ranked is not None:
+        return (await _ranked_members(session, {group_id: ranked}))[group_id]
     result = await session.execute(
         select(User, UserGroup)
         .join(UserGroup, UserGroup.user_id == User.id)
-        .where(UserGroup.group_id == group.id)
+        .where(UserGroup.group_id == group_id)
         .order_by(User.points.desc(), UserGroup.message_count.desc())
         .limit(limit)
     )
     return result.all()
 
 
+async def top_users_for_groups(
+    session: AsyncSession, group_ids: Sequence[int], limit: int = 5
+) -> dict[int, list[tuple[User, UserGroup]]]:
+    boards = await leaderboards.top_many([group_board(group_id) for group_id in group_ids], limit)
+    if boards is not None:
+        return await _ranked_members(
+            session, {group_id: boards[group_board(group_id)] for group_id in group_ids}
+        )
+    ranked = (
+        select(
+            UserGroup.id.label("user_group_id"),
+            func.row_number()
+            .over(
+                partition_by=UserGroup.group_id,
+                order_by=(User.points.desc(), UserGroup.message_count.desc(), User.id),
+            )
+            .label("position"),
+        )
+        .join(User, User.id == UserGroup.user_id)
+        .where(UserGroup.group_id.in_(group_ids))
+        .subquery()
+    )
+    result = await session.execute(
+        select(User, UserGroup)
+        .join(UserGroup, UserGroup.user_id == User.id)
+        .join(ranked, ranked.c.user_group_id == UserGroup.id)
+        .where(ranked.c.position <= limit)
+        .order_by(UserGroup.group_id, ranked.c.position)
+    )
+    top: dict[int, list[tuple[User, UserGroup]]] = {group_id: [] for group_id in group_ids}
+    for user, stats in result.all():
+        top[stats.group_id].append((user, stats))
+    return top
+
+
+async def _ranked_members(
+    session: AsyncSession, ranked: dict[int, list[tuple[int, float]]]
+) -> dict[int, list[tuple[User, UserGroup]]]:
+    user_ids = {user_id for members in ranked.values() for user_id, _ in members}
+    rows: dict[tuple[int, int], tuple[User, UserGroup]] = {}
+    if user_ids:
+        result = await session.execute(
+            select(User, UserGroup)
+            .join(UserGroup, UserGroup.user_id == User.id)
+            .where(UserGroup.group_id.in_(list(ranked)), UserGroup.user_id.in_(user_ids))
+        )
+        rows = {(stats.group_id, user.id): (user, stats) for user, stats in result.all()}
+    return {
+        group_id: [rows[(group_id, user_id)] for user_id, _ in members if (group_id, user_id) in rows]
+        for group_id, members in ranked.items()
+    }
+
+
+async def user_rank(session: AsyncSession, user: User, group: Group | None = None) -> tuple[int, int] | None:
+    # Returns (1-based position, ranked members); the sorted set answers in O(log n),
+    # SQL counting is only the fallback for members the board has not seen yet.
+    board = group_board(group.id) if group else USERS_BOARD
+    rank = await leaderboards.rank(board, user.id)
+    if rank is not None and rank.position is not None:
+        return rank.position + 1, rank.total
+    # Ties go to the smaller id, as in RankedSet and the top lists, so the position does not
+    # depend on which backend answered.
+    if group is None:
+        ahead = (
+            select(func.count())
+            .select_from(User)
+            .where((User.points > user.points) | ((User.points == user.points) & (User.id < user.id)))
+        )
+        total = select(func.count()).select_from(User)
+    else:
+        stats = await session.scalar(
+            select(UserGroup).where(UserGroup.user_id == user.id, UserGroup.group_id == group.id)
+        )
+        if stats is None:
+            return None
+        ahead = (
+            select(func.count())
+            .select_from(UserGroup)
+            .join(User, User.id == UserGroup.user_id)
+            .where(
+                UserGroup.group_id == group.id,
+                (User.points > user.points)
+                | ((User.points == user.points) & (UserGroup.message_count > stats.message_count))
+                | (
+                    (User.points == user.points)
+                    & (UserGroup.message_count == stats.message_count)
+                    & (User.id < user.id)
+                ),
+            )
+        )
+        total = select(func.count()).select_from(UserGroup).where(UserGroup.group_id == group.id)
+    return await session.scalar(ahead) + 1, await session.scalar(total)
+
+
 async def top_clans(session: AsyncSession, limit: int = 10) -> list[Clan]:
+    ranked = await leaderboards.top(CLANS_BOARD, limit)
+    if ranked is not None:
+        return await _ranked_rows(session, Clan, ranked)
     result = await session.execute(select(Clan).order_by(Clan.score.desc()).limit(limit))
     return result.scalars().all()
 
 
 async def top_groups(session: AsyncSession, limit: int = 5) -> list[Group]:
+    ranked = await leaderboards.top(GROUPS_BOARD, limit)
+    if ranked is not None:
+        return await _ranked_rows(session, Group, ranked)
     result = await session.execute(select(Group).order_by(Group.total_messages.desc()).limit(limit))
     return result.scalars().all()
 
 
-async def enabled_groups(session: AsyncSession) -> list[Group]:
-    result = await session.execute(select(Group).where(Group.leaderboard_enabled.is_(True)))
+async def enabled_groups(session: AsyncSession, telegram_ids: Iterable[int] | None = None) -> list[Group]:
+    stmt = select(Group).where(Group.leaderboard_enabled.is_(True))
+    if telegram_ids is not None:
+        stmt = stmt.where(Group.telegram_id.in_(list(telegram_ids)))
+    result = await session.execute(stmt)
     return result.scalars().all()
 
 
 async def set_group_leaderboard(session: AsyncSession, group: Group, enabled: bool) -> None:
     group.leaderboard_enabled = enabled
+    # Re-enabling starts from the next slot instead of replaying missed ones.
+    values = {
+        "chat_id": group.telegram_id,
+        "job_type": LEADERBOARD_JOB,
+        "enabled": enabled,
+        "next_run_at": next_leaderboard_slot(),
+    }
+    update_columns = ("enabled", "next_run_at") if enabled else ("enabled",)
+    await session.execute(upsert(session, ScheduledJob, values, "chat_id", update=update_columns))
+
+
+async def disable_leaderboards(session: AsyncSession, telegram_ids: Iterable[int]) -> int:
+    telegram_ids = list(telegram_ids)
+    if not telegram_ids:
+        return 0
+    result = await session.execute(
+        update(Group)
+        .where(Group.telegram_id.in_(telegram_ids), Group.leaderboard_enabled.is_(True))
+        .values(leaderboard_enabled=False)
+        .execution_options(synchronize_session=False)
+    )
+    await session.execute(
+        update(ScheduledJob)
+        .where(ScheduledJob.chat_id.in_(telegram_ids))
+        .values(enabled=False)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount
 
 
-async def get_gift(session: AsyncSession, key: str) -> Gift | None:
-    return await session.get(Gift, key)
+async def sync_leaderboard_jobs(session: AsyncSession, next_run_at: datetime) -> None:
+    # Groups start with leaderboards on, so any enabled group without a job row gets one.
+    missing = select(
+        Group.telegram_id, literal(LEADERBOARD_JOB), true(), literal(next_run_at, ScheduledJob.next_run_at.type)
+    ).where(
+        Group.leaderboard_enabled.is_(True),
+        ~exists().where(ScheduledJob.chat_id == Group.telegram_id),
+    )
+    stmt = dialect_insert(session, ScheduledJob).from_select(
+        ["chat_id", "job_type", "enabled", "next_run_at"], missing
+    )
+    await session.execute(stmt.on_conflict_do_nothing(index_elements=["chat_id"]))
+
+
+def _claimable(now: datetime, job_type: str):
+    return and_(
+        ScheduledJob.job_type == job_type,
+        ScheduledJob.enabled.is_(True),
+        ScheduledJob.next_run_at <= now,
+        ScheduledJob.locked_until.is_(None) | (ScheduledJob.locked_until < now),
+    )
+
+
+async def claim_due_jobs(
+    session: AsyncSession,
+    worker: str,
+    now: datetime,
+    lease: timedelta,
+    job_type: str = LEADERBOARD_JOB,
+    limit: int = 500,
+) -> list[int]:
+    # One statement claims the batch: PostgreSQL skips rows another worker has locked,
+    # SQLite serialises writers so the subquery and the UPDATE cannot interleave.
+    due = select(ScheduledJob.chat_id).where(_claimable(now, job_type)).order_by(ScheduledJob.next_run_at).limit(limit)
+    if session.get_bind().dialect.name == "postgresql":
+        due = due.with_for_update(skip_locked=True)
+    result = await session.execute(
+        update(ScheduledJob)
+        .where(ScheduledJob.chat_id.in_(due.scalar_subquery()), _claimable(now, job_type))
+        .values(locked_by=worker, locked_until=now + lease)
+        .returning(ScheduledJob.chat_id)
+        .execution_options(synchronize_session=False)
+    )
+    return list(result.scalars())
+
+
+async def complete_jobs(
+    session: AsyncSession, worker: str, chat_ids: Iterable[int], ran_at: datetime, next_run_at: datetime
+) -> None:
+    await session.execute(
+        update(ScheduledJob)
+        .where(ScheduledJob.chat_id.in_(list(chat_ids)), ScheduledJob.locked_by == worker)
+        .values(last_run_at=ran_at, next_run_at=next_run_at, locked_by=None, locked_until=None)
+        .execution_options(synchronize_session=False)
+    )
 
 
 async def record_gift(
-    session: AsyncSession, sender: User, receiver: User, gift: Gift, group: Group | None
+    session: AsyncSession, sender: User, receiver: User, gift: CatalogGift, group: Group | None
 ) -> GiftHistory:
     entry = GiftHistory(sender_id=sender.id, receiver_id=receiver.id, gift_key=gift.key, group_id=group.id if group else None)
     session.add(entry)
+    stats: dict[tuple[int, str], dict[str, int]] = {}
+    _count_gift(stats, sender.id, receiver.id, gift.key, gift.price)
+    await _add_gift_stats(session, stats)
     return entry
 
 
-async def gift_history(session: AsyncSession, user: User, limit: int = 10) -> Sequence[GiftHistory]:
+def _count_gift(
+    stats: dict[tuple[int, str], dict[str, int]], sender_id: int, receiver_id: int, gift_key: str, value: int
+) -> None:
+    for user_id, side in ((sender_id, "sent"), (receiver_id, "received")):
+        counters = stats.setdefault((user_id, gift_key), dict.fromkeys(GIFT_COUNTERS, 0))
+        counters[side] += 1
+        counters[f"{side}_value"] += value
+
+
+async def _add_gift_stats(session: AsyncSession, stats: dict[tuple[int, str], dict[str, int]]) -> None:
+    # Per-key rows and per-user totals are both bumped in place, so neither /topgifted
+    # nor the /stats summary ever has to aggregate gift_history.
+    totals: dict[int, dict[str, int]] = {}
+    rows = []
+    for (user_id, gift_key), counters in stats.items():
+        rows.append({"user_id": user_id, "gift_key": gift_key, **counters})
+        total = totals.setdefault(user_id, dict.fromkeys(GIFT_COUNTERS, 0))
+        for name, value in counters.items():
+            total[name] += value
+    for chunk in chunked(rows, GIFT_STATS_UPSERT_CHUNK):
+        await session.execute(upsert(session, GiftStat, chunk, "uq_gift_stat_user_key", increment=GIFT_COUNTERS))
+    received: dict[int, int] = {}
+    for chunk in chunked([{"user_id": user_id, **total} for user_id, total in totals.items()], GIFT_STATS_UPSERT_CHUNK):
+        result = await session.execute(
+            upsert(session, GiftTotal, chunk, "user_id", increment=GIFT_COUNTERS).returning(
+                GiftTotal.user_id, GiftTotal.received
+            )
+        )
+        received.update(result.all())
+    _publish(session, GIFTED_BOARD, received)
+
+
+async def rebuild_gift_stats(session: AsyncSession, batch_size: int = GIFT_STATS_BATCH) -> int:
+    # Users are rebuilt in id-ordered batches, one short transaction each: a batch's rows
+    # are replaced with totals recounted from its history, so readers see old or new
+    # totals but never empty ones, and a failure keeps the batches already committed.
+    # History does not record what a gift cost, so values are recomputed at today's prices.
+    prices = dict((await session.execute(select(Gift.key, Gift.price))).all())
+    rebuilt = 0
+    last_user_id = 0
+    while True:
+        result = await session.execute(
+            select(User.id).where(User.id > last_user_id).order_by(User.id).limit(batch_size)
+        )
+        user_ids = result.scalars().all()
+        if not user_ids:
+            return rebuilt
+        last_user_id = user_ids[-1]
+        batch = set(user_ids)
+        counted: dict[tuple[int, str], dict[str, int]] = {}
+        history = await session.stream(
+            select(GiftHistory.sender_id, GiftHistory.receiver_id, GiftHistory.gift_key).where(
+                GiftHistory.sender_id.in_(user_ids) | GiftHistory.receiver_id.in_(user_ids)
+            )
+        )
+        async for sender_id, receiver_id, gift_key in history:
+            _count_gift(counted, sender_id, receiver_id, gift_key, prices.get(gift_key, 0))
+        # A gift to or from a user outside the batch is counted when that user's batch runs.
+        stats = {key: counters for key, counters in counted.items() if key[0] in batch}
+        await session.execute(delete(GiftStat).where(GiftStat.user_id.in_(user_ids)))
+        await session.execute(delete(GiftTotal).where(GiftTotal.user_id.in_(user_ids)))
+        await _add_gift_stats(session, stats)
+        await session.commit()
+        rebuilt += len(user_ids)
+
+
+class GiftSummary(NamedTuple):
+    sent: int
+    received: int
+    sent_value: int
+    received_value: int
+    favourite: str | None  # gift key received most often
+
+
+async def gift_summary(session: AsyncSession, user_id: int) -> GiftSummary:
+    totals = await session.get(GiftTotal, user_id)
+    if totals is None:
+        return GiftSummary(0, 0, 0, 0, None)
+    favourite = await session.scalar(
+        select(GiftStat.gift_key)
+        .where(GiftStat.user_id == user_id, GiftStat.received > 0)
+        .order_by(GiftStat.received.desc(), GiftStat.gift_key)
+        .limit(1)
+    )
+    return GiftSummary(totals.sent, totals.received, totals.sent_value, totals.received_value, favourite)
+
+
+async def top_gifted(session: AsyncSession, limit: int = 10) -> list[tuple[User, GiftTotal]]:
+    ranked = await leaderboards.top(GIFTED_BOARD, limit)
+    if ranked is not None:
+        ids = [user_id for user_id, received in ranked if received > 0]
+        if not ids:
+            return []
+        result = await session.execute(
+            select(User, GiftTotal).join(GiftTotal, GiftTotal.user_id == User.id).where(User.id.in_(ids))
+        )
+        rows = {user.id: (user, totals) for user, totals in result.all()}
+        return [rows[user_id] for user_id in ids if user_id in rows]
     result = await session.execute(
-        select(GiftHistory)
-        .where((GiftHistory.sender_id == user.id) | (GiftHistory.receiver_id == user.id))
-        .order_by(GiftHistory.created_at.desc())
+        select(User, GiftTotal)
+        .join(GiftTotal, GiftTotal.user_id == User.id)
+        .where(GiftTotal.received > 0)
+        .order_by(GiftTotal.received.desc(), GiftTotal.user_id)
         .limit(limit)
     )
-    return result.scalars().all()
+    return result.all()
+
+
+def _gift_key(entry: GiftHistory) -> GiftCursor:
+    return entry.created_at, entry.id
+
+
+async def gift_history(
+    session: AsyncSession, user_id: int, limit: int = 10, before: GiftCursor | None = None
+) -> tuple[list[GiftHistory], GiftCursor | None]:
+    # Sent and received gifts are two range scans on their (user, created_at) indexes,
+    # merged in order; an OR of both has to sort every gift the user ever touched.
+    def side(column):
+        stmt = select(GiftHistory).where(column == user_id)
+        if before is not None:
+            stmt = stmt.where(tuple_(GiftHistory.created_at, GiftHistory.id) < tuple_(*before))
+        return stmt.order_by(GiftHistory.created_at.desc(), GiftHistory.id.desc()).limit(limit + 1)
+
+    sent = (await session.execute(side(GiftHistory.sender_id))).scalars().all()
+    received = (await session.execute(side(GiftHistory.receiver_id))).scalars().all()
+    page: list[GiftHistory] = []
+    for entry in heapq.merge(sent, received, key=_gift_key, reverse=True):
+        if page and page[-1] is entry:
+            continue
+        page.append(entry)
+        if len(page) > limit:
+            return page[:limit], _gift_key(page[limit - 1])
+    return page, None
+
+
+async def user_names(session: AsyncSession, user_ids: Iterable[int]) -> dict[int, str]:
+    result = await session.execute(
+        select(User.id, User.username, User.first_name).where(User.id.in_(set(user_ids)))
+    )
+    return {user_id: username or first_name or "User" for user_id, username, first_name in result.all()}
 
 
 async def update_clan_min_points(session: AsyncSession, clan: Clan, min_points: int) -> None:
@@ -360,5 +1074,19 @@ async def get_clan_settings(session: AsyncSession, clan: Clan) -> ClanSettings:
 
 
 async def get_user_group_stats(session: AsyncSession, user: User, group: Group) -> UserGroup:
-    return await ensure_user_group(session, user, group)
-
+    # A plain read in the common case; only a member's first lookup writes the row.
+    stats = await session.scalar(
+        select(UserGroup).where(UserGroup.user_id == user.id, UserGroup.group_id == group.id)
+    )
+    if stats is not None:
+        return stats
+    # Adding zero on conflict returns the row a concurrent first message may have inserted.
+    stmt = upsert(
+        session,
+        UserGroup,
+        {"user_id": user.id, "group_id": group.id, "message_count": 0},
+        "uq_user_group",
+        increment=("message_count",),
+    )
+    result = await session.execute(stmt.returning(UserGroup), execution_options={"populate_existing": True})
+    return result.scalar_one()
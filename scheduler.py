@@ -1,30 +1,88 @@
 from __future__ import annotations
 
 import asyncio
-from datetime import datetime
+import logging
+import os
+import socket
+from datetime import datetime, timedelta
+from typing import Iterable
 
 from aiogram import Bot
 
+from bot.services.outbound import outbound
+from broadcast import BroadcastReport, Broadcaster
 from db import async_session
-from handlers.leaderboards import build_leaderboard_text
-from repositories import enabled_groups
-from utils import italic
+from leaderboard import build_snapshot
+from repositories import (
+    claim_due_jobs,
+    complete_jobs,
+    disable_leaderboards,
+    enabled_groups,
+    sync_leaderboard_jobs,
+)
+from utils import italic, next_leaderboard_slot
 
-INTERVAL_SECONDS = 6 * 60 * 60
+TICK_SECONDS = 60
+JOB_SYNC_INTERVAL = timedelta(hours=1)
+CLAIM_BATCH = 500
+LEASE = timedelta(minutes=15)
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
 
+logger = logging.getLogger(__name__)
 
-async def post_leaderboards(bot: Bot):
+
+async def post_leaderboards(bot: Bot, chat_ids: Iterable[int] | None = None) -> BroadcastReport:
     async with async_session() as session:
-        groups = await enabled_groups(session)
-    for group in groups:
-        try:
-            text = await build_leaderboard_text(group.telegram_id)
-            await bot.send_message(group.telegram_id, italic(text))
-        except Exception:
-            continue
+        groups = await enabled_groups(session, chat_ids)
+        snapshot = await build_snapshot(session, [group.id for group in groups])
+    # Share the reply queue's global bucket so broadcasts and replies stay under one limit.
+    report = await Broadcaster(bot, bucket=outbound.bucket).send_all(
+        (group.telegram_id, italic(snapshot.render(group.id))) for group in groups
+    )
+    if report.unreachable:
+        async with async_session() as session:
+            disabled = await disable_leaderboards(session, report.unreachable)
+            await session.commit()
+        logger.info("Disabled leaderboards for %d unreachable groups", disabled)
+    logger.info("Leaderboard cycle: %s", report.summary())
+    return report
+
+
+async def sync_jobs() -> None:
+    # An anti-join over every group, so it runs at startup and hourly rather than every
+    # tick; /leaderboard_on writes its own job row and does not wait for it.
+    async with async_session() as session:
+        await sync_leaderboard_jobs(session, next_leaderboard_slot())
+        await session.commit()
+
+
+async def run_due_leaderboards(bot: Bot) -> int:
+    # Jobs are leased before posting and only advanced afterwards, so a crashed worker's
+    # batch is picked up again once its lease expires. The next run is always the first
+    # slot after now, which folds any slots missed during downtime into this one run.
+    posted = 0
+    while True:
+        now = datetime.utcnow()
+        async with async_session() as session:
+            chat_ids = await claim_due_jobs(session, WORKER_ID, now, LEASE, limit=CLAIM_BATCH)
+            await session.commit()
+        if not chat_ids:
+            return posted
+        await post_leaderboards(bot, chat_ids)
+        async with async_session() as session:
+            await complete_jobs(session, WORKER_ID, chat_ids, now, next_leaderboard_slot())
+            await session.commit()
+        posted += len(chat_ids)
 
 
 async def leaderboard_scheduler(bot: Bot):
+    synced_at: datetime | None = None
     while True:
-        await post_leaderboards(bot)
-        await asyncio.sleep(INTERVAL_SECONDS)
+        try:
+            if synced_at is None or datetime.utcnow() - synced_at >= JOB_SYNC_INTERVAL:
+                await sync_jobs()
+                synced_at = datetime.utcnow()
+            await run_due_leaderboards(bot)
+        except Exception:
+            logger.exception("Leaderboard scheduler tick failed")
+        await asyncio.sleep(TICK_SECONDS)
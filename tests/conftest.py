@@ -1,6 +1,41 @@
+import asyncio
+import os
 import sys
 from pathlib import Path
 
+import pytest
+
 ROOT = Path(__file__).resolve().parents[1]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
+# bot.config reads its settings at import time; tests never reach Telegram.
+os.environ.setdefault("BOT_TOKEN", "1:test")
+
+
+@pytest.fixture
+def memory_db():
+    """Runs ``scenario(sessions)`` against a fresh in-memory SQLite schema with cold caches."""
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    import repositories
+    from models import Base
+    from relationship_graph import relationship_graph
+
+    def run(scenario):
+        async def main():
+            engine = create_async_engine("sqlite+aiosqlite://")
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+            try:
+                return await scenario(async_sessionmaker(engine, expire_on_commit=False))
+            finally:
+                await engine.dispose()
+
+        return asyncio.run(main())
+
+    caches = (repositories.user_cache, repositories.group_cache, repositories.membership_cache, relationship_graph)
+    for cache in caches:
+        cache.clear()
+    yield run
+    for cache in caches:
+        cache.clear()
@@ -0,0 +1,103 @@
+from datetime import date
+
+import pytest
+from sqlalchemy import select
+
+import db
+from activity import ActivityBuffer
+from models import DailyActivity, Group, User, UserGroup
+
+D1, D2 = date(2024, 5, 1), date(2024, 5, 2)
+
+
+async def _seed(sessions):
+    async with sessions() as session:
+        session.add_all(User(id=i, telegram_id=100 + i) for i in (1, 2))
+        session.add_all(Group(id=i, telegram_id=-100 - i, title=f"g{i}") for i in (1, 2))
+        await session.commit()
+
+
+async def _counters(sessions):
+    async with sessions() as session:
+        users = dict((await session.execute(select(User.id, User.total_messages))).all())
+        groups = dict((await session.execute(select(Group.id, Group.total_messages))).all())
+        members = {
+            (row.user_id, row.group_id): row.message_count
+            for row in (await session.execute(select(UserGroup))).scalars()
+        }
+        daily = {(row.user_id, row.day): row.count for row in (await session.execute(select(DailyActivity))).scalars()}
+        streaks = dict((await session.execute(select(User.id, User.current_streak))).all())
+    return users, groups, members, daily, streaks
+
+
+def test_flush_writes_buffered_counts_and_adds_to_existing_rows(memory_db, monkeypatch):
+    async def scenario(sessions):
+        monkeypatch.setattr(db, "_sessionmaker", sessions)
+        await _seed(sessions)
+        buffer = ActivityBuffer()
+        for user_id, group_id, day in [(1, 1, D1), (1, 1, D1), (1, 2, D1), (2, 1, D1), (1, 1, D2)]:
+            buffer.record(user_id, group_id, day)
+        pending = (buffer.pending_user_messages(1), buffer.pending_group_messages(1), buffer.pending_user_group_messages(1, 1))
+        flushed = await buffer.flush()
+        released = (buffer.pending_user_messages(1), buffer.pending_group_messages(1))
+        empty = await buffer.flush()
+        first = await _counters(sessions)
+        buffer.record(1, 1, D2)
+        buffer.record(2, 2, D2)
+        await buffer.flush()
+        return pending, flushed, released, empty, first, await _counters(sessions)
+
+    pending, flushed, released, empty, first, second = memory_db(scenario)
+    assert pending == (4, 4, 3)
+    assert (flushed, released, empty) == (5, (0, 0), 0)
+    users, groups, members, daily, streaks = first
+    assert users == {1: 4, 2: 1}
+    assert groups == {1: 4, 2: 1}
+    assert members == {(1, 1): 3, (1, 2): 1, (2, 1): 1}
+    assert daily == {(1, D1): 3, (1, D2): 1, (2, D1): 1}
+    assert streaks == {1: 2, 2: 1}
+    users, groups, members, daily, streaks = second
+    assert users == {1: 5, 2: 2}
+    assert members == {(1, 1): 4, (1, 2): 1, (2, 1): 1, (2, 2): 1}
+    assert daily == {(1, D1): 3, (1, D2): 2, (2, D1): 1, (2, D2): 1}
+    # User 1 already counted D2; user 2 extends the run from D1.
+    assert streaks == {1: 2, 2: 2}
+
+
+def test_failed_flush_keeps_the_deltas_for_the_next_attempt(memory_db, monkeypatch):
+    async def scenario(sessions):
+        monkeypatch.setattr(db, "_sessionmaker", sessions)
+        await _seed(sessions)
+        buffer = ActivityBuffer()
+        buffer.record(1, 1, D1)
+        buffer.record(1, 1, D1)
+        write = buffer._write
+
+        async def fail(session, batch):
+            raise RuntimeError("database down")
+
+        buffer._write = fail
+        with pytest.raises(RuntimeError):
+            await buffer.flush()
+        kept = buffer.pending_user_group_messages(1, 1)
+        buffer.record(1, 1, D1)
+        buffer._write = write
+        flushed = await buffer.flush()
+        users, _, members, daily, _ = await _counters(sessions)
+        return kept, flushed, users, members, daily
+
+    kept, flushed, users, members, daily = memory_db(scenario)
+    assert kept == 2
+    assert flushed == 3
+    assert users[1] == 3
+    assert members == {(1, 1): 3}
+    assert daily == {(1, D1): 3}
+
+
+def test_record_wakes_the_flusher_when_the_buffer_is_full():
+    buffer = ActivityBuffer(max_pending=2)
+    buffer.record(1, 1, D1)
+    buffer.record(1, 1, D1)
+    assert not buffer._wake.is_set()
+    buffer.record(2, 1, D1)
+    assert buffer._wake.is_set()
@@ -0,0 +1,38 @@
+import asyncio
+import time
+
+from bot.services.antiflood_service import AntifloodService, FloodSettings
+from bot.utils.redis_pool import RedisPool
+
+
+class FakeClient:
+    def __init__(self, script):
+        self.script = script
+
+    def register_script(self, source):
+        return self.script
+
+
+def test_flagged_users_skip_redis_until_the_reset_time():
+    calls = []
+
+    async def script(keys, args):
+        calls.append(args[3])
+        hits = len(calls)
+        reset = int(time.time() * 1000) + 60_000 if hits > 2 else 0
+        return [hits, reset]
+
+    async def run():
+        pool = RedisPool(None)
+        pool.client = FakeClient(script)
+        service = AntifloodService(pool)
+        settings = FloodSettings(limit=2, window=10)
+        counts = [await service.hit(1, 7, settings) for _ in range(5)]
+        other = await service.hit(1, 8, settings)
+        return counts, other, service.stats()
+
+    counts, other, stats = asyncio.run(run())
+    assert counts == [1, 2, 3, 3, 3]
+    assert other == 4  # a different user still goes to Redis
+    assert len(set(calls)) == len(calls) == 4  # every hit sent a unique member
+    assert stats["short_circuited"] == 2
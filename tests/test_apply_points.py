@@ -0,0 +1,44 @@
+from sqlalchemy import select
+
+from models import Clan, ClanMember, ClanWeeklyPoints, User
+from repositories import apply_points
+
+
+async def _seed(sessions):
+    async with sessions() as session:
+        session.add_all(User(id=i, telegram_id=100 + i, points=10) for i in (1, 2, 3))
+        session.add(Clan(id=1, name="Red", leader_id=1, score=100))
+        session.add_all([ClanMember(clan_id=1, user_id=1), ClanMember(clan_id=1, user_id=2)])
+        session.add(ClanWeeklyPoints(clan_id=1, user_id=1, weekly_points=5))
+        await session.commit()
+
+
+def test_changes_are_merged_and_applied_to_users_clans_and_weekly_stats(memory_db):
+    async def scenario(sessions):
+        await _seed(sessions)
+        async with sessions() as session:
+            loaded = await session.get(User, 1)
+            balances = await apply_points(session, [(1, 4), (2, -3), (1, 2), (3, 7)])
+            seen_on_loaded = loaded.points
+            await session.commit()
+            points = dict((await session.execute(select(User.id, User.points))).all())
+            score = await session.scalar(select(Clan.score))
+            weekly = dict((await session.execute(select(ClanWeeklyPoints.user_id, ClanWeeklyPoints.weekly_points))).all())
+        return balances, seen_on_loaded, points, score, weekly
+
+    balances, seen_on_loaded, points, score, weekly = memory_db(scenario)
+    assert balances == {1: 16, 2: 7, 3: 17}
+    assert seen_on_loaded == 16
+    assert points == {1: 16, 2: 7, 3: 17}
+    # User 3 has no clan; losses move the clan score but never the weekly gains.
+    assert score == 100 + 6 - 3
+    assert weekly == {1: 11, 2: 0}
+
+
+def test_no_changes_issue_no_statements(memory_db):
+    async def scenario(sessions):
+        await _seed(sessions)
+        async with sessions() as session:
+            return await apply_points(session, []), session.in_transaction()
+
+    assert memory_db(scenario) == ({}, False)
@@ -0,0 +1,30 @@
+import asyncio
+
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session
+
+import bot.db.session  # noqa: F401 - both bots' session modules loaded, as in production
+import db  # noqa: F401
+from bot.db.commit_hooks import _run_commit_callbacks, on_commit
+
+
+def test_callbacks_run_once_after_commit_and_are_dropped_on_rollback():
+    calls = []
+
+    async def run():
+        engine = create_async_engine("sqlite+aiosqlite://")
+        sessions = async_sessionmaker(engine)
+        async with sessions() as session:
+            on_commit(session, lambda: calls.append("committed"))
+            await session.execute(text("select 1"))
+            await session.commit()
+            on_commit(session, lambda: calls.append("rolled back"))
+            await session.execute(text("select 1"))
+            await session.rollback()
+            await session.commit()
+        await engine.dispose()
+
+    asyncio.run(run())
+    assert calls == ["committed"]
+    assert event.contains(Session, "after_commit", _run_commit_callbacks)
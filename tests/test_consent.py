@@ -0,0 +1,69 @@
+import asyncio
+
+from bot.utils.signed_data import MAX_CALLBACK_BYTES, CallbackSigner
+from consent import ConsentTokens
+from models import RequestType
+
+
+def test_signer_round_trips_and_rejects_tampering():
+    signer = CallbackSigner(b"secret")
+    token = signer.sign("ks", (1, 123456789, 0, -5))
+    assert signer.verify(token) == ("ks", (1, 123456789, 0, -5))
+    prefix, fields = token.split(":")
+    assert signer.verify(f"{prefix}:{fields.replace('21i3v9', '21i3va', 1)}") is None
+    assert CallbackSigner(b"other").verify(token) is None
+    assert signer.verify("ks:1.2") is None
+
+
+def test_token_fits_callback_limit_and_is_claimed_once():
+    tokens = ConsentTokens()
+    tokens.configure(True, "bot-token")
+    token = tokens.issue("rs", RequestType.SON, 2**52, 2**52 - 1, ttl_seconds=300)
+    assert len(f"{token}:1".encode()) <= MAX_CALLBACK_BYTES
+    request = tokens.read(token)
+    assert request.type == RequestType.SON
+    assert (request.requester_id, request.target_id) == (2**52, 2**52 - 1)
+
+    async def claims():
+        return [await tokens.claim(request), await tokens.claim(request)]
+
+    assert asyncio.run(claims()) == [True, False]
+    assert tokens.stats()["replayed"] == 1
+
+
+def test_repeated_requests_in_the_same_second_are_claimed_separately(monkeypatch):
+    import consent
+
+    tokens = ConsentTokens()
+    tokens.configure(True, "bot-token")
+    monkeypatch.setattr(consent.time, "time", lambda: 1_700_000_000.0)
+    first = tokens.read(tokens.issue("ks", RequestType.KISS, 1, 2, ttl_seconds=300))
+    second = tokens.read(tokens.issue("ks", RequestType.KISS, 1, 2, ttl_seconds=300))
+    assert first.token != second.token
+
+    async def claims():
+        return [await tokens.claim(first), await tokens.claim(second), await tokens.claim(first)]
+
+    assert asyncio.run(claims()) == [True, True, False]
+
+
+def test_expired_token_is_refused():
+    tokens = ConsentTokens()
+    tokens.configure(True, "bot-token")
+    assert tokens.read(tokens.issue("ks", RequestType.KISS, 1, 2, ttl_seconds=-1)) is None
+
+
+def test_accepting_creates_a_requester_known_only_by_telegram_id(memory_db):
+    from repositories import ensure_user_by_telegram_id
+
+    async def scenario(sessions):
+        async with sessions() as session:
+            created = await ensure_user_by_telegram_id(session, 424242)
+            await session.commit()
+        async with sessions() as session:
+            again = await ensure_user_by_telegram_id(session, 424242)
+        return created, again
+
+    created, again = memory_db(scenario)
+    assert created.telegram_id == 424242
+    assert again.id == created.id
@@ -0,0 +1,45 @@
+import asyncio
+
+from bot.utils.flood_counter import MemoryFloodCounter
+
+
+def test_counts_hits_inside_the_window_and_saturates_past_the_limit():
+    counter = MemoryFloodCounter()
+    counts = [counter.hit("k", limit=3, window=10, now=t) for t in (0, 1, 2, 3, 4, 5)]
+    assert counts == [1, 2, 3, 4, 4, 4]
+    assert counter.hit("k", limit=3, window=10, now=14.5) == 2  # only 5 and 14.5 remain
+    assert counter.hit("k", limit=3, window=10, now=30) == 1
+
+
+def test_sweeper_drops_idle_keys_and_cap_evicts_least_recent():
+    counter = MemoryFloodCounter(max_keys=4, shards=1)
+    for key, now in (("a", 0), ("b", 1), ("c", 50), ("d", 51)):
+        counter.hit(key, limit=5, window=10, now=now)
+    assert counter.sweep_shard(0, now=55) == 2
+    assert counter.stats()["keys"] == 2
+    for key in ("e", "f", "g"):
+        counter.hit(key, limit=5, window=10, now=56)
+    stats = counter.stats()
+    assert (stats["keys"], stats["idle_evictions"], stats["cap_evictions"]) == (4, 2, 1)
+    assert counter.hit("c", limit=5, window=10, now=57) == 1  # "c" was the one evicted
+
+
+def test_sweeper_checks_each_key_against_its_own_window():
+    counter = MemoryFloodCounter(shards=1)
+    counter.hit("slow", limit=5, window=60, now=0)
+    counter.hit("fast", limit=5, window=5, now=1)
+    counter.hit("fresh", limit=5, window=5, now=18)
+    # "slow" is least recent but still live; it must not shield the idle "fast".
+    assert counter.sweep_shard(0, now=20) == 1
+    assert len(counter) == 2
+    assert counter.hit("slow", limit=5, window=60, now=20) == 2
+
+
+def test_sweep_visits_every_shard():
+    async def run():
+        counter = MemoryFloodCounter(shards=4)
+        for user in range(40):
+            counter.hit((1, user), limit=5, window=0.0, now=0)
+        return await counter.sweep(), len(counter)
+
+    assert asyncio.run(run()) == (40, 0)
@@ -0,0 +1,42 @@
+import asyncio
+import json
+
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+import gift_catalog
+from gift_catalog import GIFTS_FILE, CatalogGift, GiftCatalog, read_gift_file
+from models import Base
+
+
+def test_build_indexes_gifts_and_prerenders_reply():
+    catalog = GiftCatalog.build([CatalogGift("rose", "🌹", 200, 0), CatalogGift("diamond", "💎", 5000, 5)])
+    assert catalog.get("diamond").bonus_points == 5
+    assert catalog.get("tulip") is None
+    assert catalog.reply == "<i>Gifts:\nrose 🌹 - 200p\ndiamond 💎 - 5000p</i>"
+
+
+def test_shipped_gift_file_is_valid():
+    keys = [row["key"] for row in read_gift_file(GIFTS_FILE)]
+    assert len(keys) == len(set(keys)) == 10
+
+
+def test_reload_applies_price_changes(tmp_path):
+    path = tmp_path / "gifts.json"
+
+    async def run():
+        engine = create_async_engine("sqlite+aiosqlite://")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        sessions = async_sessionmaker(engine, expire_on_commit=False)
+        path.write_text(json.dumps([{"key": "rose", "emoji": "🌹", "price": 200, "bonus_points": 0}]))
+        async with sessions() as session:
+            await gift_catalog.reload_gifts(session, path)
+        path.write_text(json.dumps([{"key": "rose", "emoji": "🌹", "price": 250, "bonus_points": 1}]))
+        async with sessions() as session:
+            await gift_catalog.reload_gifts(session, path)
+        await engine.dispose()
+        return gift_catalog.gift_catalog()
+
+    catalog = asyncio.run(run())
+    assert len(catalog) == 1
+    assert catalog.get("rose") == CatalogGift("rose", "🌹", 250, 1)
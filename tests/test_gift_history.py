@@ -0,0 +1,43 @@
+from datetime import datetime, timedelta
+
+from handlers.gifts import _encode_cursor, _parse_history_data
+from models import GiftHistory
+from repositories import gift_history
+
+T = datetime(2024, 5, 1, 12, 0, 0, 250)
+
+
+def test_history_pages_merge_both_scans_and_round_trip_their_cursors(memory_db):
+    # (sender, receiver, seconds): ties on created_at, a self-gift and gifts between others.
+    gifts = [(1, 2, 0), (2, 1, 0), (1, 1, 5), (3, 1, 7), (2, 3, 8), (1, 3, 9), (3, 1, 9), (2, 1, 12)]
+
+    async def scenario(sessions):
+        async with sessions() as session:
+            session.add_all(
+                GiftHistory(id=i, sender_id=s, receiver_id=r, gift_key="rose", created_at=T + timedelta(seconds=sec))
+                for i, (s, r, sec) in enumerate(gifts, start=1)
+            )
+            await session.commit()
+        pages, cursor, data = [], None, f"gh:1:{_encode_cursor(None)}"
+        while data is not None:
+            owner_id, cursor = _parse_history_data(data)
+            async with sessions() as session:
+                entries, next_cursor = await gift_history(session, owner_id, limit=2, before=cursor)
+            pages.append([entry.id for entry in entries])
+            data = None if next_cursor is None else f"gh:1:{_encode_cursor(next_cursor)}"
+        return pages
+
+    pages = memory_db(scenario)
+    expected = sorted(
+        (i for i, (s, r, _) in enumerate(gifts, start=1) if 1 in (s, r)),
+        key=lambda i: (gifts[i - 1][2], i),
+        reverse=True,
+    )
+    assert [i for page in pages for i in page] == expected
+    assert all(len(page) == 2 for page in pages[:-1])
+
+
+def test_malformed_history_callbacks_are_rejected():
+    assert _parse_history_data("gh:7:0:0") == (7, None)
+    for data in ("gh:7", "gh:7:1", "gh:x:1:2", "gh:7:-1:2", "gh:7:1:2:3", "gh:7:" + "9" * 30 + ":1", "gh:7:²:1"):
+        assert _parse_history_data(data) is None
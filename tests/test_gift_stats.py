@@ -0,0 +1,65 @@
+import pytest
+from sqlalchemy import select
+
+import repositories
+from models import Gift, GiftHistory, GiftStat, GiftTotal, User
+from repositories import rebuild_gift_stats
+
+# (sender, receiver, gift): includes a self-gift and gifts across batch boundaries.
+GIFTS = [(1, 2, "rose"), (1, 2, "rose"), (2, 3, "diamond"), (3, 1, "rose"), (1, 1, "diamond")]
+
+
+async def _seed(sessions):
+    async with sessions() as session:
+        session.add_all(User(id=i, telegram_id=100 + i) for i in (1, 2, 3))
+        session.add_all([Gift(key="rose", emoji="🌹", price=10), Gift(key="diamond", emoji="💎", price=100)])
+        await session.flush()
+        session.add_all(GiftHistory(sender_id=s, receiver_id=r, gift_key=key) for s, r, key in GIFTS)
+        # Drifted counters the rebuild has to replace, not add to.
+        session.add_all([GiftTotal(user_id=2, sent=9, received=9, sent_value=9, received_value=9)])
+        session.add(GiftStat(user_id=2, gift_key="rose", sent=9, received=9, sent_value=9, received_value=9))
+        await session.commit()
+
+
+async def _totals(sessions):
+    async with sessions() as session:
+        rows = (await session.execute(select(GiftTotal).order_by(GiftTotal.user_id))).scalars()
+        return {row.user_id: (row.sent, row.received, row.sent_value, row.received_value) for row in rows}
+
+
+def test_rebuild_recounts_each_batch_of_users_from_history(memory_db):
+    async def scenario(sessions):
+        await _seed(sessions)
+        async with sessions() as session:
+            rebuilt = await rebuild_gift_stats(session, batch_size=1)
+        async with sessions() as session:
+            roses = dict((await session.execute(select(GiftStat.user_id, GiftStat.received).where(GiftStat.gift_key == "rose"))).all())
+        return rebuilt, await _totals(sessions), roses
+
+    rebuilt, totals, roses = memory_db(scenario)
+    assert rebuilt == 3
+    assert totals == {1: (3, 2, 120, 110), 2: (1, 2, 100, 20), 3: (1, 1, 10, 100)}
+    assert roses == {1: 1, 2: 2, 3: 0}
+
+
+def test_a_failed_batch_keeps_the_batches_already_committed(memory_db, monkeypatch):
+    add = repositories._add_gift_stats
+    calls = []
+
+    async def fail_on_second_batch(session, stats):
+        calls.append(1)
+        if len(calls) == 2:
+            raise RuntimeError("database down")
+        await add(session, stats)
+
+    async def scenario(sessions):
+        await _seed(sessions)
+        monkeypatch.setattr(repositories, "_add_gift_stats", fail_on_second_batch)
+        async with sessions() as session:
+            with pytest.raises(RuntimeError):
+                await rebuild_gift_stats(session, batch_size=1)
+        return await _totals(sessions)
+
+    totals = memory_db(scenario)
+    # User 1 is rebuilt; user 2 still has its old totals instead of none.
+    assert totals == {1: (3, 2, 120, 110), 2: (9, 9, 9, 9)}
@@ -0,0 +1,106 @@
+import asyncio
+
+from bot.services.group_settings import GroupSettings, GroupSettingsCache
+
+
+def _settings(limit: int) -> GroupSettings:
+    return GroupSettings(3, "mute", True, limit, 10, False, False, "")
+
+
+def test_reloads_only_on_miss_rename_invalidation_or_expiry():
+    async def run():
+        cache = GroupSettingsCache(ttl=60)
+        limits = iter(range(1, 10))
+
+        async def load():
+            return _settings(next(limits))
+
+        seen = [await cache.get(-1, "Chat", load), await cache.get(-1, "Chat", load)]
+        seen.append(await cache.get(-1, "Renamed", load))
+        cache.invalidate(-1)
+        seen.append(await cache.get(-1, "Renamed", load))
+        cache.ttl = 0
+        seen.append(await cache.get(-2, "Other", load))
+        seen.append(await cache.get(-2, "Other", load))
+        return [settings.flood_limit for settings in seen], cache.loads
+
+    assert asyncio.run(run()) == ([1, 1, 2, 3, 4, 5], 5)
+
+
+def test_load_racing_an_invalidation_is_not_cached():
+    async def run():
+        cache = GroupSettingsCache(ttl=60)
+
+        async def stale_load():
+            # A moderator's change commits and invalidates while the old row is in flight.
+            cache.invalidate(-1)
+            return _settings(1)
+
+        async def fresh_load():
+            return _settings(2)
+
+        seen = [await cache.get(-1, "Chat", stale_load), await cache.get(-1, "Chat", fresh_load)]
+        seen.append(await cache.get(-1, "Chat", fresh_load))
+        return [settings.flood_limit for settings in seen], cache.loads
+
+    assert asyncio.run(run()) == ([1, 2, 2], 2)
+
+
+def test_committed_update_invalidates_the_cached_settings():
+    from types import SimpleNamespace
+
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    from bot.db.session import Base
+    from bot.services import moderation_service
+    from bot.services.group_settings import group_settings_cache
+
+    chat = SimpleNamespace(id=-100, title="Chat", type="supergroup")
+
+    async def run():
+        engine = create_async_engine("sqlite+aiosqlite://")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        sessions = async_sessionmaker(engine, expire_on_commit=False)
+        group_settings_cache.clear()
+        async with sessions() as session:
+            before = await moderation_service.get_group_settings(session, chat)
+            await moderation_service.update_group_settings(session, chat, rules_text="Be kind")
+            after = await moderation_service.get_group_settings(session, chat)
+        await engine.dispose()
+        return before.rules_text, after.rules_text, group_settings_cache.loads
+
+    before, after, loads = asyncio.run(run())
+    assert (before, after) == ("", "Be kind")
+    assert loads == 2
+
+
+def test_ensure_group_skips_the_lookup_when_the_cache_is_warm():
+    from sqlalchemy import event
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    from bot.db import crud
+    from bot.db.session import Base
+
+    async def run():
+        engine = create_async_engine("sqlite+aiosqlite://")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        statements = []
+        event.listen(engine.sync_engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+        sessions = async_sessionmaker(engine, expire_on_commit=False)
+        crud.group_cache.clear()
+        counts = []
+        for title in ("Chat", "Chat", "Renamed"):
+            statements.clear()
+            async with sessions() as session:
+                await crud.ensure_group(session, -100, title)
+                await session.commit()
+            counts.append([statement.split()[0] for statement in statements])
+        await engine.dispose()
+        return counts
+
+    cold, warm, renamed = asyncio.run(run())
+    assert cold == ["SELECT", "INSERT"]
+    assert warm == []
+    assert renamed == ["UPDATE"]
@@ -0,0 +1,120 @@
+import asyncio
+
+from bot.utils.identity_cache import MISSING, IdentityCache, LRUCache, VersionedCache
+
+
+def test_hit_and_miss_counters():
+    cache = IdentityCache(maxsize=2)
+    assert cache.get(1) is None
+    cache.put(1, 10, ("alice",))
+    entry = cache.get(1)
+    assert entry.db_id == 10
+    assert entry.profile == ("alice",)
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_peek_counts_misses_but_not_hits():
+    cache = IdentityCache(maxsize=2)
+    assert cache.peek(1) is None
+    cache.put(1, 10, ())
+    assert cache.peek(1).db_id == 10
+    assert (cache.stats()["hits"], cache.stats()["misses"]) == (0, 1)
+
+
+def test_evicts_least_recently_used():
+    cache = IdentityCache(maxsize=2)
+    cache.put(1, 10, ())
+    cache.put(2, 20, ())
+    cache.get(1)
+    cache.put(3, 30, ())
+    assert cache.get(2) is None
+    assert cache.get(1) is not None
+    assert cache.stats()["evictions"] == 1
+    assert len(cache) == 2
+
+
+def test_lru_cache_can_hold_negative_entries():
+    cache = LRUCache(maxsize=4)
+    cache.set(7, None)
+    assert cache.get(7, MISSING) is None
+    assert cache.get(8, MISSING) is MISSING
+
+
+def test_versioned_cache_drops_fills_that_raced_a_commit():
+    cache = VersionedCache(maxsize=4)
+    version = cache.version
+    cache.commit(1, "joined")
+    cache.fill(1, "stale", version)
+    assert cache.get(1) == "joined"
+    cache.fill(2, "fresh", cache.version)
+    assert cache.get(2) == "fresh"
+    assert cache.stats()["dropped_fills"] == 1
+
+
+def test_membership_read_racing_a_join_keeps_the_join(memory_db):
+    import repositories
+    from models import Clan, User
+
+    async def scenario(sessions):
+        async with sessions() as session:
+            session.add_all([User(id=1, telegram_id=101), Clan(id=5, name="Wolves")])
+            await session.commit()
+        async with sessions() as reader, sessions() as writer:
+            user = await reader.get(User, 1)
+            execute = reader.execute
+
+            async def execute_then_join(*args, **kwargs):
+                # The reader has its (empty) answer; the join commits before it is cached.
+                result = await execute(*args, **kwargs)
+                await repositories.join_clan(writer, await writer.get(User, 1), await writer.get(Clan, 5))
+                await writer.commit()
+                return result
+
+            reader.execute = execute_then_join
+            seen = await repositories.get_membership(reader, user)
+            reader.execute = execute
+            cached = await repositories.get_membership(reader, user)
+        return seen, cached
+
+    seen, cached = memory_db(scenario)
+    assert seen is None
+    assert cached.clan_id == 5
+
+
+def test_kill_on_a_warm_cache_updates_counters_without_loading_rows():
+    from types import SimpleNamespace
+
+    from sqlalchemy import event, select
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    from bot.db import crud
+    from bot.db.models import User
+    from bot.db.session import Base
+
+    killer = SimpleNamespace(id=1, username="ann", first_name="Ann")
+    victim = SimpleNamespace(id=2, username="bob", first_name="Bob")
+
+    async def run():
+        engine = create_async_engine("sqlite+aiosqlite://")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        statements = []
+        event.listen(engine.sync_engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+        sessions = async_sessionmaker(engine, expire_on_commit=False)
+        crud.user_cache.clear()
+        for _ in range(2):
+            statements.clear()
+            async with sessions() as session:
+                await crud.increment_kill(session, killer, victim)
+                await session.commit()
+        warm = [statement.split()[0] for statement in statements]
+        async with sessions() as session:
+            rows = (await session.execute(select(User.username, User.kills, User.deaths).order_by(User.user_id))).all()
+        await engine.dispose()
+        crud.user_cache.clear()
+        return warm, [tuple(row) for row in rows]
+
+    warm, rows = asyncio.run(run())
+    assert warm == ["UPDATE", "UPDATE"]
+    assert rows == [("ann", 2, 0), ("bob", 0, 2)]
@@ -0,0 +1,48 @@
+from datetime import datetime, timedelta
+
+from utils import next_leaderboard_slot
+
+
+def test_next_slot_uses_kolkata_wall_clock():
+    # 06:00 IST is 00:30 UTC.
+    assert next_leaderboard_slot(datetime(2026, 1, 1, 0, 0)) == datetime(2026, 1, 1, 0, 30)
+    assert next_leaderboard_slot(datetime(2026, 1, 1, 0, 30)) == datetime(2026, 1, 1, 6, 30)
+
+
+def test_next_slot_rolls_over_midnight():
+    assert next_leaderboard_slot(datetime(2026, 1, 1, 18, 30)) == datetime(2026, 1, 2, 0, 30)
+
+
+def test_scheduler_syncs_job_rows_at_startup_and_then_hourly(monkeypatch):
+    import asyncio
+
+    import scheduler
+
+    calls = []
+    now = [datetime(2026, 1, 1, 0, 0)]
+
+    class Clock(datetime):
+        @classmethod
+        def utcnow(cls):
+            return now[0]
+
+    async def sync_jobs():
+        calls.append("sync")
+
+    async def run_due(bot):
+        calls.append("run")
+        now[0] += timedelta(minutes=25)
+
+    async def sleep(seconds):
+        if calls.count("run") == 4:
+            raise asyncio.CancelledError
+
+    monkeypatch.setattr(scheduler, "datetime", Clock)
+    monkeypatch.setattr(scheduler, "sync_jobs", sync_jobs)
+    monkeypatch.setattr(scheduler, "run_due_leaderboards", run_due)
+    monkeypatch.setattr(scheduler.asyncio, "sleep", sleep)
+    try:
+        asyncio.run(scheduler.leaderboard_scheduler(None))
+    except asyncio.CancelledError:
+        pass
+    assert calls == ["sync", "run", "run", "run", "sync", "run"]
@@ -0,0 +1,67 @@
+from sqlalchemy import event
+
+import repositories
+from bot.services.leaderboard_store import LeaderboardStore
+from leaderboard import build_snapshot
+from models import Clan, Group, User, UserGroup
+from repositories import leaderboard_boards
+
+
+async def _seed(sessions):
+    async with sessions() as session:
+        session.add_all(User(id=i, telegram_id=100 + i, username=f"u{i}", points=10 * max(i, 2)) for i in range(1, 8))
+        session.add_all(Group(id=i, telegram_id=-i, title=f"g{i}", total_messages=100 * i) for i in (1, 2, 3))
+        session.add_all(UserGroup(user_id=i, group_id=1, message_count=i) for i in range(1, 8))
+        # Users 1 and 2 tie on points in group 2, so messages decide.
+        session.add_all([UserGroup(user_id=1, group_id=2, message_count=3), UserGroup(user_id=2, group_id=2, message_count=9)])
+        session.add_all([Clan(id=1, name="Red", score=5), Clan(id=2, name="Blue", score=8)])
+        await session.commit()
+
+
+def _top(snapshot, group_id):
+    return [(user.id, stats.message_count) for user, stats in snapshot.top_users[group_id]]
+
+
+def test_snapshot_ranks_globals_once_and_users_per_group_in_batches(memory_db):
+    async def scenario(sessions):
+        await _seed(sessions)
+        statements = []
+        engine = sessions.kw["bind"].sync_engine
+        event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+        async with sessions() as session:
+            snapshot = await build_snapshot(session, [1, 2, 3], batch_size=2)
+        return snapshot, len(statements)
+
+    snapshot, statements = memory_db(scenario)
+    # Clans, groups, then one windowed query per batch of groups.
+    assert statements == 4
+    assert _top(snapshot, 1) == [(7, 7), (6, 6), (5, 5), (4, 4), (3, 3)]
+    assert _top(snapshot, 2) == [(2, 9), (1, 3)]
+    assert _top(snapshot, 3) == []
+    assert "🏰 Top Clans:\n1. Blue - 8\n2. Red - 5" in snapshot.global_sections
+    assert "1. g3 - 300 msgs" in snapshot.global_sections
+    # Every group's message reuses the same global block.
+    assert snapshot.render(1).endswith(snapshot.global_sections)
+    assert snapshot.render(3).startswith("🏆 Top Users:\n\n")
+
+
+def test_snapshot_from_the_in_memory_boards_matches_sql(memory_db, monkeypatch):
+    async def scenario(sessions):
+        await _seed(sessions)
+        async with sessions() as session:
+            from_sql = await build_snapshot(session, [1, 2, 3])
+        store = LeaderboardStore()
+        monkeypatch.setattr(repositories, "leaderboards", store)
+
+        async def load():
+            async with sessions() as session:
+                return await leaderboard_boards(session)
+
+        await store.rebuild(load)
+        async with sessions() as session:
+            from_boards = await build_snapshot(session, [1, 2, 3])
+        return from_sql, from_boards
+
+    from_sql, from_boards = memory_db(scenario)
+    assert from_boards.global_sections == from_sql.global_sections
+    assert all(_top(from_boards, group_id) == _top(from_sql, group_id) for group_id in (1, 2, 3))
@@ -0,0 +1,103 @@
+import asyncio
+
+from bot.services.leaderboard_store import LeaderboardStore
+from repositories import MAX_SCORED_POINTS, MESSAGE_SCALE, member_score
+
+
+def test_member_scores_survive_float64_and_keep_the_message_tie_break():
+    pairs = [(MAX_SCORED_POINTS, MESSAGE_SCALE - 1), (MAX_SCORED_POINTS, MESSAGE_SCALE - 2), (9_000_001, 5), (9_000_001, 4)]
+    pairs += [(-MAX_SCORED_POINTS, 0), (0, 0)]
+    scores = [member_score(points, messages) for points, messages in pairs]
+    assert all(float(score) == score for score in scores)  # what a Redis ZSET stores
+    assert sorted(pairs, reverse=True) == [pair for _, pair in sorted(zip(map(float, scores), pairs), reverse=True)]
+    # Beyond the bound points saturate instead of losing precision.
+    assert member_score(MAX_SCORED_POINTS + 10, 3) == member_score(MAX_SCORED_POINTS, 3)
+
+
+class FakeRedis:
+    def __init__(self):
+        self.zsets: dict[str, dict] = {}
+        self.strings: dict[str, object] = {}
+
+    def pipeline(self, transaction=False):
+        return FakePipeline(self)
+
+    async def set(self, key, value):
+        self.strings[key] = value
+
+    async def delete(self, key):
+        self.zsets.pop(key, None)
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis, self.ops = redis, []
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self.ops.append((name, args))
+
+    async def execute(self):
+        zsets = self.redis.zsets
+        for name, args in self.ops:
+            if name == "zadd":
+                zsets.setdefault(args[0], {}).update(args[1])
+            elif name == "delete":
+                zsets.pop(args[0], None)
+            elif name == "rename":
+                zsets[args[1]] = zsets.pop(args[0])
+        return [None] * len(self.ops)
+
+
+def test_writes_during_a_rebuild_are_held_and_replayed_after_the_swap():
+    async def run():
+        store = LeaderboardStore("redis://unused")
+        store._client = redis = FakeRedis()
+        store.set("users", 1, 10)  # committed before the load: part of the snapshot
+
+        async def loader():
+            store.set("users", 2, 99)  # commits while the snapshot is read
+            assert await store.flush() == 0  # held: the swap would overwrite it
+            return {"users": {1: 10, 2: 50}}
+
+        await store.rebuild(loader)
+        return redis.zsets["lb:users"], store.stats()
+
+    board, stats = asyncio.run(run())
+    assert board == {1: 10, 2: 99}
+    assert (stats["pending"], stats["stale"]) == (0, 0)
+
+
+def test_stale_boards_are_rebuilt_only_after_a_ping_and_with_backoff():
+    async def run():
+        store = LeaderboardStore("redis://unused")
+        store._client = redis = FakeRedis()
+        store._stale = True
+        loads, pings = [], []
+
+        async def ping():
+            pings.append(1)
+            if len(pings) == 1:
+                raise ConnectionError("redis down")
+
+        async def loader():
+            loads.append(1)
+            return {"users": {1: 10}}
+
+        redis.ping = ping
+        store._loader = loader
+        try:
+            await store._rebuild_stale()
+        except ConnectionError:
+            pass
+        delay = store._rebuild_delay
+        await store._rebuild_stale()  # still backing off: no ping, no load
+        attempts = (len(pings), len(loads))
+        store._rebuild_at = 0.0
+        await store._rebuild_stale()
+        return delay, attempts, (len(pings), len(loads)), store._rebuild_delay, store.stats()["stale"]
+
+    delay, attempts, after, reset, stale = asyncio.run(run())
+    assert delay > 0
+    assert attempts == (1, 0)
+    assert after == (2, 1)
+    assert (reset, stale) == (0.0, 0)
@@ -0,0 +1,39 @@
+import asyncio
+import time
+
+from bot.utils.rate_limit import MemoryLimiter
+
+
+def test_cooldowns_block_until_expiry_and_sweep_drops_only_due_keys():
+    async def run():
+        limiter = MemoryLimiter(shards=1)
+        first = [await limiter.hit("rob:1", 60), await limiter.hit("rob:1", 60)]
+        await limiter.hit("kill:1", 1)
+        remaining = await limiter.remaining("rob:1")
+        swept = limiter.sweep_shard(0, now=time.time() + 5)
+        return first, remaining, swept, limiter
+
+    first, remaining, swept, limiter = asyncio.run(run())
+    assert first == [True, False]
+    assert 59 < remaining <= 60
+    assert swept == 1
+    assert limiter.stats()["keys"] == 1
+    assert limiter.stats()["pending_expiries"] == 1
+
+
+def test_cap_evicts_least_recently_used_and_bounds_the_heap():
+    async def run():
+        limiter = MemoryLimiter(shards=1, max_keys=2)
+        await limiter.hit("a", 60)
+        await limiter.hit("b", 60)
+        await limiter.hit("a", 60)  # refused, but marks "a" as recently used
+        await limiter.hit("c", 60)
+        evicted_b = await limiter.hit("b", 60)
+        for i in range(20):
+            await limiter.hit(f"k{i}", 60)
+        return evicted_b, limiter.stats()
+
+    evicted_b, stats = asyncio.run(run())
+    assert evicted_b  # "b" was evicted, so its cooldown ended early
+    assert stats["keys"] == 2
+    assert stats["pending_expiries"] <= 4
@@ -0,0 +1,54 @@
+import asyncio
+
+from bot.services.outbound import OutboundQueue
+
+
+class FakeBot:
+    def __init__(self):
+        self.sent = []
+        self.edits = []
+
+    async def send_message(self, chat_id, text, **kwargs):
+        self.sent.append((chat_id, text))
+
+    async def edit_message_text(self, text, chat_id, message_id, **kwargs):
+        self.edits.append((chat_id, message_id, text))
+
+
+async def _drain(queue):
+    bot = FakeBot()
+    queue.start(bot, workers=2)
+    await queue.stop(timeout=1)
+    return bot
+
+
+def test_coalesces_pending_sends_to_same_chat():
+    async def run():
+        queue = OutboundQueue(group_interval=0.01, private_interval=0.01)
+        queue.send(-1, "a", coalesce=True)
+        queue.send(-1, "b", coalesce=True)
+        queue.send(-1, "c")
+        queue.send(2, "d", coalesce=True)
+        return await _drain(queue)
+
+    bot = asyncio.run(run())
+    assert [text for chat_id, text in bot.sent if chat_id == -1] == ["a\n\nb", "c"]
+    assert [text for chat_id, text in bot.sent if chat_id == 2] == ["d"]
+
+
+def test_latest_edit_replaces_pending_one():
+    class Msg:
+        class chat:
+            id = -5
+
+        message_id = 10
+
+    async def run():
+        queue = OutboundQueue(group_interval=0.01)
+        queue.send(-5, "first")
+        queue.edit_text(Msg, "one")
+        queue.edit_text(Msg, "two")
+        return await _drain(queue)
+
+    bot = asyncio.run(run())
+    assert bot.edits == [(-5, 10, "two")]
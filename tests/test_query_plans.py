@@ -0,0 +1,46 @@
+from alembic import command
+from alembic.script import ScriptDirectory
+from sqlalchemy import create_engine, inspect, text
+
+from bot.db.explain import check_plans, full_scans
+from bot.db.migrate import alembic_config, upgrade_schema
+from hot_queries import hot_queries
+
+
+def test_hot_queries_use_indexes_after_migration(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'game.db'}")
+    with engine.begin() as conn:
+        upgrade_schema(conn)
+        plans = check_plans(conn, hot_queries())
+    assert [plan.name for plan in plans if plan.full_scans] == []
+
+
+def test_check_flags_full_scans_before_index_revision(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'game.db'}")
+    with engine.begin() as conn:
+        command.upgrade(alembic_config(connection=conn), "0002")
+        queries = {name: query for name, query in hot_queries().items() if name in ("top users", "expired requests")}
+        plans = {plan.name: plan for plan in check_plans(conn, queries)}
+    assert plans["top users"].full_scans == ["users"]
+    assert plans["expired requests"].full_scans == ["pending_requests"]
+
+
+def test_existing_database_is_adopted_at_baseline(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'game.db'}")
+    with engine.begin() as conn:
+        command.upgrade(alembic_config(connection=conn), "0001")
+        conn.execute(text("DROP TABLE alembic_version"))
+        conn.execute(
+            text("INSERT INTO users (telegram_id, points, total_messages, created_at) VALUES (7, 5, 1, '2024-01-01')")
+        )
+    head = ScriptDirectory.from_config(alembic_config()).get_current_head()
+    with engine.begin() as conn:
+        upgrade_schema(conn)
+        assert conn.execute(text("SELECT version_num FROM alembic_version")).scalar() == head
+        assert conn.execute(text("SELECT current_streak FROM users")).scalar() == 0
+    assert "ix_users_points" in {index["name"] for index in inspect(engine).get_indexes("users")}
+
+
+def test_full_scan_patterns():
+    assert full_scans(["SCAN users", "SCAN clans USING INDEX ix_clans_score"], "sqlite") == ["users"]
+    assert full_scans(["Limit", "  ->  Seq Scan on groups  (cost=0.00..1.01)"], "postgresql") == ["groups"]
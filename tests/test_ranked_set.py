@@ -0,0 +1,33 @@
+import random
+
+from bot.utils.ranked_set import RankedSet
+
+
+def test_top_and_rank_follow_score_then_member():
+    ranked = RankedSet([(1, 5), (2, 7), (3, 5)])
+    assert ranked.top(10) == [(2, 7), (1, 5), (3, 5)]
+    assert ranked.rank(3) == 2
+    assert ranked.rank(99) is None
+    ranked.incr(3, 10)
+    assert ranked.top(1) == [(3, 15)]
+    ranked.remove(2)
+    assert ranked.top(10, offset=1) == [(1, 5)]
+
+
+def test_matches_sorted_reference_across_bucket_splits():
+    rng = random.Random(7)
+    ranked = RankedSet(bucket_size=4)
+    reference = {}
+    for _ in range(2000):
+        member = rng.randint(0, 120)
+        if rng.random() < 0.8:
+            score = rng.randint(-50, 50)
+            ranked.set(member, score)
+            reference[member] = score
+        else:
+            ranked.remove(member)
+            reference.pop(member, None)
+    expected = sorted(reference.items(), key=lambda item: (-item[1], item[0]))
+    assert ranked.top(len(expected)) == expected
+    assert ranked.top(5, offset=17) == expected[17:22]
+    assert all(ranked.rank(member) == index for index, (member, _) in enumerate(expected))
@@ -0,0 +1,96 @@
+import asyncio
+
+from bot.services.leaderboard_store import LeaderboardStore
+from bot.utils.rate_limit import RateLimiter
+from bot.utils.redis_pool import RedisPool
+from consent import ConsentTokens
+from models import RequestType
+
+
+class FlakyRedis:
+    def __init__(self):
+        self.down = True
+        self.calls = 0
+
+    async def set(self, name, value, ex, nx):
+        self.calls += 1
+        if self.down:
+            raise ConnectionError("redis down")
+        return True
+
+    async def ping(self):
+        if self.down:
+            raise ConnectionError("redis down")
+        return True
+
+    async def aclose(self):
+        pass
+
+
+def test_breaker_fails_over_to_memory_and_closes_once_a_probe_succeeds():
+    async def run():
+        pool = RedisPool(None, failure_threshold=3, probe_interval=0.01)
+        pool.client = redis = FlakyRedis()
+        limiter = RateLimiter(pool)
+        results = [await limiter.hit(f"k{i}", 60) for i in range(6)]
+        calls_while_open = redis.calls
+        await asyncio.sleep(0.05)
+        assert pool.stats()["state"] == "open"
+        redis.down = False
+        await asyncio.sleep(0.05)
+        assert await limiter.hit("k9", 60)
+        await pool.close()
+        return results, calls_while_open, redis.calls, pool.stats()
+
+    results, calls_while_open, calls, stats = asyncio.run(run())
+    assert results == [True] * 6  # served from memory throughout
+    assert calls_while_open == 3  # the last three never waited on Redis
+    assert calls == 4
+    assert (stats["state"], stats["opened"], stats["closed"], stats["rejected"]) == ("closed", 1, 1, 3)
+    assert stats["failed_probes"] >= 1
+
+
+def test_success_resets_the_consecutive_failure_count():
+    pool = RedisPool(None, failure_threshold=2)
+    for _ in range(5):
+        pool.failure()
+        pool.success()
+    assert pool.stats()["state"] == "closed"
+
+
+def test_limiters_built_on_one_pool_share_its_client_and_breaker():
+    async def run():
+        pool = RedisPool(None, failure_threshold=2, probe_interval=60)
+        pool.client = redis = FlakyRedis()
+        daily, combat = RateLimiter(pool), RateLimiter(pool)
+        await daily.hit("spam:daily:1", 3)
+        await combat.hit("rob:1", 120)
+        await combat.hit("kill:1", 180)  # breaker already open from the two failures above
+        await pool.close()
+        return redis.calls, pool.stats()
+
+    calls, stats = asyncio.run(run())
+    assert calls == 2
+    assert (stats["opened"], stats["rejected"]) == (1, 1)
+
+
+def test_consent_claims_and_leaderboard_flushes_skip_redis_while_the_breaker_is_open():
+    async def run():
+        pool = RedisPool(None, failure_threshold=1, probe_interval=60)
+        pool.client = redis = FlakyRedis()
+        tokens = ConsentTokens()
+        tokens.configure(True, "bot-token", pool)
+        first = tokens.read(tokens.issue("ks", RequestType.KISS, 1, 2, ttl_seconds=60))
+        second = tokens.read(tokens.issue("ks", RequestType.KISS, 3, 4, ttl_seconds=60))
+        claims = [await tokens.claim(first), await tokens.claim(second), await tokens.claim(second)]
+        store = LeaderboardStore("redis://unused")
+        store._pool = pool
+        store.set("users", 1, 10)
+        flushed = await store.flush()
+        await pool.close()
+        return claims, redis.calls, flushed, store.stats()["pending"]
+
+    claims, calls, flushed, pending = asyncio.run(run())
+    assert claims == [True, True, False]  # the seen-set moved to memory
+    assert calls == 1  # only the claim that opened the breaker reached Redis
+    assert (flushed, pending) == (0, 1)  # kept for when Redis is back
@@ -0,0 +1,71 @@
+import asyncio
+
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from models import Base, Relationship, RelationshipType, User
+from relationship_graph import RelationshipGraph
+
+PARENT, CHILD, LOVER = RelationshipType.PARENT, RelationshipType.CHILD, RelationshipType.LOVER
+
+
+async def _graph_session(links):
+    engine = create_async_engine("sqlite+aiosqlite://")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    sessions = async_sessionmaker(engine, expire_on_commit=False)
+    async with sessions() as session:
+        session.add_all(User(id=i, telegram_id=100 + i) for i in range(1, 10))
+        for parent, child in links:
+            session.add_all([Relationship(user_id=parent, target_id=child, type=PARENT)])
+            session.add_all([Relationship(user_id=child, target_id=parent, type=CHILD)])
+        session.add_all([Relationship(user_id=3, target_id=9, type=LOVER), Relationship(user_id=9, target_id=3, type=LOVER)])
+        await session.commit()
+    return engine, sessions
+
+
+def test_family_is_loaded_once_and_limited_by_depth():
+    # 1 -> 2 -> 3 -> 4 -> 5, and 3 -> 6
+    links = [(1, 2), (2, 3), (3, 4), (4, 5), (3, 6)]
+
+    async def run():
+        engine, sessions = await _graph_session(links)
+        graph = RelationshipGraph()
+        async with sessions() as session:
+            first = await graph.family(session, 3, depth=1)
+            deep = await graph.family(session, 3, depth=2)
+            cached_loads = graph.loads
+            deeper = await graph.family(session, 3, depth=9)
+            lovers = await graph.lovers(session, 3)
+        await engine.dispose()
+        return first, deep, cached_loads, deeper, lovers, graph.loads
+
+    first, deep, cached_loads, deeper, lovers, loads = asyncio.run(run())
+    assert first.ancestors == [[2]]
+    assert first.descendants == [(1, 4), (1, 6)]
+    assert deep.ancestors == [[2], [1]]
+    assert deep.descendants == [(1, 4), (2, 5), (1, 6)]
+    # The depth-1 load already holds every row a two-generation walk reads.
+    assert cached_loads == 1
+    assert deeper == deep
+    assert lovers == (9,)
+    assert loads == 2
+
+
+def test_links_patch_cached_users():
+    async def run():
+        engine, sessions = await _graph_session([(1, 2)])
+        graph = RelationshipGraph()
+        async with sessions() as session:
+            loaded = await graph.family(session, 1)
+            graph.link(1, 2, PARENT, present=False)
+            graph.link(2, 1, CHILD, present=False)
+            removed = await graph.family(session, 1)
+            graph.link(1, 2, PARENT)
+            restored = await graph.family(session, 1)
+        await engine.dispose()
+        return loaded, removed, restored, graph.loads
+
+    loaded, removed, restored, loads = asyncio.run(run())
+    assert loaded.descendants == restored.descendants == [(1, 2)]
+    assert removed.descendants == []
+    assert loads == 1
@@ -0,0 +1,56 @@
+import asyncio
+
+import pytest
+
+from bot.services.render_cache import RenderCache
+
+
+def _builder(calls, delay=0):
+    async def build():
+        calls.append(1)
+        await asyncio.sleep(delay)
+        return f"text {len(calls)}"
+
+    return build
+
+
+def test_serves_cached_text_until_a_scope_is_bumped():
+    async def run():
+        cache = RenderCache()
+        calls = []
+        first = await cache.get("top", ["group:1", "clans"], _builder(calls))
+        again = await cache.get("top", ["group:1", "clans"], _builder(calls))
+        cache.bump("group:2")
+        untouched = await cache.get("top", ["group:1", "clans"], _builder(calls))
+        cache.bump("clans")
+        rebuilt = await cache.get("top", ["group:1", "clans"], _builder(calls))
+        return first, again, untouched, rebuilt, len(calls)
+
+    assert asyncio.run(run()) == ("text 1", "text 1", "text 1", "text 2", 2)
+
+
+def test_concurrent_misses_share_one_build():
+    async def run():
+        cache = RenderCache()
+        calls = []
+        texts = await asyncio.gather(*(cache.get("clans", ["clans"], _builder(calls, 0.01)) for _ in range(20)))
+        return texts, len(calls), cache.stats()["shared"]
+
+    texts, builds, shared = asyncio.run(run())
+    assert set(texts) == {"text 1"}
+    assert builds == 1
+    assert shared == 19
+
+
+def test_failed_build_is_not_cached():
+    async def run():
+        cache = RenderCache()
+
+        async def broken():
+            raise RuntimeError("db down")
+
+        with pytest.raises(RuntimeError):
+            await cache.get("clans", ["clans"], broken)
+        return await cache.get("clans", ["clans"], _builder([]))
+
+    assert asyncio.run(run()) == "text 1"
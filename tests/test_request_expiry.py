@@ -0,0 +1,51 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+
+import db
+from bot.services.outbound import outbound
+from expiry import RequestExpiry
+from models import PendingRequest, RequestStatus, RequestType
+
+
+def test_purge_deletes_only_settled_rows_past_retention(memory_db, monkeypatch):
+    now = datetime(2024, 1, 10)
+    old, recent = now - timedelta(days=2), now - timedelta(hours=1)
+    rows = [
+        (RequestStatus.EXPIRED, old),
+        (RequestStatus.ACCEPTED, old),
+        (RequestStatus.DECLINED, old),
+        (RequestStatus.PENDING, old),  # still the expiry timer's job
+        (RequestStatus.EXPIRED, recent),
+    ]
+
+    async def scenario(sessions):
+        monkeypatch.setattr(db, "_sessionmaker", sessions)
+        async with sessions() as session:
+            session.add_all(
+                PendingRequest(requester_id=1, target_id=2, group_id=1, type=RequestType.KISS, status=status, expires_at=at)
+                for status, at in rows
+            )
+            await session.commit()
+        expiry = RequestExpiry()
+        purged = await expiry.purge(now)
+        async with sessions() as session:
+            left = (await session.execute(PendingRequest.__table__.select())).all()
+        return purged, sorted(row.status.name for row in left)
+
+    purged, left = memory_db(scenario)
+    assert purged == 3
+    assert left == ["EXPIRED", "PENDING"]
+
+
+def test_failed_prompt_is_logged_and_keeps_its_timer(monkeypatch, caplog):
+    async def fail(*args, **kwargs):
+        raise RuntimeError("telegram down")
+
+    monkeypatch.setattr(outbound, "reply_and_wait", fail)
+    expiry = RequestExpiry()
+    request = PendingRequest(id=7, expires_at=datetime.utcnow() + timedelta(minutes=2))
+    with caplog.at_level(logging.ERROR, logger="expiry"):
+        asyncio.run(expiry.post(None, request, "Accept?"))
+    assert "request 7" in caplog.text
+    assert len(expiry) == 1
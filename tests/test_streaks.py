@@ -0,0 +1,68 @@
+from datetime import date, timedelta
+
+from sqlalchemy import select, update
+
+from models import DailyActivity, User
+from repositories import backfill_streaks, get_streak, streak_values
+from utils import streak_summary
+
+D = date(2024, 3, 10)
+
+
+def _day(offset: int) -> date:
+    return D + timedelta(days=offset)
+
+
+def test_streak_summary_tracks_the_run_ending_on_the_last_day():
+    assert streak_summary([]) == (0, 0, None)
+    days = [_day(0), _day(1), _day(1), _day(2), _day(5), _day(6)]
+    assert streak_summary(days) == (2, 3, _day(6))
+
+
+def test_case_update_extends_resets_and_ignores_repeat_days(memory_db):
+    async def scenario(sessions):
+        async with sessions() as session:
+            session.add(User(id=1, telegram_id=101))
+            await session.commit()
+            seen = []
+            for offset in (0, 1, 1, 2, 5, 6):
+                day = _day(offset)
+                await session.execute(
+                    update(User).where(User.id == 1).values(streak_values(day, day - timedelta(days=1)))
+                )
+                await session.commit()
+                row = (await session.execute(select(User.current_streak, User.longest_streak, User.last_active_day))).one()
+                seen.append(tuple(row))
+        return seen
+
+    seen = memory_db(scenario)
+    assert [current for current, _, _ in seen] == [1, 2, 2, 3, 1, 2]
+    assert seen[-1] == (2, 3, _day(6))
+
+
+def test_backfill_matches_the_history_and_get_streak_needs_today(memory_db):
+    today = date.today()
+
+    async def scenario(sessions):
+        async with sessions() as session:
+            session.add_all(User(id=i, telegram_id=100 + i) for i in (1, 2, 3))
+            history = {1: [-3, -2, -1, 0], 2: [-9, -8, -1], 3: []}
+            session.add_all(
+                DailyActivity(user_id=user_id, day=today + timedelta(days=offset), count=1)
+                for user_id, offsets in history.items()
+                for offset in offsets
+            )
+            await session.commit()
+            updated = await backfill_streaks(session, batch_size=2)
+        async with sessions() as session:
+            users = {user.id: user for user in (await session.scalars(select(User))).all()}
+            streaks = {user_id: await get_streak(session, user) for user_id, user in users.items()}
+        return updated, users, streaks
+
+    updated, users, streaks = memory_db(scenario)
+    assert updated == 3
+    assert (users[1].current_streak, users[1].longest_streak) == (4, 4)
+    assert (users[2].current_streak, users[2].longest_streak, users[2].last_active_day) == (1, 2, today - timedelta(days=1))
+    assert users[3].last_active_day is None
+    # Yesterday's streak is broken until the user posts today, as with the old day-by-day count.
+    assert streaks == {1: 4, 2: 0, 3: 0}
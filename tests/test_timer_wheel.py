@@ -0,0 +1,48 @@
+import random
+
+from bot.utils.timer_wheel import TimerWheel
+
+
+def test_fires_on_the_tick_after_the_deadline():
+    wheel = TimerWheel(tick=1.0, slots=8, start=0)
+    wheel.schedule("a", 2.5)
+    wheel.schedule("b", 3.0)
+    assert wheel.advance(2.9) == []
+    assert sorted(wheel.advance(3.0)) == ["a", "b"]
+    assert len(wheel) == 0
+
+
+def test_cancel_and_reschedule():
+    wheel = TimerWheel(tick=1.0, slots=8, start=0)
+    wheel.schedule("a", 2)
+    wheel.schedule("b", 2)
+    assert wheel.cancel("a")
+    assert not wheel.cancel("a")
+    wheel.schedule("b", 5)
+    assert wheel.advance(4) == []
+    assert wheel.advance(5) == ["b"]
+
+
+def test_matches_reference_across_revolutions_and_jumps():
+    rng = random.Random(3)
+    wheel = TimerWheel(tick=0.5, slots=16, start=0)
+    deadlines = {}
+    now = 0.0
+    for _ in range(300):
+        for _ in range(rng.randint(0, 5)):
+            key = rng.randint(0, 80)
+            deadlines[key] = now + rng.uniform(-1, 40)
+            wheel.schedule(key, deadlines[key])
+        if rng.random() < 0.2 and deadlines:
+            key = rng.choice(list(deadlines))
+            wheel.cancel(key)
+            del deadlines[key]
+        scheduled_at = now
+        now += rng.choice([0.3, 0.5, 2, 11])
+        fired = set(wheel.advance(now))
+        # Never early, and at most one tick late (counted from scheduling for past deadlines).
+        assert fired <= {key for key, when in deadlines.items() if when <= now}
+        assert {key for key, when in deadlines.items() if max(when, scheduled_at) + 0.5 <= now} <= fired
+        for key in fired:
+            del deadlines[key]
+    assert len(wheel) == len(deadlines)
@@ -0,0 +1,31 @@
+import asyncio
+import time
+
+from bot.utils.rate_limit import ChatThrottle, TokenBucket
+
+
+def test_token_bucket_paces_after_burst():
+    async def run():
+        bucket = TokenBucket(rate=50, capacity=2)
+        start = time.monotonic()
+        for _ in range(4):
+            await bucket.acquire()
+        return time.monotonic() - start
+
+    elapsed = asyncio.run(run())
+    assert 0.03 <= elapsed < 0.5
+
+
+def test_chat_throttle_only_delays_same_chat():
+    async def run():
+        throttle = ChatThrottle(interval=0.05)
+        start = time.monotonic()
+        await throttle.acquire(1)
+        await throttle.acquire(2)
+        first = time.monotonic() - start
+        await throttle.acquire(1)
+        return first, time.monotonic() - start
+
+    first, second = asyncio.run(run())
+    assert first < 0.03
+    assert second >= 0.04
@@ -0,0 +1,87 @@
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import event, select
+
+import repositories
+from models import Group, User, UserGroup
+from repositories import ensure_user_group, get_or_create_group, get_or_create_user, get_user_group_stats
+from upserts import conflict_columns, upsert
+
+
+def _tg_user(telegram_id: int, username: str):
+    return SimpleNamespace(id=telegram_id, username=username, first_name="First", last_name=None)
+
+
+def test_conflict_targets_resolve_to_columns():
+    assert conflict_columns(UserGroup, "uq_user_group") == ["user_id", "group_id"]
+    assert conflict_columns(User, "telegram_id") == ["telegram_id"]
+    assert conflict_columns(User, ["telegram_id"]) == ["telegram_id"]
+    with pytest.raises(ValueError):
+        conflict_columns(User, "uq_missing")
+
+
+def test_upsert_increments_updates_or_leaves_the_row(memory_db):
+    async def scenario(sessions):
+        async with sessions() as session:
+            session.add(User(id=1, telegram_id=101, username="old"))
+            session.add(Group(id=1, telegram_id=-1, title="g"))
+            await session.commit()
+            row = {"user_id": 1, "group_id": 1, "message_count": 2}
+            await session.execute(upsert(session, UserGroup, row, "uq_user_group", increment=("message_count",)))
+            await session.execute(upsert(session, UserGroup, row, "uq_user_group", increment=("message_count",)))
+            await session.execute(upsert(session, UserGroup, {**row, "message_count": 50}, "uq_user_group"))
+            await session.execute(
+                upsert(session, User, {"telegram_id": 101, "username": "new"}, "telegram_id", update=("username",))
+            )
+            await session.commit()
+            count = await session.scalar(select(UserGroup.message_count))
+            username = await session.scalar(select(User.username))
+        return count, username
+
+    assert memory_db(scenario) == (4, "new")
+
+
+def test_first_contact_upserts_rows_and_refreshes_profiles(memory_db):
+    async def scenario(sessions):
+        async with sessions() as session:
+            first = await get_or_create_user(session, _tg_user(7, "before"))
+            await session.commit()
+        # A cold cache (another worker, a restart) must update the row, not insert a duplicate.
+        repositories.user_cache.clear()
+        async with sessions() as session:
+            again = await get_or_create_user(session, _tg_user(7, "after"))
+            group = await get_or_create_group(session, SimpleNamespace(id=-5, title="Chat", type="group"))
+            await ensure_user_group(session, again, group)
+            await ensure_user_group(session, again, group)
+            await session.commit()
+            users = (await session.execute(select(User.id, User.username))).all()
+            links = (await session.execute(select(UserGroup.user_id, UserGroup.group_id))).all()
+        return first.id, again.id, users, links, group.id
+
+    first_id, again_id, users, links, group_id = memory_db(scenario)
+    assert first_id == again_id
+    assert users == [(first_id, "after")]
+    assert links == [(first_id, group_id)]
+
+
+def test_group_stats_are_read_without_writing_once_the_row_exists(memory_db):
+    async def scenario(sessions):
+        statements = []
+        event.listen(sessions.kw["bind"].sync_engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+        async with sessions() as session:
+            user = await get_or_create_user(session, _tg_user(8, "u"))
+            group = await get_or_create_group(session, SimpleNamespace(id=-6, title="Chat", type="group"))
+            await session.commit()
+            kinds = []
+            for _ in range(2):
+                statements.clear()
+                stats = await get_user_group_stats(session, user, group)
+                await session.commit()
+                kinds.append([statement.split()[0] for statement in statements])
+        return kinds, stats.message_count
+
+    (first, second), count = memory_db(scenario)
+    assert first == ["SELECT", "INSERT"]
+    assert second == ["SELECT"]
+    assert count == 0
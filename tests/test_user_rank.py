@@ -0,0 +1,41 @@
+import repositories
+from bot.services.leaderboard_store import LeaderboardStore
+from models import Group, User, UserGroup
+from repositories import leaderboard_boards, user_rank
+
+# user id -> (points, messages in group 1); 2, 3 and 5 tie on points, 3 and 5 on messages too.
+MEMBERS = {1: (50, 1), 2: (20, 9), 3: (20, 4), 4: (5, 0), 5: (20, 4)}
+
+
+async def _ranks(sessions):
+    async with sessions() as session:
+        group = await session.get(Group, 1)
+        ranks = {}
+        for user_id in MEMBERS:
+            user = await session.get(User, user_id)
+            ranks[user_id] = (await user_rank(session, user), await user_rank(session, user, group))
+    return ranks
+
+
+def test_sql_fallback_orders_ties_like_the_boards(memory_db, monkeypatch):
+    async def scenario(sessions):
+        async with sessions() as session:
+            session.add(Group(id=1, telegram_id=-1, title="g"))
+            session.add_all(User(id=i, telegram_id=100 + i, points=points) for i, (points, _) in MEMBERS.items())
+            session.add_all(UserGroup(user_id=i, group_id=1, message_count=msgs) for i, (_, msgs) in MEMBERS.items())
+            await session.commit()
+        from_sql = await _ranks(sessions)
+        store = LeaderboardStore()
+        monkeypatch.setattr(repositories, "leaderboards", store)
+
+        async def load():
+            async with sessions() as session:
+                return await leaderboard_boards(session)
+
+        await store.rebuild(load)
+        return from_sql, await _ranks(sessions)
+
+    from_sql, from_boards = memory_db(scenario)
+    assert from_sql == from_boards
+    assert [from_sql[i][0] for i in (1, 2, 3, 5, 4)] == [(n, 5) for n in range(1, 6)]
+    assert [from_sql[i][1] for i in (1, 2, 3, 5, 4)] == [(n, 5) for n in range(1, 6)]
@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+from typing import Iterable, Sequence
+
+from sqlalchemy import Table
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+def _table(model) -> Table:
+    return model if isinstance(model, Table) else model.__table__
+
+
+def dialect_insert(session: AsyncSession, model):
+    dialect = session.get_bind().dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert(model)
+    if dialect == "sqlite":
+        return sqlite.insert(model)
+    raise NotImplementedError(f"Upserts are not supported on {dialect}")
+
+
+def conflict_columns(model, conflict: str | Sequence[str]) -> list[str]:
+    # Named unique constraints are resolved to their columns so the same target
+    # works for SQLite, which only accepts column lists in ON CONFLICT.
+    if not isinstance(conflict, str):
+        return list(conflict)
+    table = _table(model)
+    for constraint in table.constraints:
+        if constraint.name == conflict:
+            return [column.name for column in constraint.columns]
+    if conflict in table.c:
+        return [conflict]
+    raise ValueError(f"{table.name} has no unique constraint named {conflict}")
+
+
+def upsert(
+    session: AsyncSession,
+    model,
+    values: dict | list[dict],
+    conflict: str | Sequence[str],
+    *,
+    update: Iterable[str] = (),
+    increment: Iterable[str] = (),
+):
+    # ``update`` columns take the inserted value, ``increment`` columns add it to
+    # the stored one; with neither the conflicting row is left untouched.
+    table = _table(model)
+    stmt = dialect_insert(session, model).values(values)
+    set_ = {name: stmt.excluded[name] for name in update}
+    set_.update({name: table.c[name] + stmt.excluded[name] for name in increment})
+    index_elements = conflict_columns(table, conflict)
+    if not set_:
+        return stmt.on_conflict_do_nothing(index_elements=index_elements)
+    return stmt.on_conflict_do_update(index_elements=index_elements, set_=set_)
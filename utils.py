@@ -1,7 +1,9 @@
 from __future__ import annotations
 
 import asyncio
-from datetime import date, timedelta
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Iterable, Iterator
+from zoneinfo import ZoneInfo
 
 from aiogram.types import Message, User as TgUser
 
@@ -22,19 +24,39 @@ def ensure_group_message(message: Message) -> bool:
     return message.chat.type in {"group", "supergroup"}
 
 
-def consecutive_streak(days: list[date]) -> int:
-    if not days:
-        return 0
-    unique_days = sorted(set(days), reverse=True)
-    streak = 0
-    cursor = date.today()
-    for d in unique_days:
-        if d == cursor:
-            streak += 1
-            cursor = cursor - timedelta(days=1)
-        elif d < cursor:
-            break
-    return streak
+def chunked(rows: list, size: int) -> Iterator[list]:
+    for start in range(0, len(rows), size):
+        yield rows[start : start + size]
+
+
+def streak_summary(days: Iterable[date]) -> tuple[int, int, date | None]:
+    # Expects ascending days; returns (streak ending on the last day, longest streak, last day).
+    current = longest = 0
+    last: date | None = None
+    for day in days:
+        if last is not None and day <= last:
+            continue
+        current = current + 1 if last is not None and day - last == timedelta(days=1) else 1
+        longest = max(longest, current)
+        last = day
+    return current, longest, last
+
+
+LEADERBOARD_TZ = ZoneInfo("Asia/Kolkata")
+LEADERBOARD_SLOT_HOURS = (0, 6, 12, 18)
+
+
+def next_leaderboard_slot(after: datetime | None = None) -> datetime:
+    # Slots are fixed wall-clock hours in Asia/Kolkata; the result is naive UTC like the rest of the schema.
+    after = (after or datetime.utcnow()).replace(tzinfo=timezone.utc)
+    local = after.astimezone(LEADERBOARD_TZ)
+    for offset in range(2):
+        day = local.date() + timedelta(days=offset)
+        for hour in LEADERBOARD_SLOT_HOURS:
+            slot = datetime.combine(day, time(hour), LEADERBOARD_TZ)
+            if slot > local:
+                return slot.astimezone(timezone.utc).replace(tzinfo=None)
+    raise AssertionError("unreachable")
 
 
 async def run_periodic(interval: int, coro):